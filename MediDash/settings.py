@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'dashboard.middleware.ReplicaReadMiddleware',
 ]
 
 ROOT_URLCONF = 'MediDash.urls'
@@ -81,6 +83,8 @@ WSGI_APPLICATION = 'MediDash.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+conn_max_age = os.environ.get('POSTGRES_CONN_MAX_AGE', '60')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -89,9 +93,79 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.environ.get('POSTGRES_HOST', 'db'),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Seconds a connection is reused across requests instead of reconnecting and
+        # authenticating each time; 0 closes it after every request, empty never does
+        'CONN_MAX_AGE': int(conn_max_age) if conn_max_age else None,
+        # Ping a reused connection before its first query of a request and reconnect if it's gone
+        'CONN_HEALTH_CHECKS': os.environ.get('POSTGRES_CONN_HEALTH_CHECKS', '1') == '1',
+        # Behind PgBouncer in transaction mode a named cursor can't outlive its
+        # transaction, so streaming exports fall back to client-side cursors
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_POOLER') == 'pgbouncer',
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('POSTGRES_CONNECT_TIMEOUT', 10)),
+        },
+    }
+}
+
+# Optional read replica (a streaming standby of the primary) for the dashboard pages and
+# APIs; imports, the admin and every write stay on the primary (dashboard.routers)
+if os.environ.get('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['dashboard.routers.ReplicaRouter']
+
+# Seconds a client that wrote reads from the primary; more than the replica usually lags
+REPLICA_LAG_SECONDS = int(os.environ.get('REPLICA_LAG_SECONDS', 10))
+
+
+# Cache
+# Shared by every worker process: Redis when REDIS_URL is set (requires the
+# redis package), otherwise files in CACHE_DIR on the local disk
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'medidash-cache')),
+        }
+    }
+
+# Seconds each consolidated dashboard section stays cached. Keys also carry the
+# data version, so imports and edits invalidate the sections immediately.
+DASHBOARD_CACHE_TTLS = {
+    'kpis': 60,
+    'distributions': 300,
+    'location': 900,
+    'locations': 900,  # per-location summary shared by the location page and api/location-risk
+    'prediction': 3600,
+    'queries': 600,
 }
 
+# Seconds past its TTL a section is still served while one process refreshes it
+DASHBOARD_CACHE_STALE_TTL = 600
+
+# Threads the consolidated dashboard builds its sections on concurrently (per process); each
+# holds a database connection, so keep workers x processes within the server's max_connections
+DASHBOARD_SECTION_WORKERS = int(os.environ.get('DASHBOARD_SECTION_WORKERS', 8))
+
+# Where the train_forecast command stores the fitted forecast models
+FORECAST_MODEL_DIR = os.environ.get('FORECAST_MODEL_DIR', os.path.join(BASE_DIR, 'forecast_models'))
+
+# Forecaster fitted by train_forecast: holt_winters, seasonal_naive, poisson_glm or random_forest
+FORECAST_MODEL = os.environ.get('FORECAST_MODEL', 'holt_winters')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
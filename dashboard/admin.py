@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Location, Demographics, Person, MedicalHistory, 
-    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord
+    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord,
+    ImportManifest
 )
 
 @admin.register(Location)
@@ -66,3 +67,9 @@ class HealthRecordAdmin(admin.ModelAdmin):
     list_filter = ['disease_severity', 'infection_risk_level', 'outbreak_status', 'hospitalization_required']
     date_hierarchy = 'date_of_data_collection'
     search_fields = ['person__demographics__occupation', 'disease__name']
+
+@admin.register(ImportManifest)
+class ImportManifestAdmin(admin.ModelAdmin):
+    list_display = ['id', 'file_path', 'status', 'last_chunk', 'records_imported', 'started_at', 'updated_at']
+    list_filter = ['status']
+    search_fields = ['file_path', 'file_hash']
@@ -0,0 +1,226 @@
+"""
+Section-level caching for the consolidated dashboard.
+
+Sections are stored in the default cache, which settings point at a backend
+shared by every worker process, as evaluated plain data. Keys include the data
+version, so any change to the data makes every section miss, and the current
+date, so windows relative to today ("last 30 days", active cases) move on at
+midnight even when the data doesn't change. Each section's TTL
+(settings.DASHBOARD_CACHE_TTLS) bounds how long figures are reused within a day.
+
+Entries outlive their TTL by DASHBOARD_CACHE_STALE_TTL seconds. A request that
+finds a stale entry returns it at once and, if it wins the section's fill lock,
+refreshes it in a background thread. The same goes for a new data version:
+every bump (one per import chunk, one per admin save) changes all the keys,
+so each section also keeps a pointer to its latest entry, and until the new
+version's entry is built requests are served the previous one. Only a
+request that finds nothing at all waits for whichever process holds the lock
+instead of rebuilding the section again. Code inside
+``track_previous_versions`` learns which sections were served from an older
+version, so the views can leave the new version's validators off those
+responses.
+
+The fill locks are cache.add() calls, which Redis and Memcached run
+atomically. FileBasedCache (the default without REDIS_URL) checks for the key
+and then writes it, so two processes can both win; with it, the locks are
+files created with O_EXCL in a locks/ directory next to the cache files
+instead.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Used for sections missing from settings.DASHBOARD_CACHE_TTLS
+DEFAULT_TTL = 300
+
+# Seconds a rebuild may hold a section's fill lock before another process may take over
+LOCK_TIMEOUT = 60
+
+# Seconds between checks while waiting for another process to fill a section
+WAIT_INTERVAL = 0.05
+
+# List of the sections served from an older entry, inside track_previous_versions
+_served_previous = ContextVar('dashboard_served_previous', default=None)
+
+
+@contextmanager
+def track_previous_versions():
+    """Yield a list of the sections that cached_section serves from an older entry inside the block
+
+    The list is shared, not copied, with the threads that sync_to_async runs
+    the section builds in.
+    """
+    served = []
+    token = _served_previous.set(served)
+    try:
+        yield served
+    finally:
+        _served_previous.reset(token)
+
+
+def section_key(name, version):
+    return f'dashboard:section:{name}:v{version}:{timezone.localdate():%Y%m%d}'
+
+
+def section_ttl(name):
+    return getattr(settings, 'DASHBOARD_CACHE_TTLS', {}).get(name, DEFAULT_TTL)
+
+
+def stale_ttl():
+    return getattr(settings, 'DASHBOARD_CACHE_STALE_TTL', 600)
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _latest_key(name):
+    return f'dashboard:section:{name}:latest'
+
+
+def _uses_lock_files():
+    return isinstance(caches['default'], FileBasedCache)
+
+
+def _lock_file(lock):
+    directory = os.path.join(settings.CACHES['default']['LOCATION'], 'locks')
+    return os.path.join(directory, f'{hashlib.sha256(lock.encode()).hexdigest()}.lock')
+
+
+def _create_exclusively(path):
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def _acquire(lock):
+    """Take a fill lock, returning False if another process holds it"""
+    if not _uses_lock_files():
+        return cache.add(lock, True, LOCK_TIMEOUT)
+
+    path = _lock_file(lock)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if _create_exclusively(path):
+        return True
+    # A lock file older than LOCK_TIMEOUT was left by a process that died
+    try:
+        if time.time() - os.path.getmtime(path) <= LOCK_TIMEOUT:
+            return False
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return _create_exclusively(path)
+
+
+def _release(lock):
+    if not _uses_lock_files():
+        cache.delete(lock)
+        return
+    try:
+        os.remove(_lock_file(lock))
+    except FileNotFoundError:
+        pass
+
+
+def _fill(name, key, build):
+    """Build a section and store it with its freshness deadline"""
+    payload = build()
+    ttl = section_ttl(name)
+    cache.set(key, {'payload': payload, 'fresh_until': time.time() + ttl}, ttl + stale_ttl())
+    # No timeout: the pointer outlives the entry, which expires on its own
+    cache.set(_latest_key(name), key, None)
+    return payload
+
+
+def _previous_entry(name, key):
+    """The section's latest entry under another key (an older data version or day), or None"""
+    latest = cache.get(_latest_key(name))
+    if latest is None or latest == key:
+        return None
+    return cache.get(latest)
+
+
+def _refresh_in_background(name, key, build):
+    """Rebuild a stale section in a daemon thread; the caller already holds the fill lock"""
+    def run():
+        try:
+            _fill(name, key, build)
+        except Exception:
+            logger.exception('Refreshing dashboard section %s failed', name)
+        finally:
+            _release(_lock_key(key))
+            # Database connections are per thread; don't leave this one open
+            connections.close_all()
+
+    threading.Thread(target=run, name=f'dashboard-refresh-{name}', daemon=True).start()
+
+
+def cached_section(name, build, version):
+    """Return the cached payload of a section, calling `build()` in one process at a time to fill it"""
+    key = section_key(name, version)
+    lock = _lock_key(key)
+
+    entry = cache.get(key)
+    if entry is not None:
+        if entry['fresh_until'] <= time.time() and _acquire(lock):
+            _refresh_in_background(name, key, build)
+        return entry['payload']
+
+    # Not built for this version yet: serve the previous one while one process builds it
+    previous = _previous_entry(name, key)
+    if previous is not None:
+        if _acquire(lock):
+            _refresh_in_background(name, key, build)
+        served = _served_previous.get()
+        if served is not None:
+            served.append(name)
+        return previous['payload']
+
+    # Nothing cached: one process builds, the others wait for its result.
+    # The lock expires on its own if its holder dies.
+    while not _acquire(lock):
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['payload']
+
+    try:
+        return _fill(name, key, build)
+    finally:
+        _release(lock)
+
+
+def refresh_section(name, build, version, ahead=0):
+    """Rebuild a section that is missing or goes stale within `ahead` seconds
+
+    Used by the refresh_dashboard_cache command. Returns True if this call
+    rebuilt the section, False if it was still fresh or another process held
+    its lock.
+    """
+    key = section_key(name, version)
+    entry = cache.get(key)
+    if entry is not None and entry['fresh_until'] - time.time() > ahead:
+        return False
+
+    lock = _lock_key(key)
+    if not _acquire(lock):
+        return False
+    try:
+        _fill(name, key, build)
+    finally:
+        _release(lock)
+    return True
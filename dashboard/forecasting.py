@@ -0,0 +1,380 @@
+"""
+Offline disease forecasts.
+
+Forecasters share a small fit/predict interface and work on the dense daily
+series from the rollup: additive Holt-Winters, seasonal naive and a Poisson
+GLM in plain NumPy, plus the original random forest. All return prediction
+intervals.
+
+Models are fitted by the train_forecast management command, never inside a
+request, and persisted with joblib under settings.FORECAST_MODEL_DIR, one file
+per data version. Views load the newest artifact once per process and serve
+its precomputed predictions; a new data version only triggers a refit the next
+time the command runs.
+"""
+import glob
+import os
+import threading
+import time
+from datetime import timedelta
+from statistics import NormalDist
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from sklearn.ensemble import RandomForestRegressor
+
+from .models import DailyHealthRollup
+
+# Days forecast by default
+FORECAST_DAYS = 30
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def model_dir():
+    return getattr(settings, 'FORECAST_MODEL_DIR', os.path.join(settings.BASE_DIR, 'forecast_models'))
+
+
+def artifact_path(version):
+    return os.path.join(model_dir(), f'forecast-v{version}.joblib')
+
+
+def daily_series(using=None):
+    """Return (dates, counts): records per day from the daily rollup"""
+    rows = DailyHealthRollup.objects.using(using).values('day').annotate(
+        count=Sum('record_count')
+    ).order_by('day')
+    return [row['day'] for row in rows], [row['count'] for row in rows]
+
+
+def densify(dates, counts):
+    """Fill the days missing between the first and last date with zero counts"""
+    if not dates:
+        return [], []
+    by_day = dict(zip(dates, counts))
+    days = [dates[0] + timedelta(days=offset) for offset in range((dates[-1] - dates[0]).days + 1)]
+    return days, [by_day.get(day, 0) for day in days]
+
+
+def future_dates(dates, days_to_predict):
+    """The `days_to_predict` days following the last date"""
+    if not dates:
+        return []
+    return [dates[-1] + timedelta(days=offset + 1) for offset in range(days_to_predict)]
+
+
+class Forecaster:
+    """Daily count model: fit() on a dense series, then predict() a horizon with intervals
+
+    Subclasses implement _fit and _predict; series too short for the model
+    fall back to repeating the last value.
+    """
+
+    name = None
+    min_points = 2
+
+    def fit(self, counts):
+        self.y = np.asarray(counts, dtype='float64')
+        self.fallback = len(self.y) < self.min_points
+        if not self.fallback:
+            self._fit(self.y)
+        return self
+
+    def predict(self, horizon, level=0.95):
+        """Return (mean, lower, upper) arrays for the next `horizon` days, clipped at zero"""
+        if self.fallback:
+            last = self.y[-1] if len(self.y) else 0.0
+            mean = lower = upper = np.full(horizon, last)
+        else:
+            z = NormalDist().inv_cdf((1 + level) / 2)
+            mean, spread = self._predict(horizon, z)
+            lower, upper = mean - spread, mean + spread
+        return np.clip(mean, 0, None), np.clip(lower, 0, None), np.clip(upper, 0, None)
+
+    def _fit(self, y):
+        raise NotImplementedError
+
+    def _predict(self, horizon, z):
+        """Return (mean, half-width of the interval) arrays"""
+        raise NotImplementedError
+
+
+class SeasonalNaiveForecaster(Forecaster):
+    """Repeat the last observed week"""
+
+    name = 'seasonal_naive'
+
+    def __init__(self, season=7):
+        self.season = season
+
+    def _fit(self, y):
+        self.period = self.season if len(y) > self.season else 1
+        errors = y[self.period:] - y[:-self.period]
+        self.sigma = errors.std() if errors.size else 0.0
+
+    def _predict(self, horizon, z):
+        steps = np.arange(horizon)
+        mean = self.y[len(self.y) - self.period + steps % self.period]
+        # Error grows with the number of whole seasons stepped ahead
+        return mean, z * self.sigma * np.sqrt(steps // self.period + 1)
+
+
+class HoltWintersForecaster(Forecaster):
+    """Additive Holt-Winters exponential smoothing
+
+    The smoothing parameters are picked by grid search, with every grid point
+    run through the recursion at once as NumPy vectors.
+    """
+
+    name = 'holt_winters'
+    ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+    BETAS = (0.0, 0.01, 0.05, 0.1, 0.2)
+    GAMMAS = (0.0, 0.05, 0.1, 0.2, 0.3, 0.5)
+
+    def __init__(self, season=7):
+        self.season = season
+
+    def _fit(self, y):
+        # Seasonality needs two full seasons to initialise
+        period = self.season if len(y) >= 2 * self.season else 1
+        alpha, beta, gamma = (grid.ravel() for grid in np.meshgrid(self.ALPHAS, self.BETAS, self.GAMMAS))
+
+        first = y[:period].mean()
+        level = np.full(alpha.size, first)
+        if len(y) >= 2 * period:
+            trend = np.full(alpha.size, (y[period:2 * period].mean() - first) / period)
+        else:
+            trend = np.zeros(alpha.size)
+        seasonal = np.tile(y[:period] - first, (alpha.size, 1))
+        if period == 1:
+            seasonal[:] = 0.0
+        sse = np.zeros(alpha.size)
+
+        for t, value in enumerate(y):
+            current = seasonal[:, t % period]
+            sse += (value - (level + trend + current)) ** 2
+            new_level = alpha * (value - current) + (1 - alpha) * (level + trend)
+            trend = beta * (new_level - level) + (1 - beta) * trend
+            if period > 1:
+                seasonal[:, t % period] = gamma * (value - new_level) + (1 - gamma) * current
+            level = new_level
+
+        best = int(np.argmin(sse))
+        self.period = period
+        self.alpha = alpha[best]
+        self.level, self.trend, self.seasonal = level[best], trend[best], seasonal[best]
+        self.sigma = np.sqrt(sse[best] / len(y))
+
+    def _predict(self, horizon, z):
+        steps = np.arange(1, horizon + 1)
+        mean = self.level + steps * self.trend + self.seasonal[(len(self.y) + steps - 1) % self.period]
+        # Variance of the local level model: sigma^2 * (1 + (h - 1) * alpha^2)
+        return mean, z * self.sigma * np.sqrt(1 + (steps - 1) * self.alpha ** 2)
+
+
+class PoissonGLMForecaster(Forecaster):
+    """Poisson regression of the counts on a log-linear trend and day-of-week effects
+
+    Fitted by iteratively reweighted least squares; intervals use the
+    Pearson dispersion, so overdispersed counts get wider bands.
+    """
+
+    name = 'poisson_glm'
+    ITERATIONS = 50
+
+    def __init__(self, season=7):
+        self.season = season
+
+    def _design(self, index):
+        columns = [np.ones(index.size), index / max(len(self.y), 1)]
+        if self.period > 1:
+            columns += [(index % self.period == day).astype('float64') for day in range(1, self.period)]
+        return np.column_stack(columns)
+
+    def _fit(self, y):
+        self.period = self.season if len(y) >= 2 * self.season else 1
+        x = self._design(np.arange(len(y)))
+        coefficients = np.zeros(x.shape[1])
+        coefficients[0] = np.log(max(y.mean(), 1e-3))
+        ridge = 1e-6 * np.eye(x.shape[1])
+
+        for _ in range(self.ITERATIONS):
+            eta = np.clip(x @ coefficients, -20, 20)
+            mu = np.exp(eta)
+            working = eta + (y - mu) / mu
+            updated = np.linalg.solve(x.T @ (mu[:, None] * x) + ridge, x.T @ (mu * working))
+            converged = np.max(np.abs(updated - coefficients)) < 1e-8
+            coefficients = updated
+            if converged:
+                break
+
+        self.coefficients = coefficients
+        mu = np.exp(np.clip(x @ coefficients, -20, 20))
+        self.dispersion = max(np.sum((y - mu) ** 2 / mu) / max(len(y) - x.shape[1], 1), 1.0)
+
+    def _predict(self, horizon, z):
+        index = np.arange(len(self.y), len(self.y) + horizon)
+        mean = np.exp(np.clip(self._design(index) @ self.coefficients, -20, 20))
+        return mean, z * np.sqrt(self.dispersion * mean)
+
+
+class RandomForestForecaster(Forecaster):
+    """The original random forest on the day index; intervals from the spread of its trees"""
+
+    name = 'random_forest'
+
+    def _fit(self, y):
+        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.model.fit(np.arange(len(y)).reshape(-1, 1), y)
+
+    def _predict(self, horizon, z):
+        future_x = np.arange(len(self.y), len(self.y) + horizon).reshape(-1, 1)
+        per_tree = np.stack([tree.predict(future_x) for tree in self.model.estimators_])
+        return per_tree.mean(axis=0), z * per_tree.std(axis=0)
+
+
+FORECASTERS = {
+    forecaster.name: forecaster
+    for forecaster in (HoltWintersForecaster, SeasonalNaiveForecaster, PoissonGLMForecaster, RandomForestForecaster)
+}
+
+
+def make_forecaster(name=None):
+    """Instantiate a registered forecaster, settings.FORECAST_MODEL by default"""
+    return FORECASTERS[name or getattr(settings, 'FORECAST_MODEL', 'holt_winters')]()
+
+
+def predict_future_counts(model, days_to_predict, level=0.95):
+    """Round a fitted forecaster's predictions to (counts, lower, upper) lists"""
+    mean, lower, upper = model.predict(days_to_predict, level)
+    return [[int(round(value)) for value in values] for values in (mean, lower, upper)]
+
+
+def backtest(counts, names=None, horizon=14, folds=5, level=0.95):
+    """Rolling-origin evaluation of forecasters on a dense daily series
+
+    Each fold fits on everything before its origin and forecasts the next
+    `horizon` days. Returns name -> {'mae', 'rmse', 'coverage', 'fit_ms'}
+    averaged over the folds.
+    """
+    y = np.asarray(counts, dtype='float64')
+    origins = [len(y) - horizon * fold for fold in range(folds, 0, -1)]
+    origins = [origin for origin in origins if origin >= 2]
+    results = {}
+    for name in names or FORECASTERS:
+        errors, covered, fit_times = [], [], []
+        for origin in origins:
+            actual = y[origin:origin + horizon]
+            started = time.perf_counter()
+            model = make_forecaster(name).fit(y[:origin])
+            fit_times.append((time.perf_counter() - started) * 1000)
+            mean, lower, upper = model.predict(actual.size, level)
+            errors.append(actual - mean)
+            covered.append((actual >= lower) & (actual <= upper))
+        if not errors:
+            continue
+        errors, covered = np.concatenate(errors), np.concatenate(covered)
+        results[name] = {
+            'mae': float(np.abs(errors).mean()),
+            'rmse': float(np.sqrt((errors ** 2).mean())),
+            'coverage': float(covered.mean()),
+            'fit_ms': float(np.mean(fit_times)),
+        }
+    return results
+
+
+def series_counts(using=None):
+    """Yield ((location_id, disease_id), first_day, counts) for every series in the rollup
+
+    Each series is dense from its first day up to the last day of any series,
+    so all forecasts start on the same day.
+    """
+    frame = pd.DataFrame.from_records(
+        DailyHealthRollup.objects.using(using)
+        .values('location_id', 'disease_id', 'day')
+        .annotate(count=Sum('record_count'))
+        .order_by()
+        .values_list('location_id', 'disease_id', 'day', 'count'),
+        columns=['location_id', 'disease_id', 'day', 'count'],
+    )
+    if frame.empty:
+        return
+    frame['day'] = pd.to_datetime(frame['day'])
+    last_day = frame['day'].max()
+    for key, series in frame.groupby(['location_id', 'disease_id']):
+        days = pd.date_range(series['day'].min(), last_day, freq='D')
+        counts = series.set_index('day')['count'].reindex(days, fill_value=0)
+        yield key, days[0].date(), counts.to_numpy(dtype='float64')
+
+
+def forecast_series_batch(batch, name, days, level=0.95):
+    """Fit and forecast a batch of series; runs in a pool worker without touching the database
+
+    `batch` holds (key, first_day, counts) items; returns (key, first_day_forecast,
+    predicted, lower, upper) per series.
+    """
+    results = []
+    for key, first_day, counts in batch:
+        model = make_forecaster(name).fit(counts)
+        predicted, lower, upper = predict_future_counts(model, days, level)
+        results.append((key, first_day + timedelta(days=len(counts)), predicted, lower, upper))
+    return results
+
+
+def train(version, days=FORECAST_DAYS, name=None, using='default'):
+    """Fit a model on the current series and persist it as the artifact of `version`"""
+    dates, counts = densify(*daily_series(using))
+    model = make_forecaster(name).fit(counts)
+    prediction_counts, lower, upper = predict_future_counts(model, days)
+    artifact = {
+        'version': version,
+        'model_name': model.name,
+        'trained_at': timezone.now(),
+        'history_end': dates[-1] if dates else None,
+        'model': model,
+        'prediction_dates': future_dates(dates, days),
+        'prediction_counts': prediction_counts,
+        'prediction_lower': lower,
+        'prediction_upper': upper,
+    }
+
+    os.makedirs(model_dir(), exist_ok=True)
+    path = artifact_path(version)
+    # Write then rename, so a reader never sees a half-written file
+    joblib.dump(artifact, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return artifact
+
+
+def prune(keep=3):
+    """Delete all but the `keep` newest artifacts"""
+    paths = sorted(glob.glob(os.path.join(model_dir(), 'forecast-v*.joblib')), key=os.path.getmtime)
+    for path in paths[:-keep] if keep > 0 else paths:
+        os.remove(path)
+
+
+def load_forecast(version=None):
+    """Return the artifact of `version`, or the newest one on disk, or None
+
+    Artifacts are unpickled once per process and then served from memory.
+    """
+    path = artifact_path(version) if version is not None else None
+    if path is None or not os.path.exists(path):
+        candidates = glob.glob(os.path.join(model_dir(), 'forecast-v*.joblib'))
+        if not candidates:
+            return None
+        path = max(candidates, key=os.path.getmtime)
+
+    mtime = os.path.getmtime(path)
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        with _lock:
+            cached = (mtime, joblib.load(path))
+            _loaded.clear()
+            _loaded[path] = cached
+    return cached[1]
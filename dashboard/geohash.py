@@ -0,0 +1,112 @@
+"""
+Geohash encoding and bounding-box cover for the Location spatial index.
+
+A geohash interleaves longitude and latitude bits, so locations that share a
+prefix lie in the same cell and a plain B-tree index on the geohash column
+answers "everything in this cell" as a prefix range scan. A bounding box is
+queried as the handful of cells that cover it, then trimmed with the exact
+coordinates.
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Stored precision, about 5m x 5m
+PRECISION = 9
+
+# Most cells a bounding box is covered with; larger boxes use coarser cells
+MAX_COVER_CELLS = 32
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Return the geohash of a point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def encode_many(latitudes, longitudes, precision=PRECISION):
+    """Geohashes of paired latitude/longitude sequences, for bulk loads that bypass Location.save()"""
+    return [encode(float(latitude), float(longitude), precision) for latitude, longitude in zip(latitudes, longitudes)]
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a cell of `precision` characters"""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def _grid(low, high, size, origin):
+    """Cell indexes from the one holding `low` to the one holding `high`"""
+    limit = round((-origin * 2) / size) - 1
+    first = min(int((low - origin) // size), limit)
+    last = min(int((high - origin) // size), limit)
+    return range(max(first, 0), max(last, 0) + 1)
+
+
+def _cell_count(south, west, north, east, precision):
+    height, width = cell_size(precision)
+    return len(_grid(south, north, height, -90.0)) * len(_grid(west, east, width, -180.0))
+
+
+def cover_precision(south, west, north, east, max_cells=MAX_COVER_CELLS):
+    """Finest precision at which a bounding box spans at most `max_cells` cells (at least 1)
+
+    A box with west > east crosses the antimeridian.
+    """
+    parts = [(west, 180.0), (-180.0, east)] if west > east else [(west, east)]
+    precision = 1
+    while precision < PRECISION and sum(
+            _cell_count(south, part_west, north, part_east, precision + 1)
+            for part_west, part_east in parts) <= max_cells:
+        precision += 1
+    return precision
+
+
+def cover(south, west, north, east, max_cells=MAX_COVER_CELLS):
+    """Return the geohash prefixes covering a bounding box, at cover_precision()
+
+    A box with west > east crosses the antimeridian and is covered in two parts.
+    """
+    precision = cover_precision(south, west, north, east, max_cells)
+    if west > east:
+        return _cells(south, west, north, 180.0, precision) + _cells(south, -180.0, north, east, precision)
+    return _cells(south, west, north, east, precision)
+
+
+def _cells(south, west, north, east, precision):
+    height, width = cell_size(precision)
+    return [
+        encode(-90.0 + (row + 0.5) * height, -180.0 + (column + 0.5) * width, precision)
+        for row in _grid(south, north, height, -90.0)
+        for column in _grid(west, east, width, -180.0)
+    ]
+
+
+def prefix_range(prefix):
+    """(low, high) such that a geohash starts with `prefix` iff low <= geohash < high
+
+    high is None when no geohash sorts after the prefix. Range conditions use a
+    plain B-tree index on every backend, unlike LIKE 'prefix%'.
+    """
+    stem = prefix.rstrip(BASE32[-1])
+    if not stem:
+        return prefix, None
+    return prefix, stem[:-1] + BASE32[BASE32.index(stem[-1]) + 1]
@@ -0,0 +1,662 @@
+"""
+Vectorized bulk loading for the import_data management command.
+
+Each pandas chunk is normalized column-wise, primary keys are reserved up front
+so foreign keys can be wired without round-trips, and every table is loaded in
+one statement: PostgreSQL ``COPY FROM STDIN`` or ``bulk_create`` elsewhere.
+"""
+import hashlib
+import io
+import itertools
+import os
+import time
+
+import django
+import numpy as np
+import pandas as pd
+from django.apps import apps
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from . import geohash
+from .models import (
+    Location, Demographics, Person, MedicalHistory,
+    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord, ImportChunk
+)
+from .partitions import unique_guards
+from .rollups import apply_rollup_deltas, record_deltas, rollup_deltas
+
+# Column holding the upstream record ID, stored as HealthRecord.source_record_id
+SOURCE_ID_COLUMN = 'Record_ID'
+
+# Source column -> (kind, default) for every CSV column the importer reads
+SOURCE_COLUMNS = {
+    SOURCE_ID_COLUMN: ('key', None),
+    'Location': ('str', 'Unknown'),
+    'Location_Type': ('str', 'Unknown'),
+    'Latitude': ('float', 0.0),
+    'Longitude': ('float', 0.0),
+    'Population': ('int', 0),
+    'Age': ('int', 0),
+    'Gender': ('str', 'Unknown'),
+    'Occupation': ('str', 'Unknown'),
+    'SES': ('str', 'Unknown'),
+    'Vaccination_Status': ('str', 'No'),
+    'Chronic_Conditions': ('str', 'None'),
+    'Allergies': ('str', 'None'),
+    'Blood_Type': ('str', 'Unknown'),
+    'Date_of_Data_Collection': ('date', None),
+    'AQI': ('int', 0),
+    'Temperature': ('float', 0.0),
+    'Humidity': ('float', 0.0),
+    'Precipitation': ('float', 0.0),
+    'Wind_Speed': ('float', 0.0),
+    'Diagnosis': ('str', 'Unknown'),
+    'Disease_Type': ('str', 'Unknown'),
+    'Transmission_Rate': ('float', 0.0),
+    'Reported_Symptoms': ('str', 'Unknown'),
+    'Incubation_Period': ('int', 0),
+    'Hospital_Capacity': ('int', 0),
+    'Healthcare_Personnel_Availability': ('int', 0),
+    'Ventilators': ('int', 0),
+    'ICU_Capacity': ('int', 0),
+    'Resource_Utilization': ('float', 0.0),
+    'Disease_Severity': ('str', 'None'),
+    'Infection_Risk_Level': ('str', 'Low'),
+    'Outbreak_Status': ('str', 'None'),
+    'Recovery_Time': ('int', 0),
+    'Hospitalization_Requirement': ('str', 'No'),
+    'Close_Contacts': ('int', 0),
+}
+
+# Columns that describe the shared dimension rows, used by the dimension pre-pass
+DIMENSION_COLUMNS = (
+    'Location', 'Location_Type', 'Latitude', 'Longitude', 'Population',
+    'Diagnosis', 'Disease_Type', 'Transmission_Rate', 'Reported_Symptoms', 'Incubation_Period',
+    'Date_of_Data_Collection', 'AQI', 'Temperature', 'Humidity', 'Precipitation', 'Wind_Speed',
+)
+
+
+def normalize_chunk(chunk, columns=None):
+    """Return a typed copy of a raw chunk with defaults filled in, column by column"""
+    chunk = chunk.reset_index(drop=True)
+    normalized = {}
+    for column in columns or SOURCE_COLUMNS:
+        kind, default = SOURCE_COLUMNS[column]
+        if column in chunk:
+            values = chunk[column]
+        else:
+            values = pd.Series(np.nan, index=chunk.index, dtype=object)
+
+        if kind == 'int':
+            normalized[column] = pd.to_numeric(values, errors='coerce').fillna(default).astype('int64')
+        elif kind == 'float':
+            normalized[column] = pd.to_numeric(values, errors='coerce').fillna(default).astype('float64')
+        elif kind == 'date':
+            if pd.api.types.is_datetime64_any_dtype(values):
+                # Typed columns from Parquet/Arrow need no parsing
+                parsed = (values.dt.tz_localize(None) if values.dt.tz else values).dt.normalize()
+            else:
+                parsed = pd.to_datetime(values, format='%Y-%m-%d', errors='coerce')
+            normalized[column] = parsed.fillna(pd.Timestamp(timezone.now().date()))
+        elif kind == 'key':
+            normalized[column] = values.astype('string').astype(object).where(values.notna(), None)
+        else:
+            normalized[column] = values.where(values.notna(), default).astype(str)
+
+    return pd.DataFrame(normalized, index=chunk.index)
+
+
+def reserve_ids(model, count, using='default'):
+    """Reserve `count` primary keys for `model` and return them as an array"""
+    if count <= 0:
+        return np.empty(0, dtype='int64')
+
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # nextval() is never handed out twice, so concurrent importers and
+            # ordinary inserts cannot collide with the reserved block
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [table, count]
+            )
+            return np.fromiter((row[0] for row in cursor.fetchall()), dtype='int64', count=count)
+
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)}')
+        start = cursor.fetchone()[0] + 1
+    return np.arange(start, start + count, dtype='int64')
+
+
+def load_rows(model, frame, using='default'):
+    """Insert a frame whose columns are `model` attnames in a single statement"""
+    if frame.empty:
+        return 0
+
+    if connections[using].vendor == 'postgresql':
+        _copy_rows(model, frame, using)
+    else:
+        _bulk_create_rows(model, frame, using)
+    return len(frame)
+
+
+def _copy_rows(model, frame, using):
+    """Stream a frame into `model`'s table with COPY FROM STDIN"""
+    frame = frame.copy()
+    for field in model._meta.concrete_fields:
+        if field.attname not in frame:
+            continue
+        if isinstance(field, models.DateTimeField):
+            frame[field.attname] = frame[field.attname].dt.tz_convert('UTC').dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
+        elif isinstance(field, models.DateField):
+            frame[field.attname] = frame[field.attname].dt.strftime('%Y-%m-%d')
+
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in frame.columns)
+    sql = f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)'
+
+    with connection.cursor() as cursor:
+        if hasattr(cursor.cursor, 'copy_expert'):
+            # psycopg2
+            cursor.cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def _bulk_create_rows(model, frame, using):
+    """Fallback for backends without COPY: one batched bulk_create"""
+    frame = frame.copy()
+    for field in model._meta.concrete_fields:
+        if field.attname not in frame:
+            continue
+        if isinstance(field, models.DateTimeField):
+            frame[field.attname] = pd.Series(frame[field.attname].dt.to_pydatetime(), index=frame.index, dtype=object)
+        elif isinstance(field, models.DateField):
+            frame[field.attname] = frame[field.attname].dt.date
+
+    objects = [model(**values) for values in frame.to_dict('records')]
+    model.objects.using(using).bulk_create(objects, batch_size=999)
+
+
+class DimensionCache:
+    """Natural key -> id maps for the dimension tables shared between records
+
+    Diseases are keyed by name, locations by name and environmental readings by
+    (location, date). The maps are preloaded once; unseen keys are inserted in
+    one statement per table, keeping the first row's attributes.
+    """
+
+    def __init__(self, using='default'):
+        self.using = using
+        self.locations = {}
+        self.diseases = {}
+        self.environment = {}
+
+    def preload(self):
+        """Read the natural keys of every existing dimension row"""
+        def existing(model, *fields):
+            # Descending so the oldest row wins when legacy data has duplicates
+            return model.objects.using(self.using).order_by('-id').values_list(*fields)
+
+        self.locations = dict(existing(Location, 'name', 'id'))
+        self.diseases = dict(existing(Disease, 'name', 'id'))
+        self.environment = {
+            (location_id, date): pk
+            for location_id, date, pk in existing(EnvironmentalFactor, 'location_id', 'date', 'id')
+        }
+        return self
+
+    def resolve(self, data):
+        """Return (location_ids, disease_ids, environment_ids) arrays for a normalized chunk"""
+        with transaction.atomic(using=self.using):
+            location_ids = self._resolve(Location, self.locations, data['Location'], data, lambda rows: {
+                'name': rows['Location'],
+                'type': rows['Location_Type'],
+                'latitude': rows['Latitude'],
+                'longitude': rows['Longitude'],
+                'population': rows['Population'],
+                'geohash': geohash.encode_many(rows['Latitude'], rows['Longitude']),
+            })
+
+            disease_ids = self._resolve(Disease, self.diseases, data['Diagnosis'], data, lambda rows: {
+                'name': rows['Diagnosis'],
+                'type': rows['Disease_Type'],
+                'contagion_rate': rows['Transmission_Rate'],
+                'symptoms': rows['Reported_Symptoms'],
+                'incubation_period': rows['Incubation_Period'],
+            })
+
+            readings = data.assign(location_id=location_ids)
+            keys = pd.Series(list(zip(location_ids.tolist(), readings['Date_of_Data_Collection'].dt.date)),
+                             index=data.index)
+            environment_ids = self._resolve(EnvironmentalFactor, self.environment, keys, readings, lambda rows: {
+                'location_id': rows['location_id'],
+                'date': rows['Date_of_Data_Collection'],
+                'air_quality_index': rows['AQI'],
+                'temperature': rows['Temperature'],
+                'humidity': rows['Humidity'],
+                'precipitation': rows['Precipitation'],
+                'wind_speed': rows['Wind_Speed'],
+            })
+
+        return location_ids, disease_ids, environment_ids
+
+    def _resolve(self, model, cache, keys, data, columns):
+        """Map each key to an id, inserting the first row of every unseen key"""
+        codes, uniques = pd.factorize(keys.to_numpy(dtype=object))
+        ids = np.fromiter((cache.get(key, 0) for key in uniques), dtype='int64', count=len(uniques))
+
+        missing = np.flatnonzero(ids == 0)
+        if missing.size:
+            first_rows = np.unique(codes, return_index=True)[1][missing]
+            new_ids = reserve_ids(model, missing.size, self.using)
+            frame = pd.DataFrame(columns(data.iloc[first_rows])).reset_index(drop=True)
+            frame.insert(0, 'id', new_ids)
+            load_rows(model, frame, self.using)
+            ids[missing] = new_ids
+            cache.update(zip(uniques[missing], new_ids.tolist()))
+
+        return ids[codes]
+
+
+class BulkLoader:
+    """Load normalized CSV chunks into all eight tables with set-based inserts
+
+    With `upsert`, records whose source ID already exists update the existing
+    HealthRecord and its person, demographics, medical history and healthcare
+    resource rows in place instead of inserting new ones.
+    """
+
+    # Columns refreshed by an upsert, per table
+    UPSERT_FIELDS = {
+        HealthRecord: [
+            'disease_id', 'environmental_factor_id', 'date_of_data_collection', 'disease_severity',
+            'infection_risk_level', 'outbreak_status', 'recovery_time_days',
+            'hospitalization_required', 'close_contacts',
+        ],
+        Person: ['location_id', 'vaccination_status'],
+        Demographics: ['age', 'gender', 'occupation', 'socioeconomic_status'],
+        MedicalHistory: ['chronic_conditions', 'allergies', 'blood_type'],
+        HealthcareResource: [
+            'location_id', 'update_date', 'hospital_beds', 'available_doctors', 'ventilators',
+            'icu_capacity', 'occupancy_rate',
+        ],
+    }
+
+    def __init__(self, using='default', dimensions=None, upsert=False, defer_rollups=False):
+        self.using = using
+        self.dimensions = dimensions or DimensionCache(using).preload()
+        self.upsert = upsert
+        # Collect rollup deltas for flush_rollups() instead of applying them per chunk
+        self.defer_rollups = defer_rollups
+        self.pending_rollups = []
+
+    def flush_rollups(self):
+        """Apply the deferred rollup deltas in one key-ordered write; call inside the loading transaction"""
+        pending, self.pending_rollups = self.pending_rollups, []
+        return apply_rollup_deltas(pending, self.using)
+
+    def load_chunk(self, chunk):
+        """Normalize and load one raw pandas chunk, returning the number of records"""
+        return self.load_normalized(normalize_chunk(chunk))
+
+    def load_normalized(self, data):
+        """Load an already normalized chunk, returning the number of records"""
+        if data.empty:
+            return 0
+
+        count = len(data)
+        with transaction.atomic(using=self.using):
+            if self.upsert:
+                data = self._upsert_existing(data)
+            if not data.empty:
+                location_ids, disease_ids, environment_ids = self.dimensions.resolve(data)
+                self._load_facts(data, location_ids, disease_ids, environment_ids)
+        return count
+
+    def _upsert_existing(self, data):
+        """Update records whose source ID is already stored; return the rows left to insert"""
+        keyed = data[SOURCE_ID_COLUMN].notna()
+        # The last occurrence of a source ID within the chunk wins
+        data = data[~keyed | ~data[SOURCE_ID_COLUMN].duplicated(keep='last')].reset_index(drop=True)
+
+        stored = (
+            HealthRecord.objects.using(self.using)
+            .filter(source_record_id__in=data[SOURCE_ID_COLUMN].dropna().tolist())
+            .values_list('source_record_id', 'id', 'person_id',
+                         'person__demographics_id', 'person__medicalhistory__id', 'healthcare_resource_id')
+        )
+        existing = {source_id: related for source_id, *related in stored}
+        if not existing:
+            return data
+        # Subtract what the records add to the rollup now, and add what they add once updated
+        updated_records = HealthRecord.objects.using(self.using).filter(
+            pk__in=[related[0] for related in existing.values()]
+        )
+        removed = record_deltas(updated_records, sign=-1)
+
+        matched = data[SOURCE_ID_COLUMN].isin(list(existing))
+        updates = data[matched].reset_index(drop=True)
+        location_ids, disease_ids, environment_ids = self.dimensions.resolve(updates)
+        collection_date = updates['Date_of_Data_Collection'].dt.tz_localize('UTC').dt.to_pydatetime()
+
+        rows = {model: [] for model in self.UPSERT_FIELDS}
+        for row, location_id, disease_id, environment_id, collected in zip(
+                updates.to_dict('records'), location_ids.tolist(), disease_ids.tolist(),
+                environment_ids.tolist(), collection_date):
+            pk, person_id, demographics_id, history_id, resource_id = existing[row[SOURCE_ID_COLUMN]]
+            rows[HealthRecord].append(HealthRecord(
+                id=pk,
+                disease_id=disease_id,
+                environmental_factor_id=environment_id,
+                date_of_data_collection=collected,
+                disease_severity=row['Disease_Severity'],
+                infection_risk_level=row['Infection_Risk_Level'],
+                outbreak_status=row['Outbreak_Status'],
+                recovery_time_days=row['Recovery_Time'],
+                hospitalization_required=row['Hospitalization_Requirement'] == 'Yes',
+                close_contacts=row['Close_Contacts'],
+            ))
+            rows[Person].append(Person(
+                id=person_id,
+                location_id=location_id,
+                vaccination_status=row['Vaccination_Status'] == 'Yes',
+            ))
+            rows[Demographics].append(Demographics(
+                id=demographics_id,
+                age=row['Age'],
+                gender=row['Gender'],
+                occupation=row['Occupation'],
+                socioeconomic_status=row['SES'],
+            ))
+            # Records entered by other means may lack a medical history or resource snapshot
+            if history_id is not None:
+                rows[MedicalHistory].append(MedicalHistory(
+                    id=history_id,
+                    chronic_conditions=row['Chronic_Conditions'],
+                    allergies=row['Allergies'],
+                    blood_type=row['Blood_Type'],
+                ))
+            if resource_id is not None:
+                rows[HealthcareResource].append(HealthcareResource(
+                    id=resource_id,
+                    location_id=location_id,
+                    update_date=collected.date(),
+                    hospital_beds=row['Hospital_Capacity'],
+                    available_doctors=row['Healthcare_Personnel_Availability'],
+                    ventilators=row['Ventilators'],
+                    icu_capacity=row['ICU_Capacity'],
+                    occupancy_rate=row['Resource_Utilization'],
+                ))
+        for model, objects in rows.items():
+            model.objects.using(self.using).bulk_update(objects, self.UPSERT_FIELDS[model], batch_size=1000)
+        deltas = [removed, record_deltas(updated_records)]
+        if self.defer_rollups:
+            self.pending_rollups.extend(deltas)
+        else:
+            apply_rollup_deltas(deltas, self.using)
+
+        return data[~matched].reset_index(drop=True)
+
+    def _load_facts(self, data, location_ids, disease_ids, environment_ids):
+        """Insert the per-record rows, children after parents"""
+        count = len(data)
+        ids = {
+            model: reserve_ids(model, count, self.using)
+            for model in (Demographics, Person, MedicalHistory, HealthcareResource, HealthRecord)
+        }
+        collection_date = data['Date_of_Data_Collection']
+
+        load_rows(Demographics, pd.DataFrame({
+            'id': ids[Demographics],
+            'age': data['Age'],
+            'gender': data['Gender'],
+            'occupation': data['Occupation'],
+            'socioeconomic_status': data['SES'],
+        }), self.using)
+
+        load_rows(Person, pd.DataFrame({
+            'id': ids[Person],
+            'demographics_id': ids[Demographics],
+            'location_id': location_ids,
+            'vaccination_status': data['Vaccination_Status'] == 'Yes',
+        }), self.using)
+
+        load_rows(MedicalHistory, pd.DataFrame({
+            'id': ids[MedicalHistory],
+            'person_id': ids[Person],
+            'chronic_conditions': data['Chronic_Conditions'],
+            'allergies': data['Allergies'],
+            'blood_type': data['Blood_Type'],
+        }), self.using)
+
+        load_rows(HealthcareResource, pd.DataFrame({
+            'id': ids[HealthcareResource],
+            'location_id': location_ids,
+            'update_date': collection_date,
+            'hospital_beds': data['Hospital_Capacity'],
+            'available_doctors': data['Healthcare_Personnel_Availability'],
+            'ventilators': data['Ventilators'],
+            'icu_capacity': data['ICU_Capacity'],
+            'occupancy_rate': data['Resource_Utilization'],
+        }), self.using)
+
+        load_rows(HealthRecord, pd.DataFrame({
+            'id': ids[HealthRecord],
+            'person_id': ids[Person],
+            'disease_id': disease_ids,
+            'environmental_factor_id': environment_ids,
+            'healthcare_resource_id': ids[HealthcareResource],
+            'date_of_data_collection': collection_date.dt.tz_localize('UTC'),
+            'disease_severity': data['Disease_Severity'],
+            'infection_risk_level': data['Infection_Risk_Level'],
+            'outbreak_status': data['Outbreak_Status'],
+            'recovery_time_days': data['Recovery_Time'],
+            'hospitalization_required': data['Hospitalization_Requirement'] == 'Yes',
+            'close_contacts': data['Close_Contacts'],
+            'source_record_id': data[SOURCE_ID_COLUMN],
+        }), self.using)
+
+        deltas = rollup_deltas(pd.DataFrame({
+            'day': collection_date.dt.date,
+            'location_id': location_ids,
+            'disease_id': disease_ids,
+            'disease_severity': data['Disease_Severity'],
+            'infection_risk_level': data['Infection_Risk_Level'],
+            'outbreak_status': data['Outbreak_Status'],
+            'hospitalization_required': data['Hospitalization_Requirement'] == 'Yes',
+            'recovery_time_days': data['Recovery_Time'],
+            'close_contacts': data['Close_Contacts'],
+        }))
+        if self.defer_rollups:
+            self.pending_rollups.append(deltas)
+        else:
+            apply_rollup_deltas(deltas, self.using)
+
+
+def reset_tables(model_list, using='default'):
+    """Empty tables without Django's cascade collector, yielding (model, seconds) per table
+
+    PostgreSQL uses TRUNCATE ... RESTART IDENTITY CASCADE; other backends get a
+    raw DELETE, children first, and have their autoincrement counters reset.
+    Signals are not sent.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model in model_list:
+            table = model._meta.db_table
+            started = time.monotonic()
+            if connection.vendor == 'postgresql':
+                # TRUNCATE fires no row triggers, so the unique guards of a partitioned table go with it
+                names = [table] + [guard for _, guard in unique_guards(model, using)]
+                cursor.execute(f'TRUNCATE {", ".join(quote(name) for name in names)} RESTART IDENTITY CASCADE')
+            else:
+                cursor.execute(f'DELETE FROM {quote(table)}')
+                if connection.vendor == 'sqlite':
+                    cursor.execute("DELETE FROM sqlite_sequence WHERE name = %s", [table])
+            yield model, time.monotonic() - started
+
+
+def split_csv(path, shard_bytes):
+    """Split a CSV file into (start, end) byte ranges that begin on a line boundary
+
+    Records must not contain embedded newlines; the header line is excluded.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        handle.readline()
+        start = handle.tell()
+        shards = []
+        while start < size:
+            handle.seek(min(start + shard_bytes, size))
+            if handle.tell() < size:
+                handle.readline()
+            end = handle.tell()
+            shards.append((start, end))
+            start = end
+    return shards
+
+
+def read_header(path):
+    """Return the column names from the first line of a CSV file"""
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_csv_range(payload, names, **kwargs):
+    """Parse headerless CSV bytes, keeping source IDs as text"""
+    return pd.read_csv(payload, header=None, names=names, dtype={SOURCE_ID_COLUMN: str}, **kwargs)
+
+
+def iter_csv_chunks(path, batch_size, start=None):
+    """Yield (end_offset, frame) for consecutive `batch_size`-line chunks of a CSV file
+
+    Starting from a byte offset lets a resumed import seek straight past the
+    chunks that were already committed. Records must not contain embedded newlines.
+    """
+    names = read_header(path)
+    with open(path, 'rb') as handle:
+        handle.readline()
+        if start:
+            handle.seek(start)
+        while True:
+            lines = list(itertools.islice(handle, batch_size))
+            if not lines:
+                break
+            yield handle.tell(), read_csv_range(io.BytesIO(b''.join(lines)), names)
+
+
+def detect_format(path):
+    """Guess the input format from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    return 'csv'
+
+
+def iter_columnar_chunks(path, file_format, start=0):
+    """Yield (next_position, frame) for each Parquet row group or Arrow record batch
+
+    Columns arrive typed, so nothing is re-parsed, and only one row group or
+    batch is held in memory at a time. Positions count row groups/batches so
+    a resumed import can start at the first uncommitted one.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Reading Parquet or Arrow files requires pyarrow (pip install pyarrow)')
+
+    def to_frame(table):
+        return table.to_pandas(date_as_object=False)
+
+    if file_format == 'parquet':
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for index in range(start, parquet_file.num_row_groups):
+            yield index + 1, to_frame(parquet_file.read_row_group(index))
+        return
+
+    source = pa.memory_map(path)
+    try:
+        reader = pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        # Streaming format: no footer, so batches can only be read in order
+        source.seek(0)
+        for index, batch in enumerate(pa.ipc.open_stream(source)):
+            if index >= start:
+                yield index + 1, to_frame(pa.Table.from_batches([batch]))
+        return
+
+    for index in range(start, reader.num_record_batches):
+        yield index + 1, to_frame(pa.Table.from_batches([reader.get_batch(index)]))
+
+
+def iter_chunks(path, file_format, batch_size, start=0):
+    """Yield (position, frame) chunks of any supported input file"""
+    if file_format == 'csv':
+        return iter_csv_chunks(path, batch_size, start)
+    return iter_columnar_chunks(path, file_format, start)
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# DimensionCache of a pool worker, handed over once by init_worker rather than with every shard
+_worker_dimensions = None
+
+
+def init_worker(dimensions=None):
+    """Process pool initializer: make Django usable under the spawn start method"""
+    global _worker_dimensions
+    if not apps.ready:
+        django.setup()
+    _worker_dimensions = dimensions
+
+
+def load_shard(path, start, end, names, batch_size, manifest_id, upsert=False, using='default'):
+    """Parse, normalize and load one byte range of a CSV file in its own transaction
+
+    Runs in a pool worker started by init_worker with the pre-resolved
+    dimensions. On PostgreSQL the worker writes the shard itself with keys
+    drawn from the table sequences; other backends only allow one writer, so
+    the normalized chunks are handed back for the parent to load.
+    """
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        payload = io.BytesIO(handle.read(end - start))
+
+    chunks = [
+        normalize_chunk(chunk)
+        for chunk in read_csv_range(payload, names, chunksize=batch_size)
+    ]
+
+    if connections[using].vendor != 'postgresql':
+        return sum(len(chunk) for chunk in chunks), chunks
+
+    loader = BulkLoader(using, _worker_dimensions, upsert, defer_rollups=True)
+    with transaction.atomic(using=using):
+        count = sum(loader.load_normalized(chunk) for chunk in chunks)
+        # One key-ordered rollup write per shard, so workers lock rollup rows in the same order
+        loader.flush_rollups()
+        # Committed together with the data, so a resumed import skips exactly this shard
+        ImportChunk.objects.using(using).create(
+            manifest_id=manifest_id, start_offset=start, end_offset=end, records=count
+        )
+    connections[using].close()
+    return count, None
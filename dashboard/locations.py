@@ -0,0 +1,201 @@
+"""
+Per-location figures for the location analysis page, its API and the map.
+
+``location_summary`` returns one row per Location in a single statement: the
+record, risk and severity counts come from one GROUP BY over the daily rollup,
+and the latest environmental reading and healthcare resource snapshot of each
+location are picked with DISTINCT ON on PostgreSQL (a ROW_NUMBER() window
+elsewhere), both backed by the (location, date) indexes. The number of
+queries does not grow with the number of locations.
+
+The map asks only for the locations inside its viewport (``in_bbox``, through
+the geohash index on Location) and, below CLUSTER_MAX_ZOOM, for clusters of
+them aggregated by geohash prefix in the same statement.
+"""
+from django.db import connections
+from django.db.models import Q
+
+from . import geohash
+from .models import DailyHealthRollup, EnvironmentalFactor, HealthcareResource, Location
+from .routers import read_database
+
+# AQI upper bounds of the environmental quality labels shown in the table
+AQI_QUALITY = [(100, 'Good'), (150, 'Moderate')]
+
+# Share of high-risk records (%) above which a location is shown as high/medium risk
+RISK_THRESHOLDS = [(30, 'high'), (15, 'medium')]
+
+SUMMARY_FIELDS = [
+    'id', 'name', 'type', 'latitude', 'longitude',
+    'record_count', 'high_risk', 'medium_risk', 'low_risk', 'severe_cases',
+    'aqi', 'temperature', 'humidity',
+    'hospital_beds', 'available_doctors', 'occupancy_rate',
+]
+
+CLUSTER_FIELDS = [
+    'geohash', 'location_count', 'latitude', 'longitude',
+    'record_count', 'high_risk', 'medium_risk', 'low_risk', 'severe_cases', 'aqi',
+]
+
+# Map zoom level from which the map API returns individual locations instead of clusters
+CLUSTER_MAX_ZOOM = 10
+
+# Most geohash cells a clustered viewport is split into
+MAX_CLUSTERS = 256
+
+
+def env_quality(aqi):
+    if aqi is None:
+        return 'Unknown'
+    for limit, label in AQI_QUALITY:
+        if aqi <= limit:
+            return label
+    return 'Poor'
+
+
+def risk_level(high_risk_percentage):
+    for limit, label in RISK_THRESHOLDS:
+        if high_risk_percentage > limit:
+            return label
+    return 'low'
+
+
+def _latest(connection, model, date_column, columns, where=''):
+    """SQL for the most recent row of `model` per location"""
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    selected = ', '.join(quote(column) for column in ['location_id'] + columns)
+    if connection.vendor == 'postgresql':
+        return (f'SELECT DISTINCT ON (location_id) {selected} FROM {table} {where}'
+                f'ORDER BY location_id, {quote(date_column)} DESC, id DESC')
+    return (f'SELECT * FROM (SELECT {selected}, ROW_NUMBER() OVER '
+            f'(PARTITION BY location_id ORDER BY {quote(date_column)} DESC, id DESC) AS position '
+            f'FROM {table} {where}) ranked WHERE position = 1')
+
+
+def _summary_sql(connection, locations, using):
+    """(WITH clause, its params, FROM clause, its params) joining each location to its counts and latest readings
+
+    `locations` is a Location queryset restricting the rows, or None for all of them.
+    """
+    quote = connection.ops.quote_name
+    where = related_where = ''
+    ids_params = []
+    if locations is not None:
+        ids_sql, ids_params = locations.values('id').order_by().query.get_compiler(using=using).as_sql()
+        related_where = f'WHERE location_id IN ({ids_sql}) '
+        where = f'WHERE location.id IN ({ids_sql}) '
+        ids_params = list(ids_params)
+    env = _latest(connection, EnvironmentalFactor, 'date',
+                  ['air_quality_index', 'temperature', 'humidity'], related_where)
+    resources = _latest(connection, HealthcareResource, 'update_date',
+                        ['hospital_beds', 'available_doctors', 'occupancy_rate'], related_where)
+    ctes = (
+        f'WITH stats AS ('
+        f'SELECT location_id, SUM(record_count) AS record_count, '
+        f"SUM(CASE WHEN infection_risk_level = 'High' THEN record_count ELSE 0 END) AS high_risk, "
+        f"SUM(CASE WHEN infection_risk_level = 'Medium' THEN record_count ELSE 0 END) AS medium_risk, "
+        f"SUM(CASE WHEN infection_risk_level = 'Low' THEN record_count ELSE 0 END) AS low_risk, "
+        f"SUM(CASE WHEN disease_severity = 'Severe' THEN record_count ELSE 0 END) AS severe_cases "
+        f'FROM {quote(DailyHealthRollup._meta.db_table)} {related_where}GROUP BY location_id), '
+        f'env AS ({env}), resources AS ({resources}) '
+    )
+    tables = (
+        f'FROM {quote(Location._meta.db_table)} location '
+        f'LEFT JOIN stats ON stats.location_id = location.id '
+        f'LEFT JOIN env ON env.location_id = location.id '
+        f'LEFT JOIN resources ON resources.location_id = location.id '
+        f'{where}'
+    )
+    # stats, env and resources are each restricted to the same locations
+    return ctes, ids_params * 3, tables, ids_params
+
+
+def _add_derived(row):
+    """Add the percentage, quality and risk labels computed from a row's counts"""
+    for field in ['record_count', 'high_risk', 'medium_risk', 'low_risk', 'severe_cases']:
+        row[field] = int(row[field])
+    row['high_risk_percentage'] = (
+        round(row['high_risk'] * 100 / row['record_count'], 1) if row['record_count'] else 0
+    )
+    row['env_quality'] = env_quality(row['aqi'])
+    row['risk_level'] = risk_level(row['high_risk_percentage'])
+    return row
+
+
+def location_summary(locations=None, using=None):
+    """Return a dict per location with the SUMMARY_FIELDS, ordered by name
+
+    `locations` optionally restricts the summary to a Location queryset.
+    """
+    using = read_database(Location, using)
+    connection = connections[using]
+    ctes, ctes_params, tables, tables_params = _summary_sql(connection, locations, using)
+    sql = (
+        f'{ctes}'
+        f'SELECT location.id, location.name, location.type, location.latitude, location.longitude, '
+        f'COALESCE(stats.record_count, 0), COALESCE(stats.high_risk, 0), COALESCE(stats.medium_risk, 0), '
+        f'COALESCE(stats.low_risk, 0), COALESCE(stats.severe_cases, 0), '
+        f'env.air_quality_index, env.temperature, env.humidity, '
+        f'resources.hospital_beds, resources.available_doctors, resources.occupancy_rate '
+        f'{tables}'
+        f'ORDER BY location.name, location.id'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, ctes_params + tables_params)
+        return [_add_derived(dict(zip(SUMMARY_FIELDS, row))) for row in cursor.fetchall()]
+
+
+def location_clusters(precision, locations=None, using=None):
+    """Aggregate locations by geohash prefix of `precision` characters, in the database
+
+    Returns a dict per cell with the number of locations, their mean position,
+    summed counts and mean latest AQI.
+    """
+    using = read_database(Location, using)
+    connection = connections[using]
+    ctes, ctes_params, tables, tables_params = _summary_sql(connection, locations, using)
+    sql = (
+        f'{ctes}'
+        f'SELECT SUBSTR(location.geohash, 1, %s), COUNT(*), AVG(location.latitude), AVG(location.longitude), '
+        f'COALESCE(SUM(stats.record_count), 0), COALESCE(SUM(stats.high_risk), 0), '
+        f'COALESCE(SUM(stats.medium_risk), 0), COALESCE(SUM(stats.low_risk), 0), '
+        f'COALESCE(SUM(stats.severe_cases), 0), AVG(env.air_quality_index) '
+        f'{tables}'
+        f'GROUP BY 1 ORDER BY 1'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, ctes_params + [precision] + tables_params)
+        clusters = [dict(zip(CLUSTER_FIELDS, row)) for row in cursor.fetchall()]
+
+    for cluster in clusters:
+        # AVG of an integer column is NUMERIC on PostgreSQL
+        if cluster['aqi'] is not None:
+            cluster['aqi'] = round(float(cluster['aqi']))
+        _add_derived(cluster)
+    return clusters
+
+
+def in_bbox(south, west, north, east, using=None):
+    """Locations inside a bounding box, found through the geohash index
+
+    The box is covered with a few geohash prefixes (prefix range scans on the
+    index) and trimmed to the exact box with the coordinates. A box with
+    west > east crosses the antimeridian.
+    """
+    prefixes = Q()
+    for cell in geohash.cover(south, west, north, east):
+        low, high = geohash.prefix_range(cell)
+        prefixes |= Q(geohash__gte=low, geohash__lt=high) if high else Q(geohash__gte=low)
+    if west <= east:
+        longitudes = Q(longitude__gte=west, longitude__lte=east)
+    else:
+        longitudes = Q(longitude__gte=west) | Q(longitude__lte=east)
+    return Location.objects.using(using).filter(prefixes, longitudes, latitude__gte=south, latitude__lte=north)
+
+
+def cluster_precision(south, west, north, east, zoom):
+    """Geohash precision to cluster a map viewport by, or None to show every location in it"""
+    if zoom >= CLUSTER_MAX_ZOOM:
+        return None
+    return geohash.cover_precision(south, west, north, east, MAX_CLUSTERS)
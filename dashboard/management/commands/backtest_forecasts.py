@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import forecasting
+
+
+class Command(BaseCommand):
+    help = 'Compare the forecasters on the daily series with a rolling-origin backtest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, default=14, help='Days forecast per fold')
+        parser.add_argument('--folds', type=int, default=5, help='Number of forecast origins')
+        parser.add_argument('--level', type=float, default=0.95, help='Prediction interval level')
+        parser.add_argument('--models', nargs='*', choices=sorted(forecasting.FORECASTERS), help='Forecasters to compare')
+
+    def handle(self, *args, **options):
+        dates, counts = forecasting.densify(*forecasting.daily_series())
+        if len(counts) < options['horizon'] + 2:
+            raise CommandError(f'Need at least {options["horizon"] + 2} days of data, have {len(counts)}')
+
+        self.stdout.write(
+            f'{len(counts)} days ({dates[0]} to {dates[-1]}), '
+            f'{options["folds"]} folds of {options["horizon"]} days'
+        )
+        results = forecasting.backtest(
+            counts, options['models'], options['horizon'], max(options['folds'], 1), options['level']
+        )
+
+        coverage = f'cover{options["level"]:.0%}'
+        self.stdout.write(f'{"model":<16} {"MAE":>9} {"RMSE":>9} {coverage:>9} {"fit ms":>9}')
+        for name, scores in sorted(results.items(), key=lambda item: item[1]['mae']):
+            self.stdout.write(
+                f'{name:<16} {scores["mae"]:>9.2f} {scores["rmse"]:>9.2f} '
+                f'{scores["coverage"]:>9.0%} {scores["fit_ms"]:>9.2f}'
+            )
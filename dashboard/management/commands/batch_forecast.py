@@ -0,0 +1,89 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from dashboard import forecasting
+from dashboard.ingest import init_worker, load_rows, reserve_ids
+from dashboard.models import DataVersion, SeriesForecast
+
+
+class Command(BaseCommand):
+    help = 'Forecast every (location, disease) series in a process pool and store the results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=forecasting.FORECAST_DAYS, help='Number of days to forecast')
+        parser.add_argument(
+            '--model',
+            choices=sorted(forecasting.FORECASTERS),
+            help='Forecaster to fit (default: settings.FORECAST_MODEL)'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--batch-size', type=int, default=50, help='Series fitted per worker task')
+        parser.add_argument('--force', action='store_true', help='Refit even if the stored forecasts are current')
+
+    def handle(self, *args, **options):
+        name = options['model'] or getattr(settings, 'FORECAST_MODEL', 'holt_winters')
+        days = max(options['days'], 1)
+
+        # Read the version before the data, so a change made during the run triggers another one
+        version = DataVersion.current()[0]
+        stored = SeriesForecast.objects.values_list('data_version', 'model_name').first()
+        if not options['force'] and stored == (version, name):
+            self.stdout.write(f'Series forecasts for data version {version} are up to date')
+            return
+
+        started = time.monotonic()
+        series = list(forecasting.series_counts())
+        batches = [
+            series[start:start + max(options['batch_size'], 1)]
+            for start in range(0, len(series), max(options['batch_size'], 1))
+        ]
+        self.stdout.write(f'Fitting {name} on {len(series)} series in {len(batches)} batches')
+
+        results = []
+        if options['workers'] > 1 and len(batches) > 1:
+            # Forked workers must not share the parent's database connection
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as executor:
+                futures = [executor.submit(forecasting.forecast_series_batch, batch, name, days) for batch in batches]
+                for future in as_completed(futures):
+                    results.extend(future.result())
+        else:
+            for batch in batches:
+                results.extend(forecasting.forecast_series_batch(batch, name, days))
+        fitted = time.monotonic() - started
+
+        self.store(results, name, days, version)
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {len(results) * days} forecast days for {len(results)} series '
+            f'(fit {fitted:.2f}s, total {time.monotonic() - started:.2f}s)'
+        ))
+
+    def store(self, results, name, days, version):
+        """Replace the forecast table with the new results in one transaction"""
+        count = len(results) * days
+        frame = pd.DataFrame({
+            'location_id': np.repeat([key[0] for key, *_ in results], days),
+            'disease_id': np.repeat([key[1] for key, *_ in results], days),
+            'day': pd.to_datetime([first + timedelta(days=offset)
+                                   for _, first, *_ in results for offset in range(days)]),
+            'predicted': list(itertools.chain.from_iterable(result[2] for result in results)),
+            'lower': list(itertools.chain.from_iterable(result[3] for result in results)),
+            'upper': list(itertools.chain.from_iterable(result[4] for result in results)),
+        })
+        frame['model_name'] = name
+        frame['data_version'] = version
+        frame['created_at'] = pd.Timestamp.now(tz='UTC')
+
+        with transaction.atomic():
+            SeriesForecast.objects.all().delete()
+            frame.insert(0, 'id', reserve_ids(SeriesForecast, count))
+            load_rows(SeriesForecast, frame)
@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = 'Time requests with a new database connection per request and with persistent connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/dashboard/', help='Page or API endpoint to request')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per mode')
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=600,
+            help='CONN_MAX_AGE of the persistent mode (the configured value is used if it is already persistent)'
+        )
+
+    def handle(self, *args, **options):
+        database = connections.settings['default']
+        configured = database['CONN_MAX_AGE']
+        persistent = configured if configured != 0 else options['max_age']
+        self.stdout.write(f'{options["requests"]} requests to {options["path"]} on {connections["default"].vendor}')
+
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count_connection, weak=False)
+        try:
+            results = {}
+            for name, max_age in [('per request', 0), ('persistent', persistent)]:
+                # Connection wrappers of every thread share this dict and read it on each request
+                database['CONN_MAX_AGE'] = max_age
+                connections.close_all()
+                opened.clear()
+                results[name] = self.run_requests(options)
+                self.stdout.write(
+                    f'{name:<12} median {results[name][0]:>7.2f} ms  p95 {results[name][1]:>7.2f} ms  '
+                    f'{len(opened)} connections opened'
+                )
+        finally:
+            connection_created.disconnect(count_connection)
+            database['CONN_MAX_AGE'] = configured
+            connections.close_all()
+
+        before, after = results['per request'][0], results['persistent'][0]
+        self.stdout.write(self.style.SUCCESS(f'Persistent connections: {before / max(after, 1e-6):.1f}x median speedup'))
+
+    def run_requests(self, options):
+        """Request the path `requests` times after a warm-up; return (median, p95) milliseconds
+
+        Requests go through the WSGI handler the server runs, not the test client,
+        which keeps connections open regardless of CONN_MAX_AGE.
+        """
+        handler = WSGIHandler()
+        environ = RequestFactory().get(options['path']).environ
+        statuses = []
+
+        def request():
+            # Closing the response sends request_finished, which closes connections past CONN_MAX_AGE
+            response = handler(dict(environ), lambda status, headers: statuses.append(status))
+            b''.join(response)
+            response.close()
+
+        # DEBUG off, so the timings don't include recording every query
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+            request()
+            if not statuses[0].startswith('200'):
+                self.stderr.write(self.style.WARNING(f'{options["path"]} returned {statuses[0]}'))
+            timings = []
+            for _ in range(max(options['requests'], 1)):
+                started = time.perf_counter()
+                request()
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[min(int(len(timings) * 0.95), len(timings) - 1)]
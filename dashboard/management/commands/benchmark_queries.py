@@ -0,0 +1,133 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dashboard.models import DailyHealthRollup, HealthRecord
+from dashboard.rollups import rollup_overview, severity_trends
+
+
+def dashboard_queries():
+    """The HealthRecord queries the dashboard runs, keyed by a short name"""
+    now = timezone.now()
+    thirty_days_ago = now - timedelta(days=30)
+    records = HealthRecord.objects
+
+    return {
+        'kpi_aggregate': lambda: records.aggregate(
+            active_cases=Count('id', filter=Q(date_of_data_collection__gte=thirty_days_ago)),
+            recovered_cases=Count('id', filter=Q(disease_severity='None', recovery_time_days__isnull=False)),
+            critical_cases=Count('id', filter=Q(disease_severity='Severe')),
+        ),
+        'critical_cases_30d': lambda: records.filter(
+            disease_severity='Severe', date_of_data_collection__gte=thirty_days_ago
+        ).count(),
+        'severity_distribution': lambda: list(
+            records.values('disease_severity').annotate(count=Count('id')).order_by('disease_severity')
+        ),
+        'risk_distribution': lambda: list(
+            records.values('infection_risk_level').annotate(count=Count('id')).order_by('infection_risk_level')
+        ),
+        'outbreak_distribution': lambda: list(
+            records.values('outbreak_status').annotate(count=Count('id')).order_by('outbreak_status')
+        ),
+        'hospitalization_split': lambda: list(
+            records.values('hospitalization_required').annotate(count=Count('id'))
+        ),
+        'recent_records': lambda: list(
+            records.select_related('person', 'disease', 'environmental_factor')
+            .order_by('-date_of_data_collection')[:10]
+        ),
+        'trends_30d_by_severity': lambda: list(
+            records.filter(date_of_data_collection__gte=thirty_days_ago, date_of_data_collection__lte=now)
+            .values('date_of_data_collection__date', 'disease_severity')
+            .annotate(count=Count('id'))
+            .order_by('date_of_data_collection__date')
+        ),
+        'disease_prevalence': lambda: list(
+            records.values('disease__name').annotate(count=Count('id')).order_by('-count')[:10]
+        ),
+        'rollup_kpi_aggregate': lambda: DailyHealthRollup.objects.aggregate(
+            active_cases=Sum('record_count', filter=Q(day__gte=thirty_days_ago.date())),
+            recovered_cases=Sum('recovered_count'),
+            critical_cases=Sum('record_count', filter=Q(disease_severity='Severe')),
+        ),
+        'rollup_trends_30d': lambda: severity_trends(thirty_days_ago.date(), now.date()),
+        'rollup_overview': lambda: rollup_overview(thirty_days_ago.date()),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Time the dashboard queries and show their plans, optionally with and without the HealthRecord indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the median is reported')
+        parser.add_argument('--explain', action='store_true', help='Print the query plan of each query')
+        parser.add_argument(
+            '--compare-indexes',
+            action='store_true',
+            help='Also run every query with the HealthRecord indexes dropped (inside a rolled back '
+                 'transaction; this locks the table, so use a benchmark database)'
+        )
+        parser.add_argument('--only', nargs='*', help='Names of the queries to run')
+
+    def handle(self, *args, **options):
+        queries = dashboard_queries()
+        if options['only']:
+            queries = {name: queries[name] for name in options['only']}
+
+        self.stdout.write(f'{HealthRecord.objects.count()} health records on {connection.vendor}')
+        with_indexes = self.run_queries(queries, options)
+
+        if options['compare_indexes']:
+            with transaction.atomic():
+                # Plain DROP INDEX statements, so SQLite can run them inside the transaction too
+                editor = connection.schema_editor()
+                with connection.cursor() as cursor:
+                    for index in HealthRecord._meta.indexes:
+                        cursor.execute(str(index.remove_sql(HealthRecord, editor)))
+                self.stdout.write(self.style.WARNING('\nWithout HealthRecord indexes:'))
+                without_indexes = self.run_queries(queries, options)
+                transaction.set_rollback(True)
+
+            self.stdout.write(self.style.SUCCESS('\nSummary (median ms):'))
+            self.stdout.write(f'{"query":<26} {"without":>10} {"with":>10} {"speedup":>8}')
+            for name in queries:
+                before, after = without_indexes[name], with_indexes[name]
+                self.stdout.write(f'{name:<26} {before:>10.2f} {after:>10.2f} {before / max(after, 1e-6):>7.1f}x')
+
+    def run_queries(self, queries, options):
+        """Run each query `repeat` times and return name -> median milliseconds"""
+        results = {}
+        for name, run in queries.items():
+            timings = []
+            for _ in range(max(options['repeat'], 1)):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    run()
+                    timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+            self.stdout.write(f'{name:<26} {results[name]:>10.2f} ms')
+
+            if options['explain']:
+                for query in captured.captured_queries:
+                    for line in self.explain(query['sql']):
+                        self.stdout.write(f'    {line}')
+        return results
+
+    def explain(self, sql):
+        """Return the plan of an already interpolated SQL statement"""
+        if connection.vendor == 'postgresql':
+            prefix = 'EXPLAIN (ANALYZE, BUFFERS) '
+        elif connection.vendor == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        else:
+            prefix = 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
@@ -0,0 +1,58 @@
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from dashboard.querycount import capture_all_queries
+from dashboard.views import consolidated_dashboard
+
+# Most queries a consolidated dashboard request may run with an empty section cache,
+# and with every section cached (only the data version lookup)
+COLD_QUERY_BUDGET = 9
+WARM_QUERY_BUDGET = 1
+
+
+class Command(BaseCommand):
+    help = 'Fail if the consolidated dashboard runs more queries than its budget (for CI)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cold', type=int, default=COLD_QUERY_BUDGET, help='Budget with an empty cache')
+        parser.add_argument('--warm', type=int, default=WARM_QUERY_BUDGET, help='Budget with every section cached')
+        parser.add_argument('--verbose-sql', action='store_true', help='Print the queries of each request')
+
+    def handle(self, *args, **options):
+        # A private in-memory cache, so the check neither reads nor clears the shared one
+        cache = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                             'LOCATION': 'query-budget'}}
+        with override_settings(CACHES=cache):
+            counts = {name: self.render(options) for name in ('cold', 'warm')}
+
+        failures = []
+        for name, count in counts.items():
+            budget = options[name]
+            line = f'{name:<5} {count:>3} queries (budget {budget})'
+            if count > budget:
+                failures.append(line)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+        if failures:
+            raise CommandError(f'Consolidated dashboard is over its query budget: {"; ".join(failures)}')
+
+    def render(self, options):
+        """Render the consolidated dashboard once, as served, and return the number of queries it ran
+
+        The async view builds its sections on the section executor, so queries
+        are counted on every thread (capture_all_queries), not only this one.
+        """
+        request = RequestFactory().get('/dashboard/')
+        with capture_all_queries() as captured:
+            response = async_to_sync(consolidated_dashboard)(request)
+            if hasattr(response, 'render'):
+                response.render()
+        if response.status_code != 200:
+            raise CommandError(f'Consolidated dashboard returned {response.status_code}')
+        if options['verbose_sql']:
+            for sql in captured.queries:
+                self.stdout.write(f'    {sql}')
+        return len(captured)
@@ -1,56 +1,220 @@
 import pandas as pd
 import numpy as np
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, transaction
+from dashboard.ingest import (
+    BulkLoader, DIMENSION_COLUMNS, SOURCE_ID_COLUMN, DimensionCache, detect_format,
+    file_digest, init_worker, iter_chunks, load_shard, normalize_chunk, read_header,
+    split_csv
+)
+from dashboard.rollups import rebuild_rollups
+from dashboard.signals import suppress_version_bumps
 from dashboard.models import (
-    Location, Demographics, Person, MedicalHistory,
-    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord
+    Demographics, Person, MedicalHistory, HealthcareResource, HealthRecord,
+    ImportManifest, ImportChunk, DataVersion
 )
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import time
 
 class Command(BaseCommand):
-    help = 'Import health surveillance data from CSV file'
+    help = 'Import health surveillance data from a CSV, Parquet or Arrow IPC file'
 
     def add_arguments(self, parser):
-        parser.add_argument('csv_file', type=str, help='Path to the CSV file')
+        parser.add_argument('csv_file', type=str, help='Path to the CSV, Parquet or Arrow file')
+        parser.add_argument(
+            '--format',
+            choices=['auto', 'csv', 'parquet', 'arrow'],
+            default='auto',
+            help='Input format; auto picks it from the file extension'
+        )
         parser.add_argument(
             '--batch-size', 
             type=int, 
             default=1000,
-            help='Number of records to process in each batch'
+            help='Number of records to process in each batch (CSV only; Parquet/Arrow use their row groups)'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['row', 'bulk'],
+            default='row',
+            help='row: one ORM insert per object; bulk: vectorized chunks loaded with COPY (bulk_create on SQLite)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Parse and load byte-range shards of the CSV in this many processes (implies --engine=bulk)'
+        )
+        parser.add_argument(
+            '--shard-size',
+            type=int,
+            default=64,
+            help='Approximate shard size in MB when --workers is greater than 1'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the last unfinished import of this file, skipping committed chunks'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help=f'Update records whose {SOURCE_ID_COLUMN} was already imported instead of adding them (implies --engine=bulk)'
         )
 
     def handle(self, *args, **options):
         csv_file = options['csv_file']
         batch_size = options['batch_size']
+        engine = options['engine']
+        workers = options['workers']
+        upsert = options['upsert']
+        if workers > 1 or upsert:
+            engine = 'bulk'
+        shard_bytes = max(options['shard_size'], 1) * 1024 * 1024 if workers > 1 else None
+        file_format = options['format']
+        if file_format == 'auto':
+            file_format = detect_format(csv_file)
+        if workers > 1 and file_format != 'csv':
+            raise CommandError('--workers is only supported for CSV input')
+
+        manifest = self._get_manifest(csv_file, shard_bytes, options['resume'])
+        if manifest is None:
+            return
         
-        self.stdout.write(self.style.SUCCESS(f'Starting import from {csv_file}'))
-        
-        # Read the CSV file in chunks to handle large datasets
-        for chunk_number, chunk in enumerate(pd.read_csv(csv_file, chunksize=batch_size)):
-            self.stdout.write(f'Processing batch {chunk_number + 1}')
-            self._process_chunk(chunk)
-            
+        self.stdout.write(self.style.SUCCESS(f'Starting import from {csv_file} ({file_format}, {engine} engine)'))
+
+        # Locations, diseases and environmental readings are shared between
+        # records; read their natural keys once instead of querying per row
+        dimensions = DimensionCache().preload()
+
+        try:
+            # Row engine saves would each bump the data version; it is bumped once per chunk instead
+            with suppress_version_bumps():
+                if workers > 1:
+                    self._import_parallel(csv_file, batch_size, workers, shard_bytes, dimensions, manifest, upsert)
+                else:
+                    loader = BulkLoader(dimensions=dimensions, upsert=upsert)
+                    started = time.monotonic()
+                    for end_offset, chunk in iter_chunks(csv_file, file_format, batch_size, manifest.byte_offset):
+                        chunk_number = manifest.last_chunk + 1
+                        with transaction.atomic():
+                            if engine == 'bulk':
+                                count = loader.load_chunk(chunk)
+                            else:
+                                self._process_chunk(chunk, dimensions)
+                                count = len(chunk)
+                            manifest.commit_chunk(chunk_number, end_offset, count)
+                            DataVersion.bump()
+                        elapsed = time.monotonic() - started
+                        self.stdout.write(
+                            f'Committed batch {chunk_number} ({manifest.records_imported} records, '
+                            f'{count / max(elapsed, 1e-9):.0f} records/s)'
+                        )
+                        started = time.monotonic()
+        except BaseException as e:
+            ImportManifest.objects.filter(pk=manifest.pk).update(status='failed')
+            if isinstance(e, IntegrityError) and 'source_record_id' in str(e):
+                raise CommandError(
+                    f'A {SOURCE_ID_COLUMN} in {csv_file} was already imported; '
+                    f'run again with --upsert to update those records'
+                ) from e
+            raise
+
+        ImportManifest.objects.filter(pk=manifest.pk).update(status='completed')
         self.stdout.write(self.style.SUCCESS('Data import completed successfully'))
-    
+
+    def _get_manifest(self, csv_file, shard_bytes, resume):
+        """Return the manifest to record progress in, or None if there is nothing to do"""
+        file_hash = file_digest(csv_file)
+        if resume:
+            previous = ImportManifest.objects.filter(file_hash=file_hash).order_by('-started_at').first()
+            if previous and previous.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(f'{csv_file} was already imported completely'))
+                return None
+            if previous:
+                if previous.shard_size != shard_bytes:
+                    raise CommandError(
+                        'Resume with the same --workers/--shard-size mode as the interrupted import'
+                    )
+                self.stdout.write(
+                    f'Resuming after batch {previous.last_chunk} '
+                    f'({previous.records_imported} records already committed)'
+                )
+                ImportManifest.objects.filter(pk=previous.pk).update(status='running')
+                return previous
+
+        return ImportManifest.objects.create(file_path=csv_file, file_hash=file_hash, shard_size=shard_bytes)
+
+    def _import_parallel(self, csv_file, batch_size, workers, shard_bytes, dimensions, manifest, upsert):
+        """Parse and load byte-range shards of the CSV across a process pool"""
+        started = time.monotonic()
+
+        # Shared pre-pass so every shard sees the same dimension ids
+        for chunk in pd.read_csv(csv_file, usecols=lambda column: column in DIMENSION_COLUMNS,
+                                 chunksize=max(batch_size, 100000)):
+            dimensions.resolve(normalize_chunk(chunk, DIMENSION_COLUMNS))
+        self.stdout.write(
+            f'Resolved {len(dimensions.locations)} locations, {len(dimensions.diseases)} diseases '
+            f'and {len(dimensions.environment)} environmental readings'
+        )
+        loader = BulkLoader(dimensions=dimensions, upsert=upsert)
+
+        names = read_header(csv_file)
+        committed = set(manifest.chunks.values_list('start_offset', flat=True))
+        shards = [shard for shard in split_csv(csv_file, shard_bytes) if shard[0] not in committed]
+        self.stdout.write(f'Loading {len(shards)} shards with {workers} workers ({len(committed)} already committed)')
+
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+
+        total = 0
+        # The dimension maps go to each worker once, not with every shard
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(dimensions,)) as executor:
+            futures = {
+                executor.submit(load_shard, csv_file, start, end, names, batch_size,
+                                manifest.pk, upsert): (start, end)
+                for start, end in shards
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                count, chunks = future.result()
+                start, end = futures[future]
+                if chunks is not None:
+                    # Single-writer backends: the parent commits the shard
+                    with transaction.atomic():
+                        for chunk in chunks:
+                            loader.load_normalized(chunk)
+                        ImportChunk.objects.create(
+                            manifest=manifest, start_offset=start, end_offset=end, records=count
+                        )
+                ImportManifest.objects.filter(pk=manifest.pk).update(
+                    records_imported=manifest.records_imported + total + count,
+                    last_chunk=len(committed) + done
+                )
+                DataVersion.bump()
+                total += count
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Committed shard {done}/{len(shards)} '
+                    f'({total} records, {total / max(elapsed, 1e-9):.0f} records/s)'
+                )
+
     @transaction.atomic
-    def _process_chunk(self, chunk):
+    def _process_chunk(self, chunk, dimensions):
         """Process a chunk of data within a transaction"""
-        for _, row in chunk.iterrows():
-            self._process_record(row)
+        # Resolve the shared dimension rows for the whole chunk at once
+        data = normalize_chunk(chunk, DIMENSION_COLUMNS)
+        location_ids, disease_ids, environment_ids = dimensions.resolve(data)
+        for (_, row), location_id, disease_id, environment_id in zip(
+                chunk.iterrows(), location_ids.tolist(), disease_ids.tolist(), environment_ids.tolist()):
+            self._process_record(row, location_id, disease_id, environment_id)
+
+        # Recompute the rollup rows of the days this chunk touched
+        rebuild_rollups(set(data['Date_of_Data_Collection'].dt.date))
     
-    def _process_record(self, row):
+    def _process_record(self, row, location_id, disease_id, environment_id):
         """Process a single CSV record"""
-        # Create or get Location
-        location, _ = Location.objects.get_or_create(
-            name=row['Location'],
-            defaults={
-                'type': row.get('Location_Type', 'Unknown'),
-                'latitude': float(row.get('Latitude', 0.0)),
-                'longitude': float(row.get('Longitude', 0.0)),
-                'population': int(row.get('Population', 0))
-            }
-        )
         
         # Create Demographics
         demographics = Demographics.objects.create(
@@ -63,7 +227,7 @@ class Command(BaseCommand):
         # Create Person
         person = Person.objects.create(
             demographics=demographics,
-            location=location,
+            location_id=location_id,
             vaccination_status=row.get('Vaccination_Status') == 'Yes'
         )
         
@@ -79,30 +243,9 @@ class Command(BaseCommand):
         collection_date = self._parse_date(row.get('Date_of_Data_Collection'))
         onset_date = self._parse_date(row.get('Date_of_Onset'))
         
-        # Create EnvironmentalFactor
-        env_factor = EnvironmentalFactor.objects.create(
-            date=collection_date or datetime.now().date(),
-            location=location,
-            air_quality_index=int(row.get('AQI', 0)),
-            temperature=float(row.get('Temperature', 0.0)),
-            humidity=float(row.get('Humidity', 0.0)),
-            precipitation=float(row.get('Precipitation', 0.0)),
-            wind_speed=float(row.get('Wind_Speed', 0.0))
-        )
-        
-        # Create Disease
-        disease_name = row.get('Diagnosis', 'Unknown')
-        disease = Disease.objects.create(
-            name=disease_name,
-            type=row.get('Disease_Type', 'Unknown'),
-            contagion_rate=float(row.get('Transmission_Rate', 0.0)),
-            symptoms=row.get('Reported_Symptoms', 'Unknown'),
-            incubation_period=int(row.get('Incubation_Period', 0))
-        )
-        
         # Create HealthcareResource
         healthcare = HealthcareResource.objects.create(
-            location=location,
+            location_id=location_id,
             update_date=collection_date or datetime.now().date(),
             hospital_beds=int(row.get('Hospital_Capacity', 0)),
             available_doctors=int(row.get('Healthcare_Personnel_Availability', 0)),
@@ -114,8 +257,8 @@ class Command(BaseCommand):
         # Create HealthRecord
         HealthRecord.objects.create(
             person=person,
-            disease=disease,
-            environmental_factor=env_factor,
+            disease_id=disease_id,
+            environmental_factor_id=environment_id,
             healthcare_resource=healthcare,
             date_of_data_collection=collection_date or datetime.now(),
             disease_severity=row.get('Disease_Severity', 'None'),
@@ -123,13 +266,17 @@ class Command(BaseCommand):
             outbreak_status=row.get('Outbreak_Status', 'None'),
             recovery_time_days=int(row.get('Recovery_Time', 0)),
             hospitalization_required=row.get('Hospitalization_Requirement') == 'Yes',
-            close_contacts=int(row.get('Close_Contacts', 0))
+            close_contacts=int(row.get('Close_Contacts', 0)),
+            source_record_id=None if pd.isna(row.get(SOURCE_ID_COLUMN)) else str(row.get(SOURCE_ID_COLUMN))
         )
     
     def _parse_date(self, date_str):
         """Parse date string or return None if invalid"""
         if pd.isna(date_str) or not date_str:
             return None
+        if isinstance(date_str, datetime):
+            # Already typed (Parquet/Arrow input)
+            return date_str.date()
         try:
             return datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
@@ -1,261 +1,266 @@
-import csv
 import os
-import random
-from datetime import datetime, timedelta
+import time
 
+import numpy as np
+import pandas as pd
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 
+from dashboard import forecasting, geohash
+from dashboard.ingest import load_rows, reserve_ids, reset_tables
 from dashboard.models import (
-    Location, Demographics, Person, MedicalHistory, 
-    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord
+    Location, Demographics, Person, MedicalHistory,
+    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord, DailyHealthRollup, DataVersion,
+    ImportChunk, ImportManifest, SeriesForecast
 )
+from dashboard.rollups import rebuild_rollups
+from dashboard.signals import suppress_version_bumps
+
+LOCATIONS = [
+    # name, type, latitude, longitude
+    ('Downtown', 'Urban', 40.71, -74.01),
+    ('Westside', 'Suburban', 40.75, -74.05),
+    ('Eastside', 'Suburban', 40.72, -73.96),
+    ('Northside', 'Urban', 40.78, -73.97),
+    ('Southside', 'Rural', 40.65, -74.02),
+]
+
+DISEASES = [
+    # name, type, contagion rate, symptoms
+    ('COVID-19', 'Viral', 0.7, ['Fever', 'Cough', 'Fatigue']),
+    ('Influenza', 'Viral', 0.4, ['Fever', 'Cough', 'Body aches']),
+    ('E.Coli', 'Bacterial', 0.3, ['Diarrhea', 'Abdominal pain']),
+    ('Malaria', 'Parasitic', 0.5, ['Fever', 'Chills', 'Headache']),
+    ('Tuberculosis', 'Bacterial', 0.6, ['Cough', 'Chest pain', 'Weight loss']),
+]
+
+GENDERS = ['Male', 'Female', 'Other']
+OCCUPATIONS = ['Student', 'Teacher', 'Healthcare', 'Office', 'Service', 'Retired']
+SOCIOECONOMIC_STATUSES = ['Low', 'Medium', 'High']
+CHRONIC_CONDITIONS = ['None', 'Diabetes', 'Hypertension', 'Asthma', 'Heart Disease']
+ALLERGIES = ['None', 'Pollen', 'Medication', 'Food']
+BLOOD_TYPES = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+SEVERITIES = ['None', 'Mild', 'Moderate', 'Severe']
+RISK_LEVELS = ['Low', 'Medium', 'High']
+OUTBREAK_STATUSES = ['None', 'Potential', 'Confirmed']
 
 class Command(BaseCommand):
-    help = 'Import sample data from CSV file into the database'
+    help = 'Import sample data from CSV file into the database, or generate synthetic data at any scale'
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write(self.style.SUCCESS('Starting data import...'))
-        
-        # Clear existing data
-        self.stdout.write('Clearing existing data...')
-        Location.objects.all().delete()
-        Demographics.objects.all().delete()
-        Person.objects.all().delete()
-        MedicalHistory.objects.all().delete()
-        EnvironmentalFactor.objects.all().delete()
-        Disease.objects.all().delete()
-        HealthcareResource.objects.all().delete()
-        HealthRecord.objects.all().delete()
-        
-        # Create locations
-        self.stdout.write('Creating locations...')
-        locations = {
-            'Downtown': self.create_location('Downtown', 'Urban', 40.71, -74.01),
-            'Westside': self.create_location('Westside', 'Suburban', 40.75, -74.05),
-            'Eastside': self.create_location('Eastside', 'Suburban', 40.72, -73.96),
-            'Northside': self.create_location('Northside', 'Urban', 40.78, -73.97),
-            'Southside': self.create_location('Southside', 'Rural', 40.65, -74.02),
-        }
-        
-        # Create diseases
-        self.stdout.write('Creating diseases...')
-        diseases = {
-            'COVID-19': self.create_disease('COVID-19', 'Viral', 0.7, ['Fever', 'Cough', 'Fatigue']),
-            'Influenza': self.create_disease('Influenza', 'Viral', 0.4, ['Fever', 'Cough', 'Body aches']),
-            'E.Coli': self.create_disease('E.Coli', 'Bacterial', 0.3, ['Diarrhea', 'Abdominal pain']),
-            'Malaria': self.create_disease('Malaria', 'Parasitic', 0.5, ['Fever', 'Chills', 'Headache']),
-            'Tuberculosis': self.create_disease('Tuberculosis', 'Bacterial', 0.6, ['Cough', 'Chest pain', 'Weight loss']),
-        }
-        
-        # Process CSV file if available
-        csv_file_path = 'public_health_surveillance_dataset.csv'
-        records_created = 0
-        
-        if os.path.exists(csv_file_path):
-            self.stdout.write(f'Processing data from {csv_file_path}...')
-            
-            with open(csv_file_path, 'r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # Use data from CSV to create records
-                    try:
-                        location_name = row.get('location', random.choice(list(locations.keys())))
-                        location = locations.get(location_name) or random.choice(list(locations.values()))
-                        
-                        disease_name = row.get('disease', random.choice(list(diseases.keys())))
-                        disease = diseases.get(disease_name) or random.choice(list(diseases.values()))
-                        
-                        # Create person
-                        person = self.create_person(
-                            row.get('age', random.randint(1, 90)),
-                            row.get('gender', random.choice(['Male', 'Female', 'Other'])),
-                            location
-                        )
-                        
-                        # Create environmental factor
-                        env_factor = self.create_environmental_factor(
-                            location,
-                            row.get('air_quality_index', random.randint(30, 200)),
-                            row.get('temperature', random.uniform(15, 35)),
-                            row.get('humidity', random.uniform(40, 80))
-                        )
-                        
-                        # Create healthcare resource
-                        resource = self.create_healthcare_resource(
-                            location,
-                            row.get('hospital_beds', random.randint(50, 500)),
-                            row.get('doctors', random.randint(10, 100)),
-                            row.get('ventilators', random.randint(5, 50))
-                        )
-                        
-                        # Create health record
-                        record = self.create_health_record(
-                            person, 
-                            disease,
-                            env_factor,
-                            resource,
-                            row.get('disease_severity', random.choice(['None', 'Mild', 'Moderate', 'Severe'])),
-                            row.get('infection_risk_level', random.choice(['Low', 'Medium', 'High'])),
-                            row.get('outbreak_status', random.choice(['None', 'Potential', 'Confirmed']))
-                        )
-                        
-                        records_created += 1
-                        if records_created % 100 == 0:
-                            self.stdout.write(f'Created {records_created} records so far...')
-                    
-                    except Exception as e:
-                        self.stdout.write(self.style.ERROR(f'Error processing row: {str(e)}'))
-        else:
-            self.stdout.write(f'CSV file not found at {csv_file_path}, generating random data...')
-            # Generate some random data if CSV doesn't exist
-            self.generate_random_data(locations, diseases, 500)
-            records_created = 500
-        
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported {records_created} records'))
-    
-    def create_location(self, name, location_type, latitude, longitude):
-        """Create and save a Location object"""
-        location = Location(
-            name=name,
-            type=location_type,
-            latitude=latitude,
-            longitude=longitude,
-            population=random.randint(5000, 200000)
-        )
-        location.save()
-        return location
-    
-    def create_disease(self, name, disease_type, contagion_rate, symptoms):
-        """Create and save a Disease object"""
-        disease = Disease(
-            name=name,
-            type=disease_type,
-            contagion_rate=contagion_rate,
-            symptoms=','.join(symptoms),
-            incubation_period=random.randint(2, 14)
-        )
-        disease.save()
-        return disease
-    
-    def create_person(self, age, gender, location):
-        """Create and save Person and Demographics objects"""
-        # Create demographics
-        demographics = Demographics(
-            age=int(age) if isinstance(age, (int, float, str)) else random.randint(1, 90),
-            gender=gender,
-            occupation=random.choice(['Student', 'Teacher', 'Healthcare', 'Office', 'Service', 'Retired']),
-            socioeconomic_status=random.choice(['Low', 'Medium', 'High'])
-        )
-        demographics.save()
-        
-        # Create person
-        person = Person(
-            demographics=demographics,
-            location=location,
-            vaccination_status=random.choice([True, False])
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            choices=['fast', 'orm'],
+            default='fast',
+            help='fast: TRUNCATE (PostgreSQL) or raw DELETE per table; orm: Model.objects.all().delete()'
         )
-        person.save()
-        
-        # Create medical history
-        history = MedicalHistory(
-            person=person,
-            chronic_conditions=random.choice(['None', 'Diabetes', 'Hypertension', 'Asthma', 'Heart Disease']),
-            allergies=random.choice(['None', 'Pollen', 'Medication', 'Food']),
-            blood_type=random.choice(['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-'])
+        parser.add_argument(
+            '--records',
+            type=int,
+            default=500,
+            help='Number of synthetic health records to generate when no CSV file is present'
         )
-        history.save()
-        
-        return person
-    
-    def create_environmental_factor(self, location, aqi, temperature, humidity):
-        """Create and save an EnvironmentalFactor object"""
-        env_factor = EnvironmentalFactor(
-            location=location,
-            date=timezone.now() - timedelta(days=random.randint(0, 30)),
-            air_quality_index=int(aqi) if isinstance(aqi, (int, float, str)) else random.randint(30, 200),
-            temperature=float(temperature) if isinstance(temperature, (int, float, str)) else random.uniform(15, 35),
-            humidity=float(humidity) if isinstance(humidity, (int, float, str)) else random.uniform(40, 80),
-            precipitation=random.uniform(0, 50),
-            wind_speed=random.uniform(0, 30)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed, for reproducible datasets'
         )
-        env_factor.save()
-        return env_factor
-    
-    def create_healthcare_resource(self, location, beds, doctors, ventilators):
-        """Create and save a HealthcareResource object"""
-        resource = HealthcareResource(
-            location=location,
-            update_date=timezone.now() - timedelta(days=random.randint(0, 14)),
-            hospital_beds=int(beds) if isinstance(beds, (int, float, str)) else random.randint(50, 500),
-            available_doctors=int(doctors) if isinstance(doctors, (int, float, str)) else random.randint(10, 100),
-            ventilators=int(ventilators) if isinstance(ventilators, (int, float, str)) else random.randint(5, 50),
-            icu_capacity=random.randint(10, 100),
-            occupancy_rate=random.uniform(0.3, 0.9)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100000,
+            help='Number of records generated and inserted per batch'
         )
-        resource.save()
-        return resource
-    
-    def create_health_record(self, person, disease, env_factor, resource, severity, risk_level, outbreak):
-        """Create and save a HealthRecord object"""
-        record = HealthRecord(
-            person=person,
-            disease=disease,
-            environmental_factor=env_factor,
-            healthcare_resource=resource,
-            date_of_data_collection=timezone.now() - timedelta(days=random.randint(0, 60)),
-            disease_severity=severity,
-            infection_risk_level=risk_level,
-            outbreak_status=outbreak,
-            recovery_time_days=random.randint(5, 30),
-            hospitalization_required=random.choice([True, False]),
-            close_contacts=random.randint(0, 20)
-        )
-        record.save()
-        return record
-    
-    def generate_random_data(self, locations, diseases, num_records):
-        """Generate random data records"""
-        self.stdout.write(f'Generating {num_records} random records...')
-        
-        for i in range(num_records):
-            # Select a random location and disease
-            location = random.choice(list(locations.values()))
-            disease = random.choice(list(diseases.values()))
-            
-            # Create person
-            person = self.create_person(
-                random.randint(1, 90),
-                random.choice(['Male', 'Female', 'Other']),
-                location
-            )
-            
-            # Create environmental factor
-            env_factor = self.create_environmental_factor(
-                location,
-                random.randint(30, 200),
-                random.uniform(15, 35),
-                random.uniform(40, 80)
-            )
-            
-            # Create healthcare resource
-            resource = self.create_healthcare_resource(
-                location,
-                random.randint(50, 500),
-                random.randint(10, 100),
-                random.randint(5, 50)
-            )
-            
-            # Create health record
-            record = self.create_health_record(
-                person, 
-                disease,
-                env_factor,
-                resource,
-                random.choice(['None', 'Mild', 'Moderate', 'Severe']),
-                random.choice(['Low', 'Medium', 'High']),
-                random.choice(['None', 'Potential', 'Confirmed'])
-            )
-            
-            if (i + 1) % 100 == 0:
-                self.stdout.write(f'Generated {i + 1} records so far...')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting data import...'))
+        rng = np.random.default_rng(options['seed'])
+        batch_size = max(options['batch_size'], 1)
+        started = time.monotonic()
+
+        # Everything runs in one transaction: a failed run leaves the old data in place
+        with transaction.atomic():
+            # Clear existing data
+            self.stdout.write('Clearing existing data...')
+            self.clear_data(options['reset'])
+
+            self.stdout.write('Creating locations...')
+            locations = self.create_locations(rng)
+
+            self.stdout.write('Creating diseases...')
+            diseases = self.create_diseases(rng)
+
+            # Process CSV file if available
+            csv_file_path = 'public_health_surveillance_dataset.csv'
+            records_created = 0
+
+            if os.path.exists(csv_file_path):
+                self.stdout.write(f'Processing data from {csv_file_path}...')
+                for chunk in pd.read_csv(csv_file_path, chunksize=batch_size):
+                    records_created += self.generate_batch(rng, len(chunk), locations, diseases, chunk)
+                    self.stdout.write(f'Created {records_created} records so far...')
+            else:
+                records = options['records']
+                self.stdout.write(f'CSV file not found at {csv_file_path}, generating {records} random records...')
+                while records_created < records:
+                    size = min(batch_size, records - records_created)
+                    records_created += self.generate_batch(rng, size, locations, diseases)
+                    self.stdout.write(f'Generated {records_created} records so far...')
+
+            self.stdout.write('Building daily rollups...')
+            rebuild_rollups()
+
+            # TRUNCATE and the bulk inserts send no signals
+            DataVersion.bump()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Successfully imported {records_created} records in {elapsed:.1f}s'))
+
+    def clear_data(self, mode):
+        """Empty the sample data tables, reporting the time spent on each"""
+        # Children before parents, so no table is emptied while rows still point at it
+        tables = [
+            SeriesForecast, DailyHealthRollup, HealthRecord, MedicalHistory, Person, Demographics,
+            HealthcareResource, EnvironmentalFactor, Disease, Location,
+            # Progress of earlier imports, whose records are gone now
+            ImportChunk, ImportManifest,
+        ]
+        if mode == 'fast':
+            timings = reset_tables(tables)
+        else:
+            timings = self.delete_with_orm(tables)
+        with suppress_version_bumps():
+            for model, seconds in timings:
+                self.stdout.write(f'  {model._meta.db_table}: {seconds:.3f}s')
+        # Forecast artifacts were fitted on the old data; remove them once the new data is committed
+        transaction.on_commit(lambda: forecasting.prune(keep=0))
+
+    def delete_with_orm(self, tables):
+        """Delete through the ORM, which collects related objects and sends signals"""
+        for model in tables:
+            started = time.monotonic()
+            model.objects.all().delete()
+            yield model, time.monotonic() - started
+
+    def create_locations(self, rng):
+        """Insert the fixed sample locations and return a name -> id map"""
+        ids = reserve_ids(Location, len(LOCATIONS))
+        names, types, latitudes, longitudes = zip(*LOCATIONS)
+        load_rows(Location, pd.DataFrame({
+            'id': ids,
+            'name': names,
+            'type': types,
+            'latitude': latitudes,
+            'longitude': longitudes,
+            'population': rng.integers(5000, 200001, len(LOCATIONS)),
+            'geohash': geohash.encode_many(latitudes, longitudes),
+        }))
+        return dict(zip(names, ids.tolist()))
+
+    def create_diseases(self, rng):
+        """Insert the fixed sample diseases and return a name -> id map"""
+        ids = reserve_ids(Disease, len(DISEASES))
+        names, types, contagion_rates, symptoms = zip(*DISEASES)
+        load_rows(Disease, pd.DataFrame({
+            'id': ids,
+            'name': names,
+            'type': types,
+            'contagion_rate': contagion_rates,
+            'symptoms': [','.join(items) for items in symptoms],
+            'incubation_period': rng.integers(2, 15, len(DISEASES)),
+        }))
+        return dict(zip(names, ids.tolist()))
+
+    def generate_batch(self, rng, size, locations, diseases, source=None):
+        """Draw `size` synthetic records column by column and insert them
+
+        Columns present in `source` (a chunk of the sample CSV) replace the
+        random draws wherever they hold a value.
+        """
+        def column(name, generated):
+            if source is None or name not in source:
+                return generated
+            values = source[name].reset_index(drop=True)
+            if np.issubdtype(np.asarray(generated).dtype, np.number):
+                values = pd.to_numeric(values, errors='coerce')
+            return values.where(values.notna(), pd.Series(generated)).to_numpy()
+
+        def lookup(name, mapping):
+            generated = rng.choice(list(mapping.values()), size)
+            if source is None or name not in source:
+                return generated
+            return source[name].reset_index(drop=True).map(mapping).fillna(pd.Series(generated)).astype('int64').to_numpy()
+
+        def days_ago(high):
+            return pd.Series(pd.Timestamp(timezone.now()) - pd.to_timedelta(rng.integers(0, high + 1, size), unit='D'))
+
+        location_ids = lookup('location', locations)
+        ids = {
+            model: reserve_ids(model, size)
+            for model in (Demographics, Person, MedicalHistory, EnvironmentalFactor,
+                          HealthcareResource, HealthRecord)
+        }
+
+        load_rows(Demographics, pd.DataFrame({
+            'id': ids[Demographics],
+            'age': column('age', rng.integers(1, 91, size)).astype('int64'),
+            'gender': column('gender', rng.choice(GENDERS, size)),
+            'occupation': rng.choice(OCCUPATIONS, size),
+            'socioeconomic_status': rng.choice(SOCIOECONOMIC_STATUSES, size),
+        }))
+
+        load_rows(Person, pd.DataFrame({
+            'id': ids[Person],
+            'demographics_id': ids[Demographics],
+            'location_id': location_ids,
+            'vaccination_status': rng.random(size) < 0.5,
+        }))
+
+        load_rows(MedicalHistory, pd.DataFrame({
+            'id': ids[MedicalHistory],
+            'person_id': ids[Person],
+            'chronic_conditions': rng.choice(CHRONIC_CONDITIONS, size),
+            'allergies': rng.choice(ALLERGIES, size),
+            'blood_type': rng.choice(BLOOD_TYPES, size),
+        }))
+
+        load_rows(EnvironmentalFactor, pd.DataFrame({
+            'id': ids[EnvironmentalFactor],
+            'location_id': location_ids,
+            'date': days_ago(30),
+            'air_quality_index': column('air_quality_index', rng.integers(30, 201, size)).astype('int64'),
+            'temperature': column('temperature', rng.uniform(15, 35, size)).astype('float64'),
+            'humidity': column('humidity', rng.uniform(40, 80, size)).astype('float64'),
+            'precipitation': rng.uniform(0, 50, size),
+            'wind_speed': rng.uniform(0, 30, size),
+        }))
+
+        load_rows(HealthcareResource, pd.DataFrame({
+            'id': ids[HealthcareResource],
+            'location_id': location_ids,
+            'update_date': days_ago(14),
+            'hospital_beds': column('hospital_beds', rng.integers(50, 501, size)).astype('int64'),
+            'available_doctors': column('doctors', rng.integers(10, 101, size)).astype('int64'),
+            'ventilators': column('ventilators', rng.integers(5, 51, size)).astype('int64'),
+            'icu_capacity': rng.integers(10, 101, size),
+            'occupancy_rate': rng.uniform(0.3, 0.9, size),
+        }))
+
+        load_rows(HealthRecord, pd.DataFrame({
+            'id': ids[HealthRecord],
+            'person_id': ids[Person],
+            'disease_id': lookup('disease', diseases),
+            'environmental_factor_id': ids[EnvironmentalFactor],
+            'healthcare_resource_id': ids[HealthcareResource],
+            'date_of_data_collection': days_ago(60),
+            'disease_severity': column('disease_severity', rng.choice(SEVERITIES, size)),
+            'infection_risk_level': column('infection_risk_level', rng.choice(RISK_LEVELS, size)),
+            'outbreak_status': column('outbreak_status', rng.choice(OUTBREAK_STATUSES, size)),
+            'recovery_time_days': rng.integers(5, 31, size),
+            'hospitalization_required': rng.random(size) < 0.5,
+            'close_contacts': rng.integers(0, 21, size),
+        }))
+
+        return size
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from dashboard import partitions
+from dashboard.models import DataVersion, EnvironmentalFactor, HealthRecord
+
+TABLES = {
+    'healthrecord': HealthRecord,
+    'environmentalfactor': EnvironmentalFactor,
+}
+
+
+class Command(BaseCommand):
+    help = ('Partition HealthRecord and EnvironmentalFactor by month (PostgreSQL): create upcoming '
+            'partitions, split rows out of the default partition and detach old months')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', choices=TABLES, action='append', help='Only this table (repeatable)')
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Rebuild tables that are not partitioned yet as partitioned tables (locks and copies '
+                 'the whole table; run in a maintenance window)'
+        )
+        parser.add_argument('--ahead', type=int, default=partitions.MONTHS_AHEAD,
+                            help='Months of partitions to keep ready past the current one')
+        parser.add_argument('--retain-months', type=int,
+                            help='Detach partitions of months older than this many months (default: keep all)')
+        parser.add_argument('--archive-schema', default='archive',
+                            help='Schema detached partitions are moved to')
+        parser.add_argument('--drop', action='store_true', help='Drop detached partitions instead of archiving them')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(f'Table partitioning requires PostgreSQL; nothing to do on {connection.vendor}')
+            return
+
+        models = [TABLES[name] for name in options['table'] or TABLES]
+        this_month = partitions.month_start(timezone.now())
+        detached_any = False
+
+        for model in models:
+            name = model._meta.db_table
+            if not partitions.is_partitioned(model):
+                if not options['convert']:
+                    self.stdout.write(f'{name} is not partitioned (use --convert)')
+                    continue
+                count, dropped = partitions.convert(model, options['ahead'])
+                self.stdout.write(self.style.SUCCESS(f'Converted {name} to {count} monthly partitions'))
+                for constraint in dropped:
+                    self.stdout.write(self.style.WARNING(
+                        f'Dropped foreign key {constraint}, which cannot reference a partitioned table'
+                    ))
+
+            created = partitions.ensure_partitions(
+                model, this_month, partitions.add_months(this_month, options['ahead'])
+            )
+            # Months that were loaded before they had a partition
+            span = partitions.default_partition_span(model)
+            if span:
+                created += partitions.ensure_partitions(model, *span)
+            for partition in created:
+                self.stdout.write(f'Created {partition}')
+
+            if options['retain_months'] is not None:
+                before = partitions.add_months(this_month, -options['retain_months'])
+                archive_schema = None if options['drop'] else options['archive_schema']
+                for partition in partitions.detach_partitions(model, before, archive_schema):
+                    detached_any = True
+                    where = 'dropped' if options['drop'] else f'moved to {archive_schema}'
+                    self.stdout.write(self.style.WARNING(f'Detached {partition} ({where})'))
+
+        if detached_any:
+            # Pages reading the base tables change; the daily rollups keep the detached months
+            DataVersion.bump()
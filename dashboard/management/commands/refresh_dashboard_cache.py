@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.caching import refresh_section
+from dashboard.models import DataVersion
+from dashboard.views import ConsolidatedDashboardView
+
+
+class Command(BaseCommand):
+    help = 'Rebuild consolidated dashboard sections before they expire, so requests never wait on them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=15,
+            help='Seconds between passes'
+        )
+        parser.add_argument(
+            '--ahead',
+            type=float,
+            default=30,
+            help='Rebuild sections that go stale within this many seconds'
+        )
+        parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            # A new view per pass: values shared between its sections are computed once per view
+            sections = ConsolidatedDashboardView().get_sections()
+            version = DataVersion.current()[0]
+            for name, build in sections.items():
+                started = time.monotonic()
+                if refresh_section(name, build, version, options['ahead']):
+                    self.stdout.write(
+                        f'Rebuilt {name} for data version {version} in {time.monotonic() - started:.2f}s'
+                    )
+            if options['once']:
+                break
+            time.sleep(max(options['interval'], 1))
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from dashboard.models import DailyHealthRollup, DataVersion, HealthRecord
+from dashboard.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily health rollups from the health records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to recompute (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Last day to recompute (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--days', type=int, help='Recompute only the last N days')
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Only rebuild when the rollup table is empty (e.g. right after migrating)'
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and DailyHealthRollup.objects.exists():
+            self.stdout.write('Rollups already present, nothing to do')
+            return
+
+        days = self.get_days(options)
+        started = time.monotonic()
+        with transaction.atomic():
+            written = rebuild_rollups(days)
+            DataVersion.bump()
+        scope = 'all days' if days is None else f'{len(days)} days'
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} rollup rows for {scope} in {time.monotonic() - started:.1f}s'
+        ))
+
+    def get_days(self, options):
+        """Return the days to recompute, or None for a full rebuild"""
+        if options['days'] is not None:
+            today = timezone.localdate()
+            return [today - timedelta(days=offset) for offset in range(max(options['days'], 1))]
+        if not options['since'] and not options['until']:
+            return None
+
+        bounds = HealthRecord.objects.aggregate(first=Min('date_of_data_collection'),
+                                                last=Max('date_of_data_collection'))
+        if bounds['first'] is None:
+            return []
+        first = self.parse_day(options['since']) if options['since'] else timezone.localdate(bounds['first'])
+        last = self.parse_day(options['until']) if options['until'] else timezone.localdate()
+        if first > last:
+            raise CommandError('--since must not be after --until')
+        return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+    def parse_day(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD')
@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard import forecasting
+from dashboard.models import DataVersion
+
+
+class Command(BaseCommand):
+    help = 'Fit the disease forecast offline and persist it for the current data version'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=forecasting.FORECAST_DAYS,
+            help='Number of days to forecast'
+        )
+        parser.add_argument(
+            '--model',
+            choices=sorted(forecasting.FORECASTERS),
+            help='Forecaster to fit (default: settings.FORECAST_MODEL)'
+        )
+        parser.add_argument('--force', action='store_true', help='Refit even if this data version has a model')
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep running and refit whenever the data version changes'
+        )
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between checks with --watch')
+        parser.add_argument('--keep', type=int, default=3, help='Number of model files to keep')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        while True:
+            self.train_if_stale(options['days'], options['model'], force, options['keep'])
+            if not options['watch']:
+                break
+            force = False
+            time.sleep(max(options['interval'], 1))
+
+    def train_if_stale(self, days, model, force, keep):
+        # Read the version before the data, so a change made during the fit triggers another one
+        version = DataVersion.current()[0]
+        if not force and os.path.exists(forecasting.artifact_path(version)):
+            self.stdout.write(f'Forecast for data version {version} is up to date')
+            return
+
+        started = time.monotonic()
+        artifact = forecasting.train(version, days, model)
+        forecasting.prune(keep)
+        self.stdout.write(self.style.SUCCESS(
+            f'Trained {artifact["model_name"]} forecast for data version {version} '
+            f'({len(artifact["prediction_counts"])} days) in {time.monotonic() - started:.2f}s'
+        ))
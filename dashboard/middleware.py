@@ -0,0 +1,62 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+from django.utils.decorators import sync_and_async_middleware
+
+from .models import DataVersion
+from .routers import REPLICA, read_from, replica_configured
+
+# Set on clients that just wrote, so their next reads come from the primary
+RECENT_WRITE_COOKIE = 'medidash_wrote'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _replica_is_behind():
+    """Whether the replica has not replayed the latest DataVersion bump yet"""
+    return DataVersion.current(REPLICA)[0] < DataVersion.current('default')[0]
+
+
+def _read_alias(request):
+    """REPLICA for read-only requests to dashboard pages and APIs, None for the primary
+
+    The ETags and section cache keys carry the primary's data version, so
+    while the replica lags behind it the primary serves the data as well;
+    otherwise old data would be cached and validated under the new version.
+    """
+    if request.method not in SAFE_METHODS or RECENT_WRITE_COOKIE in request.COOKIES:
+        return None
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    if 'dashboard' not in match.namespaces or _replica_is_behind():
+        return None
+    return REPLICA
+
+
+def _mark_write(request, response):
+    if request.method not in SAFE_METHODS:
+        response.set_cookie(RECENT_WRITE_COOKIE, '1', max_age=settings.REPLICA_LAG_SECONDS,
+                            httponly=True, samesite='Lax')
+    return response
+
+
+@sync_and_async_middleware
+def ReplicaReadMiddleware(get_response):
+    """Serve the dashboard's read-only requests from the read replica, when one is configured"""
+    if not replica_configured():
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with read_from(await sync_to_async(_read_alias)(request)):
+                response = await get_response(request)
+            return _mark_write(request, response)
+    else:
+        def middleware(request):
+            with read_from(_read_alias(request)):
+                response = get_response(request)
+            return _mark_write(request, response)
+    return middleware
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_alter_healthrecord_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=500)),
+                ('file_hash', models.CharField(db_index=True, max_length=64)),
+                ('shard_size', models.BigIntegerField(blank=True, null=True)),
+                ('byte_offset', models.BigIntegerField(default=0)),
+                ('last_chunk', models.IntegerField(default=0)),
+                ('records_imported', models.BigIntegerField(default=0)),
+                ('status', models.CharField(default='running', max_length=20)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='healthrecord',
+            name='source_record_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='ImportChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_offset', models.BigIntegerField()),
+                ('end_offset', models.BigIntegerField()),
+                ('records', models.IntegerField()),
+                ('committed_at', models.DateTimeField(auto_now_add=True)),
+                ('manifest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='dashboard.importmanifest')),
+            ],
+            options={
+                'unique_together': {('manifest', 'start_offset')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_import_manifest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(fields=['date_of_data_collection', 'disease_severity', 'infection_risk_level'], name='hr_date_severity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(fields=['disease_severity', 'date_of_data_collection'], name='hr_severity_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(fields=['infection_risk_level'], name='hr_risk_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(fields=['outbreak_status'], name='hr_outbreak_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(fields=['hospitalization_required'], name='hr_hospitalized_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(condition=models.Q(('disease_severity', 'Severe')), fields=['date_of_data_collection'], name='hr_severe_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(condition=models.Q(('disease_severity', 'None'), ('recovery_time_days__isnull', False)), fields=['date_of_data_collection'], name='hr_recovered_date_idx'),
+        ),
+    ]
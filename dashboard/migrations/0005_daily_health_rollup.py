@@ -0,0 +1,35 @@
+# Generated by Django 5.0.3 on 2026-10-18 19:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_healthrecord_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHealthRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('disease_severity', models.CharField(max_length=50)),
+                ('infection_risk_level', models.CharField(max_length=20)),
+                ('outbreak_status', models.CharField(max_length=20)),
+                ('record_count', models.IntegerField(default=0)),
+                ('hospitalized_count', models.IntegerField(default=0)),
+                ('recovered_count', models.IntegerField(default=0)),
+                ('recovery_days_sum', models.BigIntegerField(default=0)),
+                ('close_contacts_sum', models.BigIntegerField(default=0)),
+                ('disease', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.disease')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyhealthrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'location', 'disease', 'disease_severity', 'infection_risk_level', 'outbreak_status'), name='daily_rollup_key'),
+        ),
+    ]
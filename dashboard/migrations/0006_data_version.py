@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-18 20:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    DataVersion = apps.get_model('dashboard', 'DataVersion')
+    DataVersion.objects.using(schema_editor.connection.alias).get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_daily_health_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
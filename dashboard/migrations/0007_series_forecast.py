@@ -0,0 +1,37 @@
+# Generated by Django 5.0.3 on 2026-10-18 20:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('predicted', models.IntegerField()),
+                ('lower', models.IntegerField()),
+                ('upper', models.IntegerField()),
+                ('model_name', models.CharField(max_length=50)),
+                ('data_version', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('disease', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.disease')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dashboard.location')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['disease', 'day'], name='series_forecast_disease_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='seriesforecast',
+            constraint=models.UniqueConstraint(fields=('location', 'disease', 'day'), name='series_forecast_day'),
+        ),
+    ]
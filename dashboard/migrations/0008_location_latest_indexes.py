@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_series_forecast'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='environmentalfactor',
+            index=models.Index(fields=['location', '-date'], name='env_location_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthcareresource',
+            index=models.Index(fields=['location', '-update_date'], name='resource_location_date_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+from dashboard import geohash
+
+
+def fill_geohashes(apps, schema_editor):
+    Location = apps.get_model('dashboard', 'Location')
+    locations = list(Location.objects.using(schema_editor.connection.alias).only('latitude', 'longitude'))
+    for location in locations:
+        location.geohash = geohash.encode(location.latitude, location.longitude)
+    Location.objects.using(schema_editor.connection.alias).bulk_update(locations, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_location_latest_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.RunPython(fill_geohashes, migrations.RunPython.noop),
+    ]
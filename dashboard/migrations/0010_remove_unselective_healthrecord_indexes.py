@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-18 21:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_location_geohash'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='healthrecord',
+            name='hr_outbreak_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='healthrecord',
+            name='hr_hospitalized_idx',
+        ),
+    ]
@@ -1,12 +1,22 @@
 from django.db import models
 from django.utils import timezone
 
+from . import geohash
+
 class Location(models.Model):
     name = models.CharField(max_length=100)
     type = models.CharField(max_length=50)  # Urban, Suburban, Rural
     latitude = models.FloatField()
     longitude = models.FloatField()
     population = models.IntegerField()
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True)  # spatial index, see geohash.py
+
+    def save(self, *args, **kwargs):
+        self.geohash = geohash.encode(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.name
@@ -55,6 +65,12 @@ class EnvironmentalFactor(models.Model):
     humidity = models.FloatField()  # Percentage
     precipitation = models.FloatField()  # mm
     wind_speed = models.FloatField()  # km/h
+
+    class Meta:
+        indexes = [
+            # Latest reading per location (dashboard.locations)
+            models.Index(fields=['location', '-date'], name='env_location_date_idx'),
+        ]
     
     def __str__(self):
         return f"Environmental data for {self.location.name} on {self.date}"
@@ -67,6 +83,12 @@ class HealthcareResource(models.Model):
     ventilators = models.IntegerField()
     icu_capacity = models.IntegerField()
     occupancy_rate = models.FloatField()  # Percentage
+
+    class Meta:
+        indexes = [
+            # Latest snapshot per location (dashboard.locations)
+            models.Index(fields=['location', '-update_date'], name='resource_location_date_idx'),
+        ]
     
     def __str__(self):
         return f"Healthcare resources for {self.location.name} as of {self.update_date}"
@@ -83,6 +105,135 @@ class HealthRecord(models.Model):
     recovery_time_days = models.IntegerField(null=True, blank=True)
     hospitalization_required = models.BooleanField(default=False)
     close_contacts = models.IntegerField(default=0)
+    source_record_id = models.CharField(max_length=100, null=True, blank=True, unique=True)  # ID in the upstream feed
+    
+    class Meta:
+        # Matched to the filters and GROUP BYs in views.py
+        indexes = [
+            # Date-range trends broken down by severity (api_disease_trends, prediction time series)
+            models.Index(fields=['date_of_data_collection', 'disease_severity', 'infection_risk_level'],
+                         name='hr_date_severity_idx'),
+            # Distribution panels: GROUP BY answered from the index alone
+            models.Index(fields=['disease_severity', 'date_of_data_collection'], name='hr_severity_date_idx'),
+            models.Index(fields=['infection_risk_level'], name='hr_risk_level_idx'),
+            # KPI counts (critical and recovered cases) only touch these small slices
+            models.Index(fields=['date_of_data_collection'], condition=models.Q(disease_severity='Severe'),
+                         name='hr_severe_date_idx'),
+            models.Index(fields=['date_of_data_collection'],
+                         condition=models.Q(disease_severity='None', recovery_time_days__isnull=False),
+                         name='hr_recovered_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.disease.name} record for Person {self.person.id} on {self.date_of_data_collection.date()}"
+
+
+class DailyHealthRollup(models.Model):
+    day = models.DateField()
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)  # the person's location
+    disease = models.ForeignKey(Disease, on_delete=models.CASCADE)
+    disease_severity = models.CharField(max_length=50)
+    infection_risk_level = models.CharField(max_length=20)
+    outbreak_status = models.CharField(max_length=20)
+    record_count = models.IntegerField(default=0)
+    hospitalized_count = models.IntegerField(default=0)
+    recovered_count = models.IntegerField(default=0)  # severity None with a recovery time
+    recovery_days_sum = models.BigIntegerField(default=0)
+    close_contacts_sum = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'location', 'disease', 'disease_severity', 'infection_risk_level', 'outbreak_status'],
+                name='daily_rollup_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.record_count} {self.disease_severity} records on {self.day}"
+
+class ImportManifest(models.Model):
+    file_path = models.CharField(max_length=500)
+    file_hash = models.CharField(max_length=64, db_index=True)  # SHA-256 of the file contents
+    shard_size = models.BigIntegerField(null=True, blank=True)  # bytes, parallel imports only
+    byte_offset = models.BigIntegerField(default=0)  # end of the last committed chunk (row groups/batches for Parquet and Arrow)
+    last_chunk = models.IntegerField(default=0)
+    records_imported = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, default='running')  # running, completed, failed
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Import of {self.file_path} ({self.status}, chunk {self.last_chunk})"
+
+    def commit_chunk(self, chunk_number, byte_offset, records):
+        """Record a committed chunk; call inside the chunk's transaction"""
+        ImportManifest.objects.filter(pk=self.pk).update(
+            byte_offset=byte_offset,
+            last_chunk=chunk_number,
+            records_imported=models.F('records_imported') + records,
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['byte_offset', 'last_chunk', 'records_imported', 'updated_at'])
+
+class ImportChunk(models.Model):
+    manifest = models.ForeignKey(ImportManifest, on_delete=models.CASCADE, related_name='chunks')
+    start_offset = models.BigIntegerField()
+    end_offset = models.BigIntegerField()
+    records = models.IntegerField()
+    committed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [('manifest', 'start_offset')]
+
+    def __str__(self):
+        return f"Bytes {self.start_offset}-{self.end_offset} of import {self.manifest_id}"
+
+class DataVersion(models.Model):
+    """Single row counting changes to the dashboard data, for HTTP validators and cache keys"""
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Data version {self.version} ({self.updated_at})"
+
+    @classmethod
+    def current(cls, using='default'):
+        """Return the current (version, updated_at); version 0 before any change
+
+        Read from the primary by default, so validators and cache keys move on
+        as soon as a change commits rather than when a replica catches up.
+        """
+        row = cls.objects.using(using).filter(pk=1).values_list('version', 'updated_at').first()
+        return row or (0, None)
+
+    @classmethod
+    def bump(cls, using='default'):
+        """Increment the version; call inside the transaction that changes the data"""
+        now = timezone.now()
+        updated = cls.objects.using(using).filter(pk=1).update(version=models.F('version') + 1, updated_at=now)
+        if not updated:
+            cls.objects.using(using).get_or_create(pk=1, defaults={'version': 1, 'updated_at': now})
+
+class SeriesForecast(models.Model):
+    """One forecast day of one (location, disease) series, written by the batch_forecast command"""
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    disease = models.ForeignKey(Disease, on_delete=models.CASCADE)
+    day = models.DateField()
+    predicted = models.IntegerField()
+    lower = models.IntegerField()
+    upper = models.IntegerField()
+    model_name = models.CharField(max_length=50)
+    data_version = models.BigIntegerField()  # DataVersion the series was read at
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'disease', 'day'], name='series_forecast_day'),
+        ]
+        indexes = [
+            models.Index(fields=['disease', 'day'], name='series_forecast_disease_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.predicted} expected on {self.day}"
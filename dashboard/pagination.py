@@ -0,0 +1,130 @@
+"""
+Keyset (seek) pagination for the query pages.
+
+OFFSET pagination reads and discards every row before the requested page, so
+deep pages get slower the further they are. Here a page instead starts right
+after (or before) the ordering key of the row it continues from, which the
+database finds with an index seek whatever the depth. The key travels in an
+opaque, signed cursor token, so clients can't forge arbitrary filters.
+
+The ordering must be a total order over indexed columns, ending with the
+primary key, e.g. ['id'] or ['-date_of_data_collection', '-id']. Counting
+every matching row is left to the caller (``KeysetPage.total_count``), since
+on large tables it costs more than the page itself.
+"""
+from datetime import date, datetime
+
+from django.core import signing
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+CURSOR_SALT = 'dashboard.pagination'
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Parse a requested page size, clamped to 1..MAX_PAGE_SIZE"""
+    try:
+        return min(max(int(value), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return default
+
+
+def _encode_value(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def encode_cursor(key, direction):
+    """Signed token for the page after ('next') or before ('prev') the row with ordering `key`"""
+    return signing.dumps({'k': [_encode_value(value) for value in key], 'd': direction},
+                         salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """Return (key, direction) from a cursor token; raises ValueError if it was tampered with"""
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        key, direction = data['k'], data['d']
+    except (signing.BadSignature, KeyError, TypeError):
+        raise ValueError('Invalid page cursor')
+    if direction not in ('next', 'prev'):
+        raise ValueError('Invalid page cursor')
+    return key, direction
+
+
+def _seek(ordering, key, forward):
+    """Condition selecting the rows after `key` in `ordering` (before it if not `forward`)
+
+    Expanded as (a > x) OR (a = x AND b > y) ..., which every backend can
+    answer from an index on the leading column.
+    """
+    condition = Q()
+    for position, field in enumerate(ordering):
+        name = field.lstrip('-')
+        ascending = not field.startswith('-')
+        lookup = 'gt' if ascending == forward else 'lt'
+        step = Q(**{f'{name}__{lookup}': key[position]})
+        for previous in ordering[:position]:
+            step &= Q(**{previous.lstrip('-'): key[ordering.index(previous)]})
+        condition |= step
+    return condition
+
+
+def _key(row, ordering):
+    fields = [field.lstrip('-') for field in ordering]
+    if isinstance(row, dict):
+        return [row[field] for field in fields]
+    return [getattr(row, field) for field in fields]
+
+
+class KeysetPage:
+    """One page of rows plus the cursors of its neighbours"""
+
+    def __init__(self, queryset, rows, ordering, has_previous, has_next, size):
+        self.queryset = queryset
+        self.rows = rows
+        self.size = size
+        self.has_previous = has_previous
+        self.has_next = has_next
+        self.previous_cursor = encode_cursor(_key(rows[0], ordering), 'prev') if rows and has_previous else None
+        self.next_cursor = encode_cursor(_key(rows[-1], ordering), 'next') if rows and has_next else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def total_count(self):
+        """Number of rows over all pages; one COUNT query, only run when called"""
+        return self.queryset.count()
+
+
+def paginate(queryset, ordering, cursor=None, size=DEFAULT_PAGE_SIZE):
+    """Return the KeysetPage of `queryset` that `cursor` points to (the first page if None)
+
+    Raises ValueError for an invalid cursor.
+    """
+    ordering = list(ordering)
+    reverse = ['-' + field if not field.startswith('-') else field[1:] for field in ordering]
+    size = min(max(size, 1), MAX_PAGE_SIZE)
+
+    key, direction = decode_cursor(cursor) if cursor else (None, 'next')
+    forward = direction == 'next'
+    rows = queryset.order_by(*(ordering if forward else reverse))
+    if key is not None:
+        if len(key) != len(ordering):
+            raise ValueError('Invalid page cursor')
+        rows = rows.filter(_seek(ordering, key, forward))
+
+    # One extra row tells whether there is another page in this direction
+    rows = list(rows[:size + 1])
+    more = len(rows) > size
+    rows = rows[:size]
+    if forward:
+        return KeysetPage(queryset, rows, ordering, key is not None, more, size)
+    return KeysetPage(queryset, rows[::-1], ordering, more, True, size)
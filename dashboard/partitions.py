@@ -0,0 +1,351 @@
+"""
+Monthly range partitioning of HealthRecord and EnvironmentalFactor (PostgreSQL).
+
+Optional: ``convert`` (the manage_partitions command with --convert) rebuilds
+a table as a declaratively partitioned one, with a partition per month of its
+date column plus a DEFAULT partition for rows outside them. Queries filtered
+on a date range, like the health record filters and the rollup rebuilds,
+then only scan the partitions of the months they touch.
+
+PostgreSQL requires every unique constraint of a partitioned table to include
+the partition key, so the primary key becomes (id, date) and the UNIQUE
+constraint on source_record_id becomes (source_record_id, date). A guard
+table keeps source_record_id unique across all dates: triggers on the
+partitioned table mirror the column into it, and its primary key rejects a
+value that is already stored, with the same error imports already report.
+Nothing can reference a partitioned table by id alone, so
+HealthRecord.environmental_factor loses its foreign key constraint once
+EnvironmentalFactor is partitioned.
+
+Imports never create partitions, since their chunk transactions would then
+lock the parent table against each other. Rows outside the existing
+partitions land in the DEFAULT partition. The manage_partitions command,
+which should run on a schedule, keeps partitions ready for the coming months.
+It gives the months it finds in DEFAULT partitions of their own, and detaches
+months older than the retention period, then archives or drops them.
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connections, models, transaction
+
+from .models import EnvironmentalFactor, HealthRecord
+
+# Partitioned models and the date column they are partitioned on
+PARTITION_KEYS = {
+    HealthRecord: 'date_of_data_collection',
+    EnvironmentalFactor: 'date',
+}
+
+# Months of partitions kept ready past the current one
+MONTHS_AHEAD = 3
+
+_MONTH_SUFFIX = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def month_start(value):
+    """First day of the month of a date or datetime (in UTC, the partition bounds' time zone)"""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc).date() if value.tzinfo else value.date()
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def partition_name(model, month):
+    return f'{model._meta.db_table}_p{month:%Y_%m}'
+
+
+def default_partition_name(model):
+    return f'{model._meta.db_table}_default'
+
+
+def is_partitioned(model, using='default'):
+    """Whether `model`'s table is a partitioned table; always False off PostgreSQL"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)',
+                       [model._meta.db_table])
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions(model, using='default'):
+    """Return [(month, partition name)] of `model`'s monthly partitions, oldest first"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(%s)',
+            [model._meta.db_table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = _MONTH_SUFFIX.search(name)
+        if match:
+            months.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(months)
+
+
+def _table_exists(cursor, name):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    return cursor.fetchone()[0]
+
+
+def _unique_fields(model):
+    return [field for field in model._meta.concrete_fields if field.unique and not field.primary_key]
+
+
+def guard_table_name(model, field):
+    return f'{model._meta.db_table}_{field.column}_guard'
+
+
+def unique_guards(model, using='default'):
+    """Return [(field, guard table)] of the unique guards of `model`'s partitioned table"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return []
+    with connection.cursor() as cursor:
+        return [
+            (field, guard_table_name(model, field)) for field in _unique_fields(model)
+            if _table_exists(cursor, guard_table_name(model, field))
+        ]
+
+
+def _create_unique_guard(cursor, connection, model, field):
+    """Keep `field` unique over all partitions with a guard table that triggers keep in sync
+
+    Rows moved between partitions (an UPDATE of the date) fire the DELETE and
+    INSERT triggers, so their value is removed and added back.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    name = guard_table_name(model, field)
+    guard, column, function = quote(name), quote(field.column), quote(f'{name}_sync')
+
+    cursor.execute(f'CREATE TABLE {guard} ({column} {field.db_type(connection)} PRIMARY KEY)')
+    cursor.execute(f'INSERT INTO {guard} SELECT {column} FROM {table} WHERE {column} IS NOT NULL')
+    cursor.execute(f"""
+        CREATE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                IF NEW.{column} IS NOT NULL THEN
+                    INSERT INTO {guard} VALUES (NEW.{column});
+                END IF;
+            ELSIF TG_OP = 'DELETE' THEN
+                DELETE FROM {guard} WHERE {column} = OLD.{column};
+            ELSIF NEW.{column} IS DISTINCT FROM OLD.{column} THEN
+                DELETE FROM {guard} WHERE {column} = OLD.{column};
+                IF NEW.{column} IS NOT NULL THEN
+                    INSERT INTO {guard} VALUES (NEW.{column});
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    cursor.execute(f'CREATE TRIGGER {quote(f"{name}_sync")} AFTER INSERT OR UPDATE OF {column} OR DELETE '
+                   f'ON {table} FOR EACH ROW EXECUTE FUNCTION {function}()')
+
+
+def create_partition(model, month, using='default'):
+    """Create the partition of `month` unless it exists; return whether it was created
+
+    Rows of that month already in the DEFAULT partition are moved into the new
+    one, since PostgreSQL refuses to add a partition overlapping them.
+    Detaching the DEFAULT partition drops its clone of the unique guard
+    triggers, so the moved rows' guard entries are removed explicitly; the
+    triggers add them back when the rows are inserted through the parent.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    key = quote(PARTITION_KEYS[model])
+    name = partition_name(model, month)
+    default = default_partition_name(model)
+    start, end = month, add_months(month, 1)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+    guards = unique_guards(model, using)
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if _table_exists(cursor, name):
+            return False
+
+        overlapping = False
+        if _table_exists(cursor, default):
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {quote(default)} WHERE {key} >= %s AND {key} < %s)',
+                           [start, end])
+            overlapping = cursor.fetchone()[0]
+
+        if overlapping:
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {quote(default)}')
+            cursor.execute(f'CREATE TABLE {quote(name)} PARTITION OF {table} {bounds}')
+            for field, guard in guards:
+                column = quote(field.column)
+                cursor.execute(
+                    f'DELETE FROM {quote(guard)} USING {quote(default)} '
+                    f'WHERE {quote(guard)}.{column} = {quote(default)}.{column} '
+                    f'AND {quote(default)}.{key} >= %s AND {quote(default)}.{key} < %s',
+                    [start, end]
+                )
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {quote(default)} WHERE {key} >= %s AND {key} < %s RETURNING *) '
+                f'INSERT INTO {table} SELECT * FROM moved',
+                [start, end]
+            )
+            cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {quote(default)} DEFAULT')
+        else:
+            cursor.execute(f'CREATE TABLE {quote(name)} PARTITION OF {table} {bounds}')
+    return True
+
+
+def ensure_partitions(model, first, last, using='default'):
+    """Create the monthly partitions from the month of `first` to that of `last`; return the names created"""
+    created = []
+    month, last = month_start(first), month_start(last)
+    while month <= last:
+        if create_partition(model, month, using):
+            created.append(partition_name(model, month))
+        month = add_months(month, 1)
+    return created
+
+
+def default_partition_span(model, using='default'):
+    """(first, last) date in the DEFAULT partition of `model`, or None if it is empty or missing"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if not _table_exists(cursor, default_partition_name(model)):
+            return None
+        key = quote(PARTITION_KEYS[model])
+        cursor.execute(f'SELECT MIN({key}), MAX({key}) FROM {quote(default_partition_name(model))}')
+        first, last = cursor.fetchone()
+    return None if first is None else (first, last)
+
+
+def detach_partitions(model, before, archive_schema=None, using='default'):
+    """Detach the monthly partitions that end on or before `before` (a month start)
+
+    A detached partition is moved to `archive_schema`, or dropped when it is
+    None. Its values leave the unique guards, so archived records can be
+    imported again. Returns the names of the partitions detached.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    guards = unique_guards(model, using)
+    detached = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if archive_schema:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {quote(archive_schema)}')
+        for month, name in monthly_partitions(model, using):
+            if add_months(month, 1) > before:
+                break
+            for field, guard in guards:
+                column = quote(field.column)
+                cursor.execute(f'DELETE FROM {quote(guard)} USING {quote(name)} '
+                               f'WHERE {quote(guard)}.{column} = {quote(name)}.{column}')
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {quote(name)}')
+            if archive_schema:
+                cursor.execute(f'ALTER TABLE {quote(name)} SET SCHEMA {quote(archive_schema)}')
+            else:
+                cursor.execute(f'DROP TABLE {quote(name)}')
+            detached.append(name)
+    return detached
+
+
+def _drop_foreign_keys_to(cursor, quote, table):
+    """Drop the foreign key constraints referencing `table`; return them as 'table.constraint'"""
+    # Constraints on partitions (conparentid set) go with their parent's
+    cursor.execute(
+        'SELECT conrelid::regclass::text, conname FROM pg_constraint '
+        "WHERE contype = 'f' AND confrelid = to_regclass(%s) AND conparentid = 0",
+        [table]
+    )
+    dropped = []
+    for referencing, name in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {referencing} DROP CONSTRAINT {quote(name)}')
+        dropped.append(f'{referencing}.{name}')
+    return dropped
+
+
+def convert(model, months_ahead=MONTHS_AHEAD, using='default'):
+    """Rebuild `model`'s table as a monthly partitioned table, keeping its rows, indexes and constraints
+
+    Foreign keys of other tables that reference this one are dropped, since
+    they can't reference a partitioned table by id alone. Runs in one
+    transaction holding an exclusive lock for the copy, so use a maintenance
+    window for large tables. Returns the number of partitions and the foreign
+    keys dropped.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    db_table = model._meta.db_table
+    table = quote(db_table)
+    key_field = model._meta.get_field(PARTITION_KEYS[model])
+    key = quote(key_field.column)
+    pk = quote(model._meta.pk.column)
+    old = quote(f'{db_table}_unpartitioned')
+    sequence = quote(f'{db_table}_id_seq')
+
+    with connection.schema_editor() as editor, connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        # LIKE copies the columns and defaults but no constraints or indexes, which would clash by name
+        cursor.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING STORAGE) '
+                       f'PARTITION BY RANGE ({key})')
+
+        cursor.execute(f'SELECT MIN({key}), MAX({key}) FROM {old}')
+        first, last = cursor.fetchone()
+        today = date.today()
+        month = month_start(first or today)
+        last = add_months(month_start(max(month_start(last or today), today)), months_ahead)
+        months = 0
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE {quote(partition_name(model, month))} PARTITION OF {table} '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+            month = add_months(month, 1)
+            months += 1
+        cursor.execute(f'CREATE TABLE {quote(default_partition_name(model))} PARTITION OF {table} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        dropped = _drop_foreign_keys_to(cursor, quote, f'{db_table}_unpartitioned')
+        cursor.execute(f'DROP TABLE {old}')
+
+        # The old id sequence (identity or serial) went with the old table
+        cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {table}.{pk}')
+        cursor.execute(f'SELECT setval(%s, COALESCE((SELECT MAX({pk}) FROM {table}), 0) + 1, false)', [sequence])
+        cursor.execute(f'ALTER TABLE {table} ALTER COLUMN {pk} SET DEFAULT nextval(%s::regclass)', [sequence])
+
+        # Unique constraints must include the partition key; the guards keep the values unique on their own
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {quote(db_table + "_pkey")} PRIMARY KEY ({pk}, {key})')
+        for field in _unique_fields(model):
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {quote(f"{db_table}_{field.column}_key")} '
+                           f'UNIQUE ({quote(field.column)}, {key})')
+            _create_unique_guard(cursor, connection, model, field)
+        for field in model._meta.concrete_fields:
+            if field.remote_field and field.db_constraint:
+                target = field.remote_field.model
+                if is_partitioned(target, using):
+                    continue
+                cursor.execute(
+                    f'ALTER TABLE {table} ADD CONSTRAINT {quote(f"{db_table}_{field.column}_fk")} '
+                    f'FOREIGN KEY ({quote(field.column)}) '
+                    f'REFERENCES {quote(target._meta.db_table)} ({quote(field.target_field.column)}) '
+                    f'DEFERRABLE INITIALLY DEFERRED'
+                )
+        # Indexes of foreign keys and other db_index fields, then Meta.indexes; created on every partition
+        for field in model._meta.concrete_fields:
+            if field.db_index and not field.unique:
+                editor.add_index(model, models.Index(fields=[field.name], name=f'{db_table}_{field.column}_idx'))
+        for index in model._meta.indexes:
+            editor.add_index(model, index)
+        cursor.execute(f'ANALYZE {table}')
+    return months, dropped
@@ -0,0 +1,48 @@
+"""
+Counting the queries of a request across threads.
+
+CaptureQueriesContext and assertNumQueries only see the calling thread's
+connection, but the consolidated dashboard builds its sections on executor
+threads with connections of their own. With DEBUG on, every connection logs
+each query to the django.db.backends logger from whatever thread runs it, so
+counting those log records covers all of them.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.test.utils import override_settings
+
+
+class QueryLog(logging.Handler):
+    """Logging handler collecting the SQL of every query logged by django.db.backends"""
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.queries = []
+        self._queries_lock = threading.Lock()
+
+    def emit(self, record):
+        sql = getattr(record, 'sql', None)
+        if sql is not None:
+            with self._queries_lock:
+                self.queries.append(sql)
+
+    def __len__(self):
+        return len(self.queries)
+
+
+@contextmanager
+def capture_all_queries():
+    """Yield a QueryLog of the queries run inside the block, on any thread"""
+    log = QueryLog()
+    logger = logging.getLogger('django.db.backends')
+    level = logger.level
+    logger.addHandler(log)
+    logger.setLevel(logging.DEBUG)
+    try:
+        with override_settings(DEBUG=True):
+            yield log
+    finally:
+        logger.removeHandler(log)
+        logger.setLevel(level)
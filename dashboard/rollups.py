@@ -0,0 +1,298 @@
+"""
+Maintenance of the DailyHealthRollup fact table.
+
+The rollup holds one row per (day, location, disease, severity, risk level,
+outbreak status) with record counts and sums, so the dashboard aggregates
+over a few thousand rollup rows instead of every HealthRecord. Imports add
+their records as deltas; upserts and ORM saves subtract the records' stored
+values (``record_deltas`` with sign=-1) and add the new ones.
+``rebuild_rollups`` recomputes whole days from the base table and is what the
+refresh_rollups command runs.
+"""
+import itertools
+from datetime import datetime, time, timedelta
+
+import pandas as pd
+from django.db import connections, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import DailyHealthRollup, HealthRecord
+from .routers import read_database
+
+# Rollup grain, in the order of the unique constraint
+ROLLUP_KEYS = ['day', 'location_id', 'disease_id', 'disease_severity', 'infection_risk_level', 'outbreak_status']
+
+# Additive rollup columns
+ROLLUP_MEASURES = ['record_count', 'hospitalized_count', 'recovered_count', 'recovery_days_sum', 'close_contacts_sum']
+
+
+def _day_ranges(days):
+    """Collapse a set of days into (first, last) runs of consecutive days"""
+    runs = []
+    for day in sorted(set(days)):
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def _records_on(days, using):
+    """HealthRecords collected on any of `days`, filtered on ranges so the date index is used"""
+    condition = Q()
+    for first, last in _day_ranges(days):
+        condition |= Q(
+            date_of_data_collection__gte=timezone.make_aware(datetime.combine(first, time.min)),
+            date_of_data_collection__lt=timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min)),
+        )
+    return HealthRecord.objects.using(using).filter(condition)
+
+
+def rebuild_rollups(days=None, using='default', batch_size=5000):
+    """Recompute the rollup rows of `days` (every day when None) from HealthRecord
+
+    Returns the number of rollup rows written.
+    """
+    records = HealthRecord.objects.using(using)
+    rollups = DailyHealthRollup.objects.using(using)
+    if days is not None:
+        days = set(days)
+        if not days:
+            return 0
+        records = _records_on(days, using)
+        rollups = rollups.filter(day__in=days)
+
+    grouped = (
+        records.annotate(day=TruncDate('date_of_data_collection'))
+        .values('day', 'person__location_id', 'disease_id', 'disease_severity',
+                'infection_risk_level', 'outbreak_status')
+        .annotate(
+            record_count=Count('id'),
+            hospitalized_count=Count('id', filter=Q(hospitalization_required=True)),
+            recovered_count=Count('id', filter=Q(disease_severity='None', recovery_time_days__isnull=False)),
+            recovery_days_sum=Coalesce(Sum('recovery_time_days'), 0),
+            close_contacts_sum=Coalesce(Sum('close_contacts'), 0),
+        )
+        .order_by()
+    )
+
+    written = 0
+    with transaction.atomic(using=using):
+        rollups.delete()
+        rows = (
+            DailyHealthRollup(location_id=row.pop('person__location_id'), **row)
+            for row in grouped.iterator(chunk_size=batch_size)
+        )
+        while batch := list(itertools.islice(rows, batch_size)):
+            DailyHealthRollup.objects.using(using).bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def rollup_deltas(frame):
+    """Aggregate freshly inserted records to the rollup grain
+
+    `frame` has one row per record with the ROLLUP_KEYS columns plus
+    hospitalization_required, recovery_time_days and close_contacts. Returns
+    one row per rollup key with the ROLLUP_MEASURES to add.
+    """
+    frame = frame.assign(
+        record_count=1,
+        hospitalized_count=frame['hospitalization_required'].astype('int64'),
+        recovered_count=((frame['disease_severity'] == 'None') & frame['recovery_time_days'].notna()).astype('int64'),
+        recovery_days_sum=frame['recovery_time_days'].fillna(0).astype('int64'),
+        close_contacts_sum=frame['close_contacts'].fillna(0).astype('int64'),
+    )
+    deltas = frame.groupby(ROLLUP_KEYS, sort=False)[ROLLUP_MEASURES].sum().reset_index()
+    deltas['day'] = pd.to_datetime(deltas['day']).dt.date
+    return deltas
+
+
+def record_deltas(records, sign=1):
+    """rollup_deltas() of the stored HealthRecords in `records`, negated when `sign` is -1
+
+    Read with the same day truncation and person location as rebuild_rollups,
+    so subtracting a record's stored values removes exactly what it added.
+    """
+    rows = list(
+        records.annotate(day=TruncDate('date_of_data_collection'))
+        .values('day', 'person__location_id', 'disease_id', 'disease_severity', 'infection_risk_level',
+                'outbreak_status', 'hospitalization_required', 'recovery_time_days', 'close_contacts')
+        .order_by()
+    )
+    if not rows:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_MEASURES)
+    frame = pd.DataFrame(rows).rename(columns={'person__location_id': 'location_id'})
+    frame['recovery_time_days'] = frame['recovery_time_days'].astype('float64')
+    deltas = rollup_deltas(frame)
+    deltas[ROLLUP_MEASURES] *= sign
+    return deltas
+
+
+def apply_rollup_deltas(deltas, using='default'):
+    """Upsert rollup_deltas() frames into the rollup with increments
+
+    Several frames are summed first. The rows are written in key order, so
+    importers that apply all their deltas once per transaction lock rollup rows
+    in the same order and can't deadlock each other. Rows that subtractions
+    leave without records are deleted, as a rebuild would leave them out.
+    """
+    if isinstance(deltas, (list, tuple)):
+        deltas = [frame for frame in deltas if not frame.empty]
+        if not deltas:
+            return 0
+        deltas = pd.concat(deltas, ignore_index=True)
+    if deltas.empty:
+        return 0
+    deltas = deltas.groupby(ROLLUP_KEYS, sort=True)[ROLLUP_MEASURES].sum().reset_index()
+    # An update that leaves a record's rollup key unchanged cancels out
+    deltas = deltas[(deltas[ROLLUP_MEASURES] != 0).any(axis=1)]
+    if deltas.empty:
+        return 0
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(DailyHealthRollup._meta.db_table)
+    columns = ROLLUP_KEYS + ROLLUP_MEASURES
+    increments = ', '.join(f'{quote(column)} = {table}.{quote(column)} + EXCLUDED.{quote(column)}'
+                           for column in ROLLUP_MEASURES)
+    sql = (
+        f'INSERT INTO {table} ({", ".join(quote(column) for column in columns)}) '
+        f'VALUES ({", ".join(["%s"] * len(columns))}) '
+        f'ON CONFLICT ({", ".join(quote(column) for column in ROLLUP_KEYS)}) DO UPDATE SET {increments}'
+    )
+
+    rows = [
+        tuple(value.item() if hasattr(value, 'item') else value for value in row)
+        for row in deltas[columns].itertuples(index=False, name=None)
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    if (deltas['record_count'] < 0).any():
+        DailyHealthRollup.objects.using(using).filter(
+            day__in=set(deltas.loc[deltas['record_count'] < 0, 'day']), record_count__lte=0
+        ).delete()
+    return len(rows)
+
+
+def add_to_rollups(frame, using='default'):
+    """Add freshly inserted records (see rollup_deltas) to the rollup"""
+    if frame.empty:
+        return 0
+    return apply_rollup_deltas(rollup_deltas(frame), using)
+
+
+# Trend bucket -> (PostgreSQL interval, SQLite date modifier)
+TREND_BUCKETS = {
+    'day': ('1 day', '+1 day'),
+    'week': ('1 week', '+7 days'),
+    'month': ('1 month', '+1 month'),
+}
+
+SEVERITIES = ['None', 'Mild', 'Moderate', 'Severe']
+
+
+def bucket_start(day, bucket):
+    """First day of the day/week/month bucket holding `day` (weeks start on Monday)"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def severity_trends(start, end, bucket='day', using=None):
+    """Return [(bucket_start, total, count per SEVERITIES...)] for every bucket from start to end
+
+    One query: the calendar is generated in the database (generate_series on
+    PostgreSQL, a recursive CTE elsewhere) and left-joined to the rollup, and
+    the severities are pivoted with conditional sums, so empty buckets come
+    back as zeros.
+    """
+    interval, modifier = TREND_BUCKETS[bucket]
+    first = bucket_start(start, bucket)
+    connection = connections[read_database(DailyHealthRollup, using)]
+    quote = connection.ops.quote_name
+    table = quote(DailyHealthRollup._meta.db_table)
+
+    if connection.vendor == 'postgresql':
+        calendar = 'calendar AS (SELECT generate_series(%s::date, %s::date, %s::interval)::date AS bucket)'
+        calendar_params = [first.isoformat(), end.isoformat(), interval]
+        next_bucket, next_params = '(calendar.bucket + %s::interval)::date', [interval]
+    else:
+        calendar = ('RECURSIVE calendar(bucket) AS (SELECT date(%s) UNION ALL '
+                    'SELECT date(bucket, %s) FROM calendar WHERE date(bucket, %s) <= date(%s))')
+        calendar_params = [first.isoformat(), modifier, modifier, end.isoformat()]
+        next_bucket, next_params = 'date(calendar.bucket, %s)', [modifier]
+
+    pivot = ', '.join(
+        'COALESCE(SUM(CASE WHEN rollup.disease_severity = %s THEN rollup.record_count END), 0)'
+        for _ in SEVERITIES
+    )
+    sql = (
+        f'WITH {calendar} '
+        f'SELECT calendar.bucket, COALESCE(SUM(rollup.record_count), 0), {pivot} '
+        f'FROM calendar LEFT JOIN {table} rollup '
+        f'ON rollup.day >= calendar.bucket AND rollup.day < {next_bucket} AND rollup.day BETWEEN %s AND %s '
+        f'GROUP BY calendar.bucket ORDER BY calendar.bucket'
+    )
+    params = calendar_params + SEVERITIES + next_params + [start.isoformat(), end.isoformat()]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+# Dimensions rollup_overview breaks the record count down by
+OVERVIEW_DIMENSIONS = ['disease_severity', 'infection_risk_level', 'outbreak_status', 'disease_id']
+
+
+def rollup_overview(since, using=None):
+    """Dashboard totals and per-dimension record counts from one scan of the rollup
+
+    Returns {'totals': {'records', 'active', 'recovered', 'hospitalized'}} plus,
+    for each of OVERVIEW_DIMENSIONS, a {value: record count} dict. 'active'
+    counts the records on or after `since`.
+
+    PostgreSQL computes every breakdown in the database with GROUPING SETS.
+    Elsewhere the rollup is grouped once by all the dimensions together, a few
+    hundred rows at most, and the breakdowns are summed up from that.
+    """
+    connection = connections[read_database(DailyHealthRollup, using)]
+    quote = connection.ops.quote_name
+    table = quote(DailyHealthRollup._meta.db_table)
+    dimensions = ', '.join(quote(dimension) for dimension in OVERVIEW_DIMENSIONS)
+    measures = ('SUM(record_count), SUM(CASE WHEN day >= %s THEN record_count ELSE 0 END), '
+                'SUM(recovered_count), SUM(hospitalized_count)')
+
+    if connection.vendor == 'postgresql':
+        flags = ', '.join(f'GROUPING({quote(dimension)})' for dimension in OVERVIEW_DIMENSIONS)
+        sets = ', '.join(f'({quote(dimension)})' for dimension in OVERVIEW_DIMENSIONS)
+        sql = f'SELECT {flags}, {dimensions}, {measures} FROM {table} GROUP BY GROUPING SETS ((), {sets})'
+    else:
+        sql = f'SELECT {dimensions}, {measures} FROM {table} GROUP BY {dimensions}'
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [since.isoformat()])
+        rows = cursor.fetchall()
+
+    overview = {'totals': dict.fromkeys(['records', 'active', 'recovered', 'hospitalized'], 0)}
+    overview.update({dimension: {} for dimension in OVERVIEW_DIMENSIONS})
+    count = len(OVERVIEW_DIMENSIONS)
+    for row in rows:
+        if connection.vendor == 'postgresql':
+            flags, values, totals = row[:count], row[count:2 * count], [int(value or 0) for value in row[2 * count:]]
+            if all(flags):
+                overview['totals'] = dict(zip(overview['totals'], totals))
+            else:
+                position = flags.index(0)
+                overview[OVERVIEW_DIMENSIONS[position]][values[position]] = totals[0]
+        else:
+            values, totals = row[:count], [int(value or 0) for value in row[count:]]
+            for name, value in zip(overview['totals'], totals):
+                overview['totals'][name] += value
+            for dimension, value in zip(OVERVIEW_DIMENSIONS, values):
+                overview[dimension][value] = overview[dimension].get(value, 0) + totals[0]
+    return overview
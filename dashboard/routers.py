@@ -0,0 +1,70 @@
+"""
+Read-replica routing for the dashboard.
+
+When a ``replica`` database is configured, ReplicaReadMiddleware marks the
+read-only dashboard pages and API requests with ``read_from(REPLICA)``, and
+ReplicaRouter sends the dashboard models' reads in that scope to the replica.
+Everything else, i.e. imports and management commands, the admin, and any
+write, uses the primary (``default``).
+
+A replica lags the primary by a little. A request that writes reads the rest
+of its data from the primary, and the middleware keeps a client that just
+wrote on the primary for REPLICA_LAG_SECONDS, so users see their own changes.
+
+Raw SQL helpers don't pass through routers, so they take ``using=None`` and
+resolve it with ``read_database``, as the ORM does.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, router
+
+REPLICA = 'replica'
+
+# Alias the dashboard models are read from in the current request (None: the primary)
+_read_alias = ContextVar('dashboard_read_alias', default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def read_from(alias):
+    """Read the dashboard models from `alias` inside the block (None for the primary)"""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_database(model, using=None):
+    """`using`, or the alias the routers pick for reading `model`"""
+    return using or router.db_for_read(model)
+
+
+class ReplicaRouter:
+    """Send dashboard reads inside read_from(REPLICA) to the replica, and every write to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'dashboard':
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Later reads in this request must see the write, which the replica may not have yet
+        if _read_alias.get() is not None:
+            _read_alias.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema by replicating the primary
+        if db == REPLICA:
+            return False
+        return None
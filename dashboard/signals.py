@@ -0,0 +1,104 @@
+"""
+Keep DataVersion and DailyHealthRollup in step with the dashboard tables.
+
+Every ORM save or delete of a dashboard model bumps the version. Saves and
+deletes of a HealthRecord, and saves moving a Person to another location,
+also move the records' counts between rollup rows: the stored values are
+subtracted before the write and the new ones added after it.
+
+Bulk loaders write through COPY, bulk_create or TRUNCATE, which send no
+signals, so the import commands bump the version explicitly once per
+committed chunk, maintain the rollup themselves and silence the per-row
+handlers with ``suppress_version_bumps`` meanwhile. QuerySet.update() and raw
+SQL send no signals either; run refresh_rollups after those.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .models import (
+    Location, Demographics, Person, MedicalHistory,
+    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord, DataVersion
+)
+from .rollups import apply_rollup_deltas, record_deltas
+
+TRACKED_MODELS = (
+    Location, Demographics, Person, MedicalHistory,
+    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord,
+)
+
+_state = threading.local()
+
+
+@contextmanager
+def suppress_version_bumps():
+    """Skip the signal-driven version bumps and rollup updates in this thread; the caller does both itself"""
+    depth = getattr(_state, 'suppressed', 0)
+    _state.suppressed = depth + 1
+    try:
+        yield
+    finally:
+        _state.suppressed = depth
+
+
+def _suppressed():
+    return getattr(_state, 'suppressed', 0) > 0
+
+
+def bump_data_version(sender, using, **kwargs):
+    if not _suppressed():
+        DataVersion.bump(using)
+
+
+def record_rollup_before(sender, instance, using, raw=False, **kwargs):
+    """Remember what a stored HealthRecord adds to the rollup, before it is changed or deleted"""
+    if raw or _suppressed() or instance.pk is None:
+        return
+    instance._rollup_before = record_deltas(HealthRecord.objects.using(using).filter(pk=instance.pk), sign=-1)
+
+
+def record_saved(sender, instance, using, raw=False, **kwargs):
+    if raw or _suppressed():
+        return
+    before = instance.__dict__.pop('_rollup_before', None)
+    after = record_deltas(HealthRecord.objects.using(using).filter(pk=instance.pk))
+    apply_rollup_deltas([after] if before is None else [before, after], using)
+
+
+def record_deleted(sender, instance, using, **kwargs):
+    before = instance.__dict__.pop('_rollup_before', None)
+    if before is not None and not _suppressed():
+        apply_rollup_deltas(before, using)
+
+
+def person_rollup_before(sender, instance, using, raw=False, **kwargs):
+    """Remember what a person's records add to the rollup, if the save moves the person"""
+    if raw or _suppressed() or instance.pk is None:
+        return
+    stored_location = Person.objects.using(using).filter(pk=instance.pk).values_list('location_id', flat=True).first()
+    if stored_location is not None and stored_location != instance.location_id:
+        instance._rollup_before = record_deltas(
+            HealthRecord.objects.using(using).filter(person_id=instance.pk), sign=-1
+        )
+
+
+def person_saved(sender, instance, using, raw=False, **kwargs):
+    before = instance.__dict__.pop('_rollup_before', None)
+    if before is None or raw or _suppressed():
+        return
+    after = record_deltas(HealthRecord.objects.using(using).filter(person_id=instance.pk))
+    apply_rollup_deltas([before, after], using)
+
+
+# Connected per model: a sender-less receiver would disable fast deletes on every table
+for model in TRACKED_MODELS:
+    post_save.connect(bump_data_version, sender=model, dispatch_uid=f'data_version_save_{model.__name__}')
+    post_delete.connect(bump_data_version, sender=model, dispatch_uid=f'data_version_delete_{model.__name__}')
+
+pre_save.connect(record_rollup_before, sender=HealthRecord, dispatch_uid='rollup_record_pre_save')
+post_save.connect(record_saved, sender=HealthRecord, dispatch_uid='rollup_record_save')
+pre_delete.connect(record_rollup_before, sender=HealthRecord, dispatch_uid='rollup_record_pre_delete')
+post_delete.connect(record_deleted, sender=HealthRecord, dispatch_uid='rollup_record_delete')
+pre_save.connect(person_rollup_before, sender=Person, dispatch_uid='rollup_person_pre_save')
+post_save.connect(person_saved, sender=Person, dispatch_uid='rollup_person_save')
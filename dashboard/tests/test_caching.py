@@ -0,0 +1,40 @@
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from dashboard.caching import cached_section, section_key, track_previous_versions
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'caching-tests'}}
+
+
+@override_settings(CACHES=CACHES)
+class NewDataVersionTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def wait_for(self, key):
+        for _ in range(100):
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+            time.sleep(0.01)
+        self.fail(f'{key} was never filled')
+
+    def test_previous_version_is_served_while_the_new_one_builds(self):
+        self.assertEqual(cached_section('kpis', lambda: {'total': 1}, 1), {'total': 1})
+
+        with track_previous_versions() as previous:
+            self.assertEqual(cached_section('kpis', lambda: {'total': 2}, 2), {'total': 1})
+        self.assertEqual(previous, ['kpis'])
+
+        self.assertEqual(self.wait_for(section_key('kpis', 2))['payload'], {'total': 2})
+        with track_previous_versions() as previous:
+            self.assertEqual(cached_section('kpis', lambda: {'total': 3}, 2), {'total': 2})
+        self.assertEqual(previous, [])
+
+    def test_first_build_waits_for_the_section(self):
+        with track_previous_versions() as previous:
+            self.assertEqual(cached_section('kpis', lambda: {'total': 1}, 1), {'total': 1})
+        self.assertEqual(previous, [])
@@ -0,0 +1,132 @@
+from io import StringIO
+from urllib.parse import quote
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from dashboard import pagination
+from dashboard.models import HealthRecord, Person
+
+RECORD_ORDERING = ['-date_of_data_collection', '-id']
+
+
+def tamper(cursor):
+    """The cursor with its payload changed but its signature kept"""
+    payload, signature = cursor.rsplit(':', 1)
+    return f'{payload[:-1]}{"A" if payload[-1] != "A" else "B"}:{signature}'
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('import_sample_data', records=120, seed=1, stdout=StringIO())
+
+    def walk(self, ordering, size):
+        """Pages from the first to the last, following the next cursors"""
+        pages = [pagination.paginate(HealthRecord.objects.all(), ordering, None, size)]
+        while pages[-1].next_cursor:
+            pages.append(pagination.paginate(HealthRecord.objects.all(), ordering, pages[-1].next_cursor, size))
+        return pages
+
+    def test_next_cursors_cover_every_row_once(self):
+        expected = list(HealthRecord.objects.order_by(*RECORD_ORDERING).values_list('id', flat=True))
+        pages = self.walk(RECORD_ORDERING, 25)
+
+        self.assertEqual([row.id for page in pages for row in page], expected)
+        self.assertFalse(pages[0].has_previous)
+        self.assertFalse(pages[-1].has_next)
+
+    def test_previous_cursors_return_the_same_pages(self):
+        pages = self.walk(RECORD_ORDERING, 25)
+        for index in range(len(pages) - 1, 0, -1):
+            previous = pagination.paginate(HealthRecord.objects.all(), RECORD_ORDERING,
+                                           pages[index].previous_cursor, 25)
+            self.assertEqual([row.id for row in previous], [row.id for row in pages[index - 1]])
+        self.assertIsNone(previous.previous_cursor)
+
+    def test_tampered_cursor_is_rejected(self):
+        cursor = pagination.paginate(HealthRecord.objects.all(), RECORD_ORDERING, None, 25).next_cursor
+        for token in (tamper(cursor), cursor + 'x', 'not-a-cursor'):
+            with self.assertRaisesMessage(ValueError, 'Invalid page cursor'):
+                pagination.paginate(HealthRecord.objects.all(), RECORD_ORDERING, token, 25)
+
+    def test_cursor_of_another_ordering_is_rejected(self):
+        cursor = pagination.paginate(HealthRecord.objects.all(), ['id'], None, 25).next_cursor
+        with self.assertRaisesMessage(ValueError, 'Invalid page cursor'):
+            pagination.paginate(HealthRecord.objects.all(), RECORD_ORDERING, cursor, 25)
+
+
+class HealthRecordListPagesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('import_sample_data', records=120, seed=1, stdout=StringIO())
+
+    def get(self, **params):
+        return self.client.get(reverse('dashboard:health_record_queries'),
+                               {'query': 'record_list', 'page_size': 50, **params})
+
+    def test_cursor_round_trip(self):
+        expected = list(HealthRecord.objects.order_by(*RECORD_ORDERING).values_list('id', flat=True))
+        seen, pages = [], []
+        response = self.get()
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            pages.append([row['id'] for row in page])
+            seen += pages[-1]
+            if not page.next_cursor:
+                break
+            self.assertContains(response, f'cursor={quote(page.next_cursor)}')
+            response = self.get(cursor=page.next_cursor)
+        self.assertEqual(seen, expected)
+
+        response = self.get(cursor=page.previous_cursor)
+        self.assertEqual([row['id'] for row in response.context['page_obj']], pages[-2])
+
+    def test_tampered_cursor_falls_back_to_the_first_page(self):
+        first = self.get().context['page_obj']
+        response = self.get(cursor=tamper(first.next_cursor))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Invalid page cursor')
+        self.assertEqual([row['id'] for row in response.context['page_obj']], [row['id'] for row in first])
+
+    def test_without_a_query_redirects_to_the_dashboard_section(self):
+        response = self.client.get(reverse('dashboard:health_record_queries'))
+        self.assertRedirects(response, '/?section=health-records', fetch_redirect_response=False)
+
+
+class PeopleByDemographicsPagesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('import_sample_data', records=120, seed=1, stdout=StringIO())
+
+    def get(self, **params):
+        return self.client.get(reverse('dashboard:people_queries'),
+                               {'query': 'people_by_demographics', 'page_size': 20, **params})
+
+    def test_cursor_round_trip(self):
+        expected = list(Person.objects.order_by('id').values_list('id', flat=True))
+        seen = []
+        response = self.get()
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            seen += [row['id'] for row in page]
+            if not page.next_cursor:
+                break
+            self.assertContains(response, f'cursor={quote(page.next_cursor)}')
+            response = self.get(cursor=page.next_cursor)
+        self.assertEqual(seen, expected)
+
+    def test_tampered_cursor_falls_back_to_the_first_page(self):
+        first = self.get().context['page_obj']
+        response = self.get(cursor=tamper(first.next_cursor))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Invalid page cursor')
+        self.assertEqual([row['id'] for row in response.context['page_obj']], [row['id'] for row in first])
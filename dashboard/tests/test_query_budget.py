@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from dashboard.caching import section_key
+from dashboard.management.commands.check_query_budget import COLD_QUERY_BUDGET, WARM_QUERY_BUDGET
+from dashboard.models import DataVersion
+from dashboard.querycount import capture_all_queries
+from dashboard.views import ConsolidatedDashboardView, consolidated_dashboard
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budget-tests'}}
+# Resetting the sample data deletes the forecast artifacts once it commits
+FORECAST_MODEL_DIR = os.path.join(tempfile.gettempdir(), 'medidash-test-forecasts')
+
+
+# Transactional: the async view reads on executor threads, whose connections
+# can't see data inside a test transaction
+@override_settings(CACHES=CACHES, FORECAST_MODEL_DIR=FORECAST_MODEL_DIR)
+class ConsolidatedDashboardQueryBudgetTests(TransactionTestCase):
+
+    def setUp(self):
+        call_command('import_sample_data', records=300, seed=1, stdout=StringIO())
+        cache.clear()
+
+    def render_sync(self):
+        view = ConsolidatedDashboardView()
+        view.setup(RequestFactory().get('/dashboard/'))
+        response = view.render_to_response(view.get_context_data())
+        response.render()
+        return response
+
+    def render_async(self):
+        response = async_to_sync(consolidated_dashboard)(RequestFactory().get('/dashboard/'))
+        response.render()
+        return response
+
+    def test_sequential_sections_cold_and_warm(self):
+        with self.assertNumQueries(COLD_QUERY_BUDGET):
+            self.render_sync()
+        with self.assertNumQueries(WARM_QUERY_BUDGET):
+            self.render_sync()
+
+    def test_async_view_cold_and_warm(self):
+        with capture_all_queries() as cold:
+            response = self.render_async()
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(cold), COLD_QUERY_BUDGET, '\n'.join(cold.queries))
+
+        with capture_all_queries() as warm:
+            self.render_async()
+        self.assertLessEqual(len(warm), WARM_QUERY_BUDGET, '\n'.join(warm.queries))
+
+    def test_async_view_renders_the_same_page(self):
+        expected = self.render_sync().content
+        cache.clear()
+        self.assertEqual(self.render_async().content, expected)
+
+    def test_unchanged_data_is_not_modified(self):
+        response = self.render_async()
+        request = RequestFactory().get('/dashboard/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(async_to_sync(consolidated_dashboard)(request).status_code, 304)
+
+    def test_sections_of_the_previous_version_are_not_validated(self):
+        self.render_async()
+        DataVersion.bump()
+
+        response = self.render_async()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+        # The new version is built in the background; the next response carries its ETag
+        version = DataVersion.current()[0]
+        for _ in range(200):
+            if all(cache.get(section_key(name, version)) for name in ConsolidatedDashboardView().get_sections()):
+                break
+            time.sleep(0.05)
+        self.assertTrue(self.render_async().has_header('ETag'))
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from dashboard.models import DailyHealthRollup, HealthRecord, Location, Person
+from dashboard.rollups import ROLLUP_KEYS, ROLLUP_MEASURES, rebuild_rollups
+
+
+def rollup_rows():
+    return sorted(DailyHealthRollup.objects.values_list(*ROLLUP_KEYS, *ROLLUP_MEASURES))
+
+
+class RollupSignalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('import_sample_data', records=120, seed=1, stdout=StringIO())
+
+    def assertRollupMatchesRecords(self):
+        maintained = rollup_rows()
+        rebuild_rollups()
+        self.assertEqual(maintained, rollup_rows())
+        self.assertEqual(DailyHealthRollup.objects.aggregate(total=Sum('record_count'))['total'] or 0,
+                         HealthRecord.objects.count())
+
+    def test_deleted_records_leave_the_rollup(self):
+        HealthRecord.objects.filter(pk__in=HealthRecord.objects.values('pk')[:10]).delete()
+        self.assertRollupMatchesRecords()
+
+    def test_edited_record_moves_between_rollup_rows(self):
+        record = HealthRecord.objects.exclude(disease_severity='Severe').first()
+        record.disease_severity = 'Severe'
+        record.hospitalization_required = not record.hospitalization_required
+        record.date_of_data_collection -= timedelta(days=40)
+        record.save()
+        self.assertRollupMatchesRecords()
+
+    def test_created_record_is_added(self):
+        record = HealthRecord.objects.first()
+        record.pk = None
+        record.source_record_id = None
+        record.save()
+        self.assertRollupMatchesRecords()
+
+    def test_person_moving_location_moves_their_records(self):
+        person = Person.objects.filter(healthrecord__isnull=False).first()
+        person.location = Location.objects.exclude(pk=person.location_id).first()
+        person.save()
+        self.assertRollupMatchesRecords()
+
+    def test_deleting_a_person_removes_their_records(self):
+        Person.objects.filter(healthrecord__isnull=False).first().delete()
+        self.assertRollupMatchesRecords()
@@ -17,4 +17,6 @@ urlpatterns = [
     # API endpoints
     path('api/disease-trends/', views.api_disease_trends, name='api_disease_trends'),
     path('api/location-risk/', views.api_location_risk_data, name='api_location_risk'),
+    path('api/forecast/', views.api_forecast, name='api_forecast'),
+    path('api/export/<slug:dataset>/', views.api_export, name='api_export'),
 ]
@@ -1,21 +1,155 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.views.generic import TemplateView, DetailView, ListView
-from django.db.models import Count, Avg, Sum, Q, F, CharField, Case, When, Value, IntegerField
-from django.db import connection
+from django.db.models import Count, Avg, Sum, F, CharField, Case, When, Value, IntegerField
+from django.db import close_old_connections, connection
 from django.http import JsonResponse
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
 from .models import (
     Location, Demographics, Person, MedicalHistory,
-    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord
+    EnvironmentalFactor, Disease, HealthcareResource, HealthRecord, DailyHealthRollup, DataVersion,
+    SeriesForecast
 )
+from .caching import cached_section, track_previous_versions
+from .forecasting import daily_series, load_forecast
+from . import exports, locations, pagination
+from .locations import location_summary
+from .rollups import SEVERITIES, TREND_BUCKETS, rollup_overview, severity_trends
 
 import pandas as pd
-import numpy as np
+import asyncio
+import itertools
 import json
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import wraps
+
+def _data_version(request):
+    """(version, updated_at) of the dashboard data, read once per request from the primary"""
+    if not hasattr(request, '_data_version'):
+        request._data_version = DataVersion.current()
+    return request._data_version
+
+# Validators combine the data version with today's date: pages and APIs default to
+# windows relative to today, which change at midnight even when the data doesn't
+
+def data_etag(request, *args, **kwargs):
+    return f'data-{_data_version(request)[0]}-{timezone.localdate():%Y%m%d}'
+
+def data_last_modified(request, *args, **kwargs):
+    today = timezone.make_aware(datetime.combine(timezone.localdate(), datetime.min.time()))
+    updated_at = _data_version(request)[1]
+    return max(updated_at, today) if updated_at else today
+
+def _without_validators(response, previous):
+    """Drop the validators of a response holding sections of an older data version
+
+    Its content doesn't match the current version's ETag yet, so the client
+    must not revalidate it with that ETag later.
+    """
+    if previous:
+        del response['ETag']
+        del response['Last-Modified']
+    return response
+
+def data_conditional(view):
+    """ETag/Last-Modified from the data version; unchanged data gets a 304 before the view runs
+
+    no-cache makes browsers revalidate every time instead of guessing a freshness lifetime.
+    """
+    conditional = condition(etag_func=data_etag, last_modified_func=data_last_modified)(view)
+    conditional = cache_control(no_cache=True)(conditional)
+    if not asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        def sync_view(request, *args, **kwargs):
+            with track_previous_versions() as previous:
+                response = conditional(request, *args, **kwargs)
+            return _without_validators(response, previous)
+        return sync_view
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        # condition() calls data_etag synchronously; read the version first, outside the event loop
+        await sync_to_async(_data_version)(request)
+        with track_previous_versions() as previous:
+            response = await conditional(request, *args, **kwargs)
+        return _without_validators(response, previous)
+    return async_view
+
+def _view_data_version(view):
+    """Data version for a view, read once per request; views built without one (the cache refresher) read it directly"""
+    request = getattr(view, 'request', None)
+    return _data_version(request)[0] if request is not None else DataVersion.current()[0]
+
+def total_record_count():
+    """Number of health records, summed from the daily rollup"""
+    return DailyHealthRollup.objects.aggregate(total=Coalesce(Sum('record_count'), 0))['total']
+
+AGE_GROUPS = ['Under 18', '18-29', '30-44', '45-59', '60-74', '75+']
+
+# Rows per page of the filtered people query
+PEOPLE_PAGE_SIZE = 50
+
+def age_group_case(field='age'):
+    """CASE expression putting the age in `field` into one of AGE_GROUPS"""
+    return Case(
+        When(**{f'{field}__lt': 18}, then=Value('Under 18')),
+        When(**{f'{field}__lt': 30}, then=Value('18-29')),
+        When(**{f'{field}__lt': 45}, then=Value('30-44')),
+        When(**{f'{field}__lt': 60}, then=Value('45-59')),
+        When(**{f'{field}__lt': 75}, then=Value('60-74')),
+        default=Value('75+'),
+        output_field=CharField(),
+    )
+
+def filter_people(params):
+    """Person queryset for the people_by_demographics filters in `params` (age_min, age_max, gender)
+
+    Raises ValueError naming the parameter when an age is not a whole number.
+    """
+    query = Person.objects.all()
+
+    if params.get('age_min') and params.get('age_max'):
+        ages = {}
+        for name in ('age_min', 'age_max'):
+            try:
+                ages[name] = int(params[name])
+            except ValueError:
+                raise ValueError(f'{name} must be a whole number') from None
+        query = query.filter(demographics__age__gte=ages['age_min'], demographics__age__lte=ages['age_max'])
+
+    if params.get('gender'):
+        query = query.filter(demographics__gender=params['gender'])
+
+    return query
+
+def people_rows(people):
+    """One flat dict per person with their demographics and location, for tables and exports"""
+    return people.values(
+        'id',
+        'vaccination_status',
+        age=F('demographics__age'),
+        gender=F('demographics__gender'),
+        socioeconomic_status=F('demographics__socioeconomic_status'),
+        location_name=F('location__name'),
+    )
+
+def people_by_age_group(people):
+    """[{'age_group', 'count'}] for a Person queryset, counted in one GROUP BY, in AGE_GROUPS order"""
+    counts = dict(
+        people.filter(demographics__age__isnull=False)
+        .annotate(age_group=age_group_case('demographics__age'))
+        .values('age_group').annotate(count=Count('id')).order_by()
+        .values_list('age_group', 'count')
+    )
+    return [{'age_group': group, 'count': counts[group]} for group in AGE_GROUPS if group in counts]
 
 class DashboardView(TemplateView):
     template_name = 'dashboard/index.html'
@@ -24,7 +158,7 @@ class DashboardView(TemplateView):
         context = super().get_context_data(**kwargs)
 
         # Basic statistics for the dashboard summary
-        context['total_records'] = HealthRecord.objects.count()
+        context['total_records'] = total_record_count()
         context['distinct_people'] = Person.objects.count()
         context['distinct_locations'] = Location.objects.count()
 
@@ -34,27 +168,27 @@ class DashboardView(TemplateView):
         ).order_by('-date_of_data_collection')[:10]
 
         # Get disease severity distribution
-        severity_counts = HealthRecord.objects.values(
+        severity_counts = DailyHealthRollup.objects.values(
             'disease_severity'
-        ).annotate(count=Count('id')).order_by('disease_severity')
+        ).annotate(count=Sum('record_count')).order_by('disease_severity')
         context['severity_data'] = {
             'labels': [item['disease_severity'] for item in severity_counts],
             'data': [item['count'] for item in severity_counts]
         }
 
         # Get risk level distribution
-        risk_counts = HealthRecord.objects.values(
+        risk_counts = DailyHealthRollup.objects.values(
             'infection_risk_level'
-        ).annotate(count=Count('id')).order_by('infection_risk_level')
+        ).annotate(count=Sum('record_count')).order_by('infection_risk_level')
         context['risk_data'] = {
             'labels': [item['infection_risk_level'] for item in risk_counts],
             'data': [item['count'] for item in risk_counts]
         }
 
         # Get outbreak status distribution
-        outbreak_counts = HealthRecord.objects.values(
+        outbreak_counts = DailyHealthRollup.objects.values(
             'outbreak_status'
-        ).annotate(count=Count('id')).order_by('outbreak_status')
+        ).annotate(count=Sum('record_count')).order_by('outbreak_status')
         context['outbreak_data'] = {
             'labels': [item['outbreak_status'] for item in outbreak_counts],
             'data': [item['count'] for item in outbreak_counts]
@@ -68,233 +202,81 @@ class DiseasePredictionView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Example of a simple disease prediction model based on available data
-        # In a real application, you'd have more sophisticated models
-
-        # Fetch relevant data for prediction
-        latest_records = HealthRecord.objects.select_related(
-            'person', 'environmental_factor', 'healthcare_resource'
-        ).order_by('-date_of_data_collection')[:1000]
+        # History comes from the daily rollup; the forecast was fitted offline by
+        # the train_forecast command and is only looked up here
+        dates, counts = daily_series()
 
-        if latest_records:
-            # Get time series for predictions
-            dates = HealthRecord.objects.values('date_of_data_collection').annotate(
-                count=Count('id')
-            ).order_by('date_of_data_collection')
-
-            # Convert to lists for plotting
-            date_list = [item['date_of_data_collection'].strftime('%Y-%m-%d') for item in dates]
-            count_list = [item['count'] for item in dates]
+        if dates:
+            forecast = load_forecast(_view_data_version(self))
 
             # Store in context for visualization
             context['time_series'] = {
-                'dates': date_list,
-                'counts': count_list,
-                'prediction_dates': self._get_future_dates(date_list, 30),
-                'prediction_counts': self._predict_future_counts(date_list, count_list, 30)
+                'dates': [date.strftime('%Y-%m-%d') for date in dates],
+                'counts': counts,
+                'prediction_dates': [date.strftime('%Y-%m-%d') for date in forecast['prediction_dates']] if forecast else [],
+                'prediction_counts': forecast['prediction_counts'] if forecast else [],
+                'prediction_lower': forecast.get('prediction_lower', []) if forecast else [],
+                'prediction_upper': forecast.get('prediction_upper', []) if forecast else []
             }
 
-
         return context
 
-    def _get_future_dates(self, date_strings, days_to_predict):
-        """Generate future dates for prediction"""
-        if not date_strings:
-            return []
-
-        last_date = datetime.strptime(date_strings[-1], '%Y-%m-%d')
-        future_dates = [
-            (last_date + timedelta(days=i+1)).strftime('%Y-%m-%d') 
-            for i in range(days_to_predict)
-        ]
-        return future_dates
-
-    def _predict_future_counts(self, date_strings, counts, days_to_predict):
-        """Simple prediction model for future disease counts"""
-        if not date_strings or len(date_strings) < 2:
-            return [counts[-1]] * days_to_predict if counts else [0] * days_to_predict
-
-        # Convert dates to numerical values for regression
-        date_nums = list(range(len(date_strings)))
-
-        # Build a simple model (Random Forest Regressor works well for time series)
-        X = np.array(date_nums).reshape(-1, 1)
-        y = np.array(counts)
-
-        model = RandomForestRegressor(n_estimators=100, random_state=42)
-        model.fit(X, y)
-
-        # Predict future values
-        future_X = np.array(range(len(date_strings), len(date_strings) + days_to_predict)).reshape(-1, 1)
-        predictions = model.predict(future_X)
-
-        # Ensure predictions are positive
-        return [max(0, int(p)) for p in predictions]
-
 class LocationAnalysisView(TemplateView):
     template_name = 'dashboard/location_analysis.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Get all locations
-        locations = Location.objects.all()
-        context['locations'] = locations
-
-        # Prepare data structures for storing location statistics
-        location_data = []
-        location_names = []
-        env_factors_by_location = {
-            'aqi': [],
-            'temperature': [],
-            'humidity': []
-        }
-        resource_data_by_location = {
-            'hospital_capacity': [],
-            'personnel': [],
-            'resource_util': []
-        }
+        # One query for every location, shared through the section cache until the data changes
+        summary = cached_section('locations', location_summary, _view_data_version(self))
+        context['locations'] = summary
 
-        # Generate sample location data for demo purposes with global coverage
-        # In a real app, this would be fetched from the database
-        sample_location_data = [
-            # North America
-            {"name": "New York", "type": "Urban", "records": 3245, "high_risk": 35, "env_quality": "Moderate", "lat": 40.7128, "lon": -74.0060},
-            {"name": "Los Angeles", "type": "Urban", "records": 2890, "high_risk": 28, "env_quality": "Poor", "lat": 34.0522, "lon": -118.2437},
-            {"name": "Chicago", "type": "Urban", "records": 2178, "high_risk": 18, "env_quality": "Good", "lat": 41.8781, "lon": -87.6298},
-            {"name": "Toronto", "type": "Urban", "records": 1872, "high_risk": 12, "env_quality": "Good", "lat": 43.6532, "lon": -79.3832},
-            {"name": "Mexico City", "type": "Urban", "records": 4125, "high_risk": 42, "env_quality": "Poor", "lat": 19.4326, "lon": -99.1332},
-
-            # Europe
-            {"name": "London", "type": "Urban", "records": 2950, "high_risk": 22, "env_quality": "Moderate", "lat": 51.5074, "lon": -0.1278},
-            {"name": "Paris", "type": "Urban", "records": 2780, "high_risk": 25, "env_quality": "Moderate", "lat": 48.8566, "lon": 2.3522},
-            {"name": "Berlin", "type": "Urban", "records": 2150, "high_risk": 15, "env_quality": "Good", "lat": 52.5200, "lon": 13.4050},
-            {"name": "Rome", "type": "Urban", "records": 1950, "high_risk": 20, "env_quality": "Moderate", "lat": 41.9028, "lon": 12.4964},
-            {"name": "Madrid", "type": "Urban", "records": 1850, "high_risk": 18, "env_quality": "Moderate", "lat": 40.4168, "lon": -3.7038},
-
-            # Asia
-            {"name": "Tokyo", "type": "Urban", "records": 4500, "high_risk": 30, "env_quality": "Moderate", "lat": 35.6762, "lon": 139.6503},
-            {"name": "Beijing", "type": "Urban", "records": 4200, "high_risk": 45, "env_quality": "Poor", "lat": 39.9042, "lon": 116.4074},
-            {"name": "Mumbai", "type": "Urban", "records": 5100, "high_risk": 48, "env_quality": "Poor", "lat": 19.0760, "lon": 72.8777},
-            {"name": "Seoul", "type": "Urban", "records": 3200, "high_risk": 25, "env_quality": "Moderate", "lat": 37.5665, "lon": 126.9780},
-            {"name": "Singapore", "type": "Urban", "records": 1800, "high_risk": 10, "env_quality": "Good", "lat": 1.3521, "lon": 103.8198},
-
-            # Africa
-            {"name": "Cairo", "type": "Urban", "records": 3800, "high_risk": 40, "env_quality": "Poor", "lat": 30.0444, "lon": 31.2357},
-            {"name": "Lagos", "type": "Urban", "records": 4100, "high_risk": 45, "env_quality": "Poor", "lat": 6.5244, "lon": 3.3792},
-            {"name": "Johannesburg", "type": "Urban", "records": 2600, "high_risk": 30, "env_quality": "Moderate", "lat": -26.2041, "lon": 28.0473},
-            {"name": "Nairobi", "type": "Urban", "records": 2200, "high_risk": 28, "env_quality": "Moderate", "lat": -1.2921, "lon": 36.8219},
-            {"name": "Casablanca", "type": "Urban", "records": 1900, "high_risk": 22, "env_quality": "Moderate", "lat": 33.5731, "lon": -7.5898},
-
-            # South America
-            {"name": "São Paulo", "type": "Urban", "records": 4300, "high_risk": 38, "env_quality": "Poor", "lat": -23.5505, "lon": -46.6333},
-            {"name": "Buenos Aires", "type": "Urban", "records": 3100, "high_risk": 25, "env_quality": "Moderate", "lat": -34.6037, "lon": -58.3816},
-            {"name": "Lima", "type": "Urban", "records": 2800, "high_risk": 30, "env_quality": "Poor", "lat": -12.0464, "lon": -77.0428},
-            {"name": "Bogotá", "type": "Urban", "records": 2500, "high_risk": 28, "env_quality": "Moderate", "lat": 4.7110, "lon": -74.0721},
-            {"name": "Santiago", "type": "Urban", "records": 2200, "high_risk": 20, "env_quality": "Moderate", "lat": -33.4489, "lon": -70.6693},
-
-            # Oceania
-            {"name": "Sydney", "type": "Urban", "records": 1950, "high_risk": 15, "env_quality": "Good", "lat": -33.8688, "lon": 151.2093},
-            {"name": "Melbourne", "type": "Urban", "records": 1800, "high_risk": 12, "env_quality": "Good", "lat": -37.8136, "lon": 144.9631},
-            {"name": "Auckland", "type": "Urban", "records": 1200, "high_risk": 8, "env_quality": "Good", "lat": -36.8509, "lon": 174.7645},
-            {"name": "Brisbane", "type": "Urban", "records": 1400, "high_risk": 10, "env_quality": "Good", "lat": -27.4698, "lon": 153.0251},
-            {"name": "Perth", "type": "Urban", "records": 1100, "high_risk": 8, "env_quality": "Good", "lat": -31.9505, "lon": 115.8605}
-        ]
-
-        # Location coordinates for map (demonstration data)
-        location_coords = []
-
-        # Process location data
-        for location_info in sample_location_data:
-            name = location_info["name"]
-            location_type = location_info["type"]
-            record_count = location_info["records"]
-            high_risk_percentage = location_info["high_risk"]
-            env_quality = location_info["env_quality"]
-
-            # Calculate other metrics for demonstration
-            medium_risk_count = int(record_count * 0.25)
-            low_risk_count = record_count - high_risk_percentage - medium_risk_count
-            severe_cases = int(high_risk_percentage * 0.7)
-
-            # Add location name for charts
-            location_names.append(name)
-
-            # Add environmental factors data (demo values)
-            if env_quality == "Good":
-                aqi = 60
-            elif env_quality == "Moderate":
-                aqi = 120
-            else:
-                aqi = 180
-
-            env_factors_by_location['aqi'].append(aqi)
-            env_factors_by_location['temperature'].append(25 + (5 * (location_type == "Urban")))
-            env_factors_by_location['humidity'].append(50 + (10 * (location_type == "Rural")))
-
-            # Add healthcare resource data (demo values)
-            resource_data_by_location['hospital_capacity'].append(85 if location_type == "Urban" else (65 if location_type == "Suburban" else 40))
-            resource_data_by_location['personnel'].append(90 if location_type == "Urban" else (70 if location_type == "Suburban" else 45))
-            resource_data_by_location['resource_util'].append(75 if location_type == "Urban" else (60 if location_type == "Suburban" else 50))
-
-            # Assign risk level
-            risk_level = "high" if high_risk_percentage > 30 else "medium" if high_risk_percentage > 15 else "low"
-
-            # Use the actual coordinates from the location data
-            location_coords.append({
-                'name': name,
-                'lat': location_info.get('lat', 0),  # Use provided lat or default to 0
-                'lon': location_info.get('lon', 0),  # Use provided lon or default to 0
-                'risk_level': risk_level,
-                'case_count': record_count
-            })
-
-            # Add to location data for table display
-            location_data.append({
-                'name': name,
-                'type': location_type,
-                'record_count': record_count,
-                'high_risk_percentage': high_risk_percentage,
-                'severe_cases': severe_cases,
-                'env_quality': env_quality,
-                # Risk levels for context
-                'high_risk': high_risk_percentage,
-                'medium_risk': medium_risk_count,
-                'low_risk': low_risk_count
-            })
+        location_names = [location['name'] for location in summary]
 
         # Add location data to context
-        context['location_data'] = location_data
+        context['location_data'] = [
+            {
+                'name': location['name'],
+                'type': location['type'],
+                'record_count': location['record_count'],
+                'high_risk_percentage': location['high_risk_percentage'],
+                'severe_cases': location['severe_cases'],
+                'env_quality': location['env_quality'],
+                # Risk levels for context
+                'high_risk': location['high_risk'],
+                'medium_risk': location['medium_risk'],
+                'low_risk': location['low_risk']
+            }
+            for location in summary
+        ]
 
-        # Add data for environmental factors chart
-        context['environment_data'] = {
+        # Add data for environmental factors chart (latest reading per location)
+        context['environment_data'] = json.dumps({
             'labels': location_names,
-            'aqi': env_factors_by_location['aqi'],
-            'temperature': env_factors_by_location['temperature'],
-            'humidity': env_factors_by_location['humidity']
-        }
+            'aqi': [location['aqi'] for location in summary],
+            'temperature': [location['temperature'] for location in summary],
+            'humidity': [location['humidity'] for location in summary]
+        })
 
-        # Add data for healthcare resource chart
-        context['resource_data'] = {
+        # Add data for healthcare resource chart (latest snapshot per location)
+        context['resource_data'] = json.dumps({
             'labels': location_names,
-            'hospital_capacity': resource_data_by_location['hospital_capacity'],
-            'personnel': resource_data_by_location['personnel'],
-            'resource_util': resource_data_by_location['resource_util']
-        }
+            'hospital_capacity': [location['hospital_beds'] for location in summary],
+            'personnel': [location['available_doctors'] for location in summary],
+            'resource_util': [location['occupancy_rate'] for location in summary]
+        })
 
-        # Add map data
-        context['map_data'] = json.dumps(location_coords)
+        # The map loads its markers per viewport from api_location_risk_data
 
         # Add risk summary for charts
-        risk_summary = {}
-        for loc in location_data:
-            risk_summary[loc['name']] = {
-                'High Risk': loc['high_risk'],
-                'Medium Risk': loc['medium_risk'],
-                'Low Risk': loc['low_risk']
+        context['risk_summary'] = json.dumps({
+            location['name']: {
+                'High Risk': location['high_risk'],
+                'Medium Risk': location['medium_risk'],
+                'Low Risk': location['low_risk']
             }
-
-        context['risk_summary'] = risk_summary
+            for location in summary
+        })
 
         return context
 
@@ -307,162 +289,175 @@ class RiskComputationView(TemplateView):
         # So we don't need to add any special context data here
         return context
 
+@data_conditional
 def index(request):
     """Dashboard index view"""
     view = DashboardView.as_view()
     return view(request)
 
+@data_conditional
 def disease_prediction(request):
     """Disease prediction view"""
     view = DiseasePredictionView.as_view()
     return view(request)
 
+@data_conditional
 def location_analysis(request):
     """Location analysis view"""
     view = LocationAnalysisView.as_view()
     return view(request)
 
+@data_conditional
 def risk_computation(request):
     """Risk computation methodology view"""
     view = RiskComputationView.as_view()
     return view(request)
 
-from django.core.cache import cache
-from django.views.decorators.http import condition
+# Threads the async consolidated dashboard builds its sections on, shared by all requests
+SECTION_EXECUTOR = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'DASHBOARD_SECTION_WORKERS', 8),
+    thread_name_prefix='dashboard-section'
+)
 
 class ConsolidatedDashboardView(TemplateView):
     template_name = 'dashboard/consolidated_dashboard.html'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-
-        # Try to get data from cache first
-        cached_data = cache.get('consolidated_dashboard_data')
-        if cached_data:
-            context.update(cached_data)
-            return context
-
-        # If not in cache, generate the data
-        # Combine multiple database queries into fewer queries
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._shared_values = {}
+        self._shared_locks = {}
 
-        # Basic statistics for the dashboard summary
-        context['total_records'] = HealthRecord.objects.count()
-        context['distinct_people'] = Person.objects.count()
-        context['distinct_locations'] = Location.objects.count()
+    async def get(self, request, *args, **kwargs):
+        """Build the sections concurrently, so a cold page takes about as long as its slowest section"""
+        context = super().get_context_data(**kwargs)
+        version = (await sync_to_async(_data_version)(request))[0]
 
-        # Get recent health records for the main dashboard table
-        context['recent_records'] = HealthRecord.objects.select_related(
-            'person', 'disease', 'environmental_factor'
-        ).order_by('-date_of_data_collection')[:10]
+        build_section = sync_to_async(self._build_section, thread_sensitive=False, executor=SECTION_EXECUTOR)
+        sections = await asyncio.gather(*(
+            build_section(name, build, version) for name, build in self.get_sections().items()
+        ))
+        for section in sections:
+            context.update(section)
 
-        # Get all distribution data in a single query with conditional aggregation
+        return self.render_to_response(context)
 
-        # Calculate KPI metrics and distribution data in fewer queries
-        thirty_days_ago = timezone.now() - timedelta(days=30)
+    def get_context_data(self, **kwargs):
+        """The same context as get(), with the sections built one after another"""
+        context = super().get_context_data(**kwargs)
 
-        # Use annotate and aggregate to get counts in a single query
+        # Each section is cached on its own, as plain data, in the shared cache.
+        # Keys carry the data version, so a data change invalidates every section
+        # and a TTL expiry rebuilds only the section that went stale.
+        version = _data_version(self.request)[0]
+        for name, build in self.get_sections().items():
+            context.update(cached_section(name, build, version))
 
-        kpi_data = HealthRecord.objects.aggregate(
-            active_cases=Count('id', filter=Q(date_of_data_collection__gte=thirty_days_ago)),
-            recovered_cases=Count('id', filter=Q(disease_severity='None', recovery_time_days__isnull=False)),
-            critical_cases=Count('id', filter=Q(disease_severity='Severe'))
-        )
+        return context
 
-        context['active_cases'] = kpi_data['active_cases']
-        context['recovered_cases'] = kpi_data['recovered_cases']
-        context['critical_cases'] = kpi_data['critical_cases']
+    def _build_section(self, name, build, version):
+        """Cached section payload, for a section executor thread"""
+        try:
+            return cached_section(name, build, version)
+        finally:
+            # Executor threads outlive the request; apply CONN_MAX_AGE to their connections
+            close_old_connections()
 
-        # Get distribution data
-        severity_counts = HealthRecord.objects.values(
-            'disease_severity'
-        ).annotate(count=Count('id')).order_by('disease_severity')
-        context['severity_data'] = {
-            'labels': [item['disease_severity'] for item in severity_counts],
-            'data': [item['count'] for item in severity_counts]
+    def get_sections(self):
+        """Section name -> function building that section's context entries"""
+        return {
+            'kpis': self._get_kpi_data,
+            'distributions': self._get_distribution_data,
+            'location': self._get_location_data,
+            'prediction': self._get_prediction_data,
+            'queries': self._get_query_panel_data,
         }
 
-        risk_counts = HealthRecord.objects.values(
-            'infection_risk_level'
-        ).annotate(count=Count('id')).order_by('infection_risk_level')
-        context['risk_data'] = {
-            'labels': [item['infection_risk_level'] for item in risk_counts],
-            'data': [item['count'] for item in risk_counts]
-        }
+    # Shared by several sections, so a cold page load computes each of them once
 
-        outbreak_counts = HealthRecord.objects.values(
-            'outbreak_status'
-        ).annotate(count=Count('id')).order_by('outbreak_status')
-        context['outbreak_data'] = {
-            'labels': [item['outbreak_status'] for item in outbreak_counts],
-            'data': [item['count'] for item in outbreak_counts]
-        }
+    def _shared(self, name, build):
+        """Value several sections need, built once per view even when the sections run concurrently"""
+        with self._shared_locks.setdefault(name, threading.Lock()):
+            if name not in self._shared_values:
+                self._shared_values[name] = build()
+        return self._shared_values[name]
 
-        # Get location data (use the existing implementation for now)
-        location_view = LocationAnalysisView()
-        location_context = location_view.get_context_data()
-        context.update({
-            'location_data': location_context.get('location_data', []),
-            'map_data': location_context.get('map_data', '[]'),
-            'environment_data': location_context.get('environment_data', {}),
-            'resource_data': location_context.get('resource_data', {}),
-            'risk_summary': location_context.get('risk_summary', {}),
-        })
+    @property
+    def overview(self):
+        """KPI totals and every rollup distribution, from a single scan (rollups.rollup_overview)"""
+        return self._shared('overview', lambda: rollup_overview(timezone.localdate() - timedelta(days=30)))
 
-        # Get prediction data (use the existing implementation for now)
-        prediction_view = DiseasePredictionView()
-        prediction_context = prediction_view.get_context_data()
-        context.update({
-            'time_series': prediction_context.get('time_series', {}),
-        })
+    @property
+    def disease_names(self):
+        return self._shared('disease_names', lambda: dict(Disease.objects.values_list('id', 'name')))
 
-        # Optimize query views by loading only necessary data
-        # Instead of instantiating the full views, we'll execute optimized queries
+    @property
+    def location_list(self):
+        return self._shared('location_list', lambda: list(Location.objects.values('id', 'name')))
 
-        # People queries data
-        people_query_data = self._get_optimized_people_query_data()
-        context['people_queries'] = people_query_data
+    @property
+    def age_groups(self):
+        return self._shared('age_groups', lambda: people_by_age_group(Person.objects.all()))
 
-        # Disease queries data
-        disease_query_data = self._get_optimized_disease_query_data()
-        context['disease_queries'] = disease_query_data
+    def _get_kpi_data(self):
+        """Summary counts, KPI metrics and the latest records"""
+        totals = self.overview['totals']
 
-        # Health record queries data
-        health_record_query_data = self._get_optimized_health_record_query_data()
-        context['health_record_queries'] = health_record_query_data
+        return {
+            'total_records': totals['records'],
+            'distinct_people': Person.objects.count(),
+            'distinct_locations': len(self.location_list),
+            'recent_records': list(HealthRecord.objects.order_by('-date_of_data_collection').values(
+                'id', 'date_of_data_collection', 'disease__name', 'disease_severity',
+                'infection_risk_level', 'outbreak_status', 'person__location__name'
+            )[:10]),
+            'active_cases': totals['active'],
+            'recovered_cases': totals['recovered'],
+            'critical_cases': self.overview['disease_severity'].get('Severe', 0),
+        }
 
-        # Demographic queries data
-        demographic_query_data = self._get_optimized_demographic_query_data()
-        context['demographic_queries'] = demographic_query_data
+    def _get_distribution_data(self):
+        """Severity, risk level and outbreak status distributions"""
+        distributions = {}
+        for key, field in [('severity_data', 'disease_severity'),
+                           ('risk_data', 'infection_risk_level'),
+                           ('outbreak_data', 'outbreak_status')]:
+            counts = sorted(self.overview[field].items())
+            distributions[key] = {
+                'labels': [label for label, _ in counts],
+                'data': [count for _, count in counts]
+            }
+        return distributions
 
-        # Cache the generated data for future requests (expire after 5 minutes)
-        try:
-            cache.set('consolidated_dashboard_data', context, 300)
-        except TypeError as e:
-            # Handle the case where the context contains non-serializable objects
-            print(f"Error caching dashboard data: {e}")
-            # Continue without caching
+    def _get_location_data(self):
+        """Location panels, built from the same per-location summary as the location page"""
+        location_context = LocationAnalysisView(request=getattr(self, 'request', None)).get_context_data()
+        return {
+            'location_data': location_context.get('location_data', []),
+            'environment_data': location_context.get('environment_data', '{}'),
+            'resource_data': location_context.get('resource_data', '{}'),
+            'risk_summary': location_context.get('risk_summary', '{}'),
+        }
 
-        return context
+    def _get_prediction_data(self):
+        """Forecast chart (use the existing implementation for now)"""
+        prediction_context = DiseasePredictionView(request=getattr(self, 'request', None)).get_context_data()
+        return {
+            'time_series': prediction_context.get('time_series', {}),
+        }
+
+    def _get_query_panel_data(self):
+        """The four query tabs, with optimized queries instead of the full views"""
+        return {
+            'people_queries': self._get_optimized_people_query_data(),
+            'disease_queries': self._get_optimized_disease_query_data(),
+            'health_record_queries': self._get_optimized_health_record_query_data(),
+            'demographic_queries': self._get_optimized_demographic_query_data(),
+        }
 
     def _get_optimized_people_query_data(self):
         """Optimized version of PeopleQueriesView data retrieval"""
-        # Create age groups for the chart
-        age_groups = {}
-
-        # Use a more efficient query with values and annotate
-        age_group_counts = Person.objects.values(
-            'demographics__age'
-        ).annotate(count=Count('id'))
-
-        for item in age_group_counts:
-            age = item.get('demographics__age')
-            if age:
-                age_group = 'Under 18' if age < 18 else \
-                           '18-29' if age < 30 else \
-                           '30-44' if age < 45 else \
-                           '45-59' if age < 60 else \
-                           '60-74' if age < 75 else '75+'
-                age_groups[age_group] = age_groups.get(age_group, 0) + item['count']
+        # Age groups are bucketed in the database
+        age_groups = self.age_groups
 
         return {
             'available_queries': [
@@ -477,22 +472,24 @@ class ConsolidatedDashboardView(TemplateView):
                     'description': 'View vaccination status distribution'
                 }
             ],
-            'query_results': [{'age_group': k, 'count': v} for k, v in age_groups.items()],
+            'query_results': age_groups,
             'query_title': 'People by Age Groups',
             'is_chart': True,
             'chart_type': 'bar',
-            'chart_labels': list(age_groups.keys()),
-            'chart_data': list(age_groups.values()),
-            'locations': Location.objects.all(),
+            'chart_labels': [item['age_group'] for item in age_groups],
+            'chart_data': [item['count'] for item in age_groups],
+            'locations': self.location_list,
             'error': None,
         }
 
     def _get_optimized_disease_query_data(self):
         """Optimized version of DiseaseQueriesView data retrieval"""
         # Get disease prevalence data
-        disease_counts = HealthRecord.objects.values('disease__name').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]  # Limit to top 10 for performance
+        disease_counts = sorted(
+            ({'disease__name': self.disease_names.get(disease_id), 'count': count}
+             for disease_id, count in self.overview['disease_id'].items()),
+            key=lambda item: (-item['count'], item['disease__name'] or '')
+        )[:10]  # Limit to top 10 for performance
 
         return {
             'available_queries': [
@@ -518,16 +515,17 @@ class ConsolidatedDashboardView(TemplateView):
             'chart_type': 'radar',
             'chart_labels': [item['disease__name'] for item in disease_counts],
             'chart_data': [item['count'] for item in disease_counts],
-            'diseases': Disease.objects.all(),
+            'diseases': [{'id': disease_id, 'name': name} for disease_id, name in self.disease_names.items()],
             'error': None,
         }
 
     def _get_optimized_health_record_query_data(self):
         """Optimized version of HealthRecordQueriesView data retrieval"""
         # Get risk level distribution
-        risk_counts = HealthRecord.objects.values('infection_risk_level').annotate(
-            count=Count('id')
-        ).order_by('infection_risk_level')
+        risk_counts = [
+            {'infection_risk_level': level, 'count': count}
+            for level, count in sorted(self.overview['infection_risk_level'].items())
+        ]
 
         return {
             'available_queries': [
@@ -558,18 +556,8 @@ class ConsolidatedDashboardView(TemplateView):
 
     def _get_optimized_demographic_query_data(self):
         """Optimized version of DemographicQueriesView data retrieval"""
-        # Create age groups
-        demographics = Demographics.objects.annotate(
-            age_group=Case(
-                When(age__lt=18, then=Value('Under 18')),
-                When(age__lt=30, then=Value('18-29')),
-                When(age__lt=45, then=Value('30-44')),
-                When(age__lt=60, then=Value('45-59')),
-                When(age__lt=75, then=Value('60-74')),
-                default=Value('75+'),
-                output_field=CharField(),
-            )
-        ).values('age_group').annotate(count=Count('id')).order_by('age_group')
+        # Create age groups (the same counts as the people panel, every person has one demographics row)
+        demographics = self.age_groups
 
         return {
             'available_queries': [
@@ -595,15 +583,17 @@ class ConsolidatedDashboardView(TemplateView):
             'chart_type': 'doughnut',
             'chart_labels': [item['age_group'] for item in demographics],
             'chart_data': [item['count'] for item in demographics],
-            'locations': Location.objects.all(),
+            'locations': self.location_list,
             'error': None,
         }
 
-def consolidated_dashboard(request):
+@data_conditional
+async def consolidated_dashboard(request):
     """Consolidated dashboard view for decision makers"""
     view = ConsolidatedDashboardView.as_view()
-    return view(request)
+    return await view(request)
 
+@data_conditional
 def api_disease_trends(request):
     """API endpoint to get disease trends over time"""
     # Get date range from request parameters or use defaults
@@ -622,44 +612,33 @@ def api_disease_trends(request):
         start_date = end_date - timedelta(days=30)
         print(f"Error parsing dates: {e}")
 
-    # Query daily case counts
-    daily_data = HealthRecord.objects.filter(
-        date_of_data_collection__gte=start_date,
-        date_of_data_collection__lte=end_date
-    ).values('date_of_data_collection').annotate(
-        count=Count('id')
-    ).order_by('date_of_data_collection')
+    if isinstance(start_date, datetime):
+        start_date, end_date = start_date.date(), end_date.date()
 
-    # Format for Chart.js
-    dates = [item['date_of_data_collection'].strftime('%Y-%m-%d') for item in daily_data]
-    counts = [item['count'] for item in daily_data]
-
-    # Also get severity breakdown by day
-    severity_data = {}
-    for severity in ['None', 'Mild', 'Moderate', 'Severe']:
-        severity_counts = HealthRecord.objects.filter(
-            date_of_data_collection__gte=start_date,
-            date_of_data_collection__lte=end_date,
-            disease_severity=severity
-        ).values('date_of_data_collection').annotate(
-            count=Count('id')
-        ).order_by('date_of_data_collection')
-
-        # Create a dict mapping date to count for this severity
-        severity_dict = {
-            item['date_of_data_collection'].strftime('%Y-%m-%d'): item['count'] 
-            for item in severity_counts
-        }
+    # Bucket size for the series: day (default), week or month
+    bucket = request.GET.get('bucket', 'day')
+    if bucket not in TREND_BUCKETS:
+        return JsonResponse({'error': f"bucket must be one of {', '.join(TREND_BUCKETS)}"}, status=400)
 
-        # Ensure all dates have a value (0 if no data)
-        severity_data[severity] = [severity_dict.get(date, 0) for date in dates]
+    # One query: totals and per-severity counts for every bucket, empty buckets included
+    rows = severity_trends(start_date, end_date, bucket)
+
+    # Format for Chart.js
+    dates = [str(row[0]) for row in rows]
+    counts = [row[1] for row in rows]
+    severity_data = {
+        severity: [row[2 + index] for row in rows]
+        for index, severity in enumerate(SEVERITIES)
+    }
 
     return JsonResponse({
+        'bucket': bucket,
         'dates': dates,
         'total_counts': counts,
         'severity_data': severity_data
     })
 
+@data_conditional
 def api_environmental_impact(request):
     """API endpoint to analyze environmental factors impact on disease metrics"""
     # Fetch data joining environmental factors with health records
@@ -688,48 +667,198 @@ def api_environmental_impact(request):
         'environmental_data': data
     })
 
-def api_location_risk_data(request):
-    """API endpoint to get risk data by location"""
-    # Sample location data for demo
-    sample_data = [
-        {
-            'id': 1,
-            'name': 'Downtown',
-            'type': 'Urban',
-            'total_records': 3245,
-            'risk_distribution': {
-                'high': 35,
-                'medium': 120,
-                'low': 3090
-            },
-            'environmental_factors': {
-                'aqi': 120,
-                'temperature': 30,
-                'humidity': 50
-            }
+def _location_risk_item(location):
+    return {
+        'id': location['id'],
+        'name': location['name'],
+        'type': location['type'],
+        'latitude': location['latitude'],
+        'longitude': location['longitude'],
+        'risk_level': location['risk_level'],
+        'total_records': location['record_count'],
+        'risk_distribution': {
+            'high': location['high_risk'],
+            'medium': location['medium_risk'],
+            'low': location['low_risk']
         },
-        {
-            'id': 2,
-            'name': 'Westside',
-            'type': 'Suburban',
-            'total_records': 2178,
-            'risk_distribution': {
-                'high': 18,
-                'medium': 87,
-                'low': 2073
-            },
-            'environmental_factors': {
-                'aqi': 60,
-                'temperature': 25,
-                'humidity': 55
-            }
+        'environmental_factors': {
+            'aqi': location['aqi'],
+            'temperature': location['temperature'],
+            'humidity': location['humidity']
+        }
+    }
+
+def _location_cluster_item(cluster):
+    return {
+        'geohash': cluster['geohash'],
+        'location_count': cluster['location_count'],
+        'latitude': cluster['latitude'],
+        'longitude': cluster['longitude'],
+        'risk_level': cluster['risk_level'],
+        'total_records': cluster['record_count'],
+        'risk_distribution': {
+            'high': cluster['high_risk'],
+            'medium': cluster['medium_risk'],
+            'low': cluster['low_risk']
+        },
+        'environmental_factors': {
+            'aqi': cluster['aqi']
         }
-    ]
+    }
+
+@data_conditional
+def api_location_risk_data(request):
+    """API endpoint to get risk data by location
+
+    Without parameters every location is returned. With
+    ?bbox=west,south,east,north&zoom=z only the locations inside the map
+    viewport are, and below locations.CLUSTER_MAX_ZOOM they come back as
+    clusters aggregated by geohash cell.
+    """
+    if 'bbox' not in request.GET:
+        summary = cached_section('locations', location_summary, _data_version(request)[0])
+        return JsonResponse({'locations': [_location_risk_item(location) for location in summary]})
+
+    try:
+        west, south, east, north = (float(value) for value in request.GET['bbox'].split(','))
+        zoom = int(request.GET.get('zoom', locations.CLUSTER_MAX_ZOOM))
+    except ValueError:
+        return JsonResponse({'error': 'bbox must be west,south,east,north in degrees and zoom an integer'},
+                            status=400)
+    if not all(math.isfinite(value) for value in (west, south, east, north)):
+        return JsonResponse({'error': 'bbox coordinates must be finite numbers'}, status=400)
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= 90 and -90 <= north <= 90):
+        return JsonResponse({'error': 'bbox longitudes must be within -180..180 and latitudes within -90..90'},
+                            status=400)
+    if south > north:
+        return JsonResponse({'error': 'bbox south must not be greater than north'}, status=400)
+
+    visible = locations.in_bbox(south, west, north, east)
+    precision = locations.cluster_precision(south, west, north, east, zoom)
+    response = {'bbox': [west, south, east, north], 'zoom': zoom, 'clustered': precision is not None}
+    if precision is None:
+        response['locations'] = [_location_risk_item(location) for location in location_summary(visible)]
+    else:
+        response['clusters'] = [_location_cluster_item(cluster)
+                                for cluster in locations.location_clusters(precision, visible)]
+    return JsonResponse(response)
+
+def _forecast_created_at(request):
+    """Time of the last batch_forecast run, read once per request"""
+    if not hasattr(request, '_forecast_created_at'):
+        request._forecast_created_at = SeriesForecast.objects.values_list('created_at', flat=True).first()
+    return request._forecast_created_at
+
+def forecast_etag(request, *args, **kwargs):
+    created_at = _forecast_created_at(request)
+    return f'forecast-{created_at.timestamp() if created_at else 0}'
+
+def forecast_last_modified(request, *args, **kwargs):
+    return _forecast_created_at(request)
+
+@cache_control(no_cache=True)
+@condition(etag_func=forecast_etag, last_modified_func=forecast_last_modified)
+def api_forecast(request):
+    """API endpoint serving the precomputed per-location, per-disease forecasts
+
+    Filters: location and disease (id or name), start and end (YYYY-MM-DD).
+    """
+    forecasts = SeriesForecast.objects.all()
+    for parameter in ('location', 'disease'):
+        value = request.GET.get(parameter)
+        if value:
+            lookup = f'{parameter}_id' if value.isdigit() else f'{parameter}__name'
+            forecasts = forecasts.filter(**{lookup: value})
+    try:
+        if request.GET.get('start'):
+            forecasts = forecasts.filter(day__gte=datetime.strptime(request.GET['start'], '%Y-%m-%d').date())
+        if request.GET.get('end'):
+            forecasts = forecasts.filter(day__lte=datetime.strptime(request.GET['end'], '%Y-%m-%d').date())
+    except ValueError:
+        return JsonResponse({'error': 'start and end must be dates in YYYY-MM-DD format'}, status=400)
+
+    rows = forecasts.order_by('location_id', 'disease_id', 'day').values_list(
+        'location_id', 'location__name', 'disease_id', 'disease__name',
+        'day', 'predicted', 'lower', 'upper', 'model_name', 'data_version'
+    )
+
+    # One entry per series, with its days as parallel lists for charting
+    series = []
+    for (location_id, location, disease_id, disease), days in itertools.groupby(rows, key=lambda row: row[:4]):
+        days = list(days)
+        series.append({
+            'location_id': location_id,
+            'location': location,
+            'disease_id': disease_id,
+            'disease': disease,
+            'model': days[0][8],
+            'data_version': days[0][9],
+            'dates': [day[4].strftime('%Y-%m-%d') for day in days],
+            'predicted': [day[5] for day in days],
+            'lower': [day[6] for day in days],
+            'upper': [day[7] for day in days],
+        })
 
     return JsonResponse({
-        'locations': sample_data
+        'series': series
     })
 
+def filter_health_records(params):
+    """HealthRecord queryset for the start_date/end_date (YYYY-MM-DD, inclusive) filters in `params`
+
+    Raises ValueError naming the parameter when a date is malformed.
+    """
+    records = HealthRecord.objects.all()
+    dates = {}
+    for name in ('start_date', 'end_date'):
+        if params.get(name):
+            try:
+                dates[name] = timezone.make_aware(datetime.strptime(params[name], '%Y-%m-%d'))
+            except ValueError:
+                raise ValueError(f'{name} must be a date in YYYY-MM-DD format') from None
+    if 'start_date' in dates:
+        records = records.filter(date_of_data_collection__gte=dates['start_date'])
+    if 'end_date' in dates:
+        records = records.filter(date_of_data_collection__lt=dates['end_date'] + timedelta(days=1))
+    return records
+
+def health_record_rows(records):
+    """One flat dict per health record with its disease and location names, for tables and exports"""
+    return records.values(
+        'id',
+        'date_of_data_collection',
+        'disease_severity',
+        'infection_risk_level',
+        'outbreak_status',
+        'hospitalization_required',
+        'recovery_time_days',
+        disease_name=F('disease__name'),
+        location_name=F('person__location__name'),
+    )
+
+# Export name -> function from the request's GET parameters to a values() queryset
+EXPORTS = {
+    'people': lambda params: people_rows(filter_people(params)),
+    'health-records': lambda params: health_record_rows(filter_health_records(params)),
+}
+
+@data_conditional
+def api_export(request, dataset):
+    """Stream every row of a query page's dataset as CSV or NDJSON (?format=csv|ndjson)
+
+    Takes the same filters as the query page; rows come out in primary key order.
+    """
+    if dataset not in EXPORTS:
+        return JsonResponse({'error': f"dataset must be one of {', '.join(EXPORTS)}"}, status=404)
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in exports.EXPORT_FORMATS:
+        return JsonResponse({'error': f"format must be one of {', '.join(exports.EXPORT_FORMATS)}"}, status=400)
+    try:
+        rows = EXPORTS[dataset](request.GET).order_by('id')
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return exports.export_response(rows, export_format, dataset)
+
 # Query Section Views
 class PeopleQueriesView(TemplateView):
     template_name = 'dashboard/queries/people.html'
@@ -755,58 +884,47 @@ class PeopleQueriesView(TemplateView):
         context['locations'] = Location.objects.all()
 
         # Always execute the people by demographics query by default
-        # Create age groups for the chart
-        age_groups = {}
-        for person in Person.objects.all():
-            if hasattr(person, 'demographics') and person.demographics and person.demographics.age:
-                age_group = 'Under 18' if person.demographics.age < 18 else \
-                           '18-29' if person.demographics.age < 30 else \
-                           '30-44' if person.demographics.age < 45 else \
-                           '45-59' if person.demographics.age < 60 else \
-                           '60-74' if person.demographics.age < 75 else '75+'
-                age_groups[age_group] = age_groups.get(age_group, 0) + 1
-
-        context['query_results'] = [{'age_group': k, 'count': v} for k, v in age_groups.items()]
+        # Create age groups for the chart, bucketed in the database
+        age_groups = people_by_age_group(Person.objects.all())
+
+        context['query_results'] = age_groups
         context['query_title'] = 'People by Age Groups'
         context['is_chart'] = True
         context['chart_type'] = 'horizontalBar'  # Using horizontal bar chart
-        context['chart_labels'] = list(age_groups.keys())
-        context['chart_data'] = list(age_groups.values())
+        context['chart_labels'] = [item['age_group'] for item in age_groups]
+        context['chart_data'] = [item['count'] for item in age_groups]
 
         # Handle query execution if requested (for backward compatibility)
         query_id = self.request.GET.get('query')
         if query_id:
             if query_id == 'people_by_demographics':
                 # Execute people by demographics query
-                age_min = self.request.GET.get('age_min')
-                age_max = self.request.GET.get('age_max')
-                gender = self.request.GET.get('gender')
-
-                query = Person.objects.all()
+                query = filter_people(self.request.GET)
 
-                if age_min and age_max:
-                    query = query.filter(demographics__age__gte=age_min, demographics__age__lte=age_max)
-
-                if gender:
-                    query = query.filter(demographics__gender=gender)
-
-                context['query_results'] = query
+                # Only one page of people is fetched, by keyset on the primary key; the chart covers all of them
+                rows = people_rows(query)
+                size = pagination.page_size(self.request.GET.get('page_size'), PEOPLE_PAGE_SIZE)
+                try:
+                    page = pagination.paginate(rows, ['id'], self.request.GET.get('cursor'), size)
+                except ValueError as e:
+                    context['error'] = str(e)
+                    page = pagination.paginate(rows, ['id'], None, size)
+                params = self.request.GET.copy()
+                for name in ('cursor', 'count'):
+                    params.pop(name, None)
+
+                context['query_results'] = page
+                context['page_obj'] = page
+                context['page_query'] = params.urlencode()
+                context['show_count'] = 'count' in self.request.GET
                 context['query_title'] = 'People Filtered by Demographics'
                 context['is_chart'] = True
                 context['chart_type'] = 'bar'  # Added bar chart (column chart)
                 # Create age groups for the chart
-                age_groups = {}
-                for person in query:
-                    if hasattr(person, 'demographics') and person.demographics and person.demographics.age:
-                        age_group = 'Under 18' if person.demographics.age < 18 else \
-                                   '18-29' if person.demographics.age < 30 else \
-                                   '30-44' if person.demographics.age < 45 else \
-                                   '45-59' if person.demographics.age < 60 else \
-                                   '60-74' if person.demographics.age < 75 else '75+'
-                        age_groups[age_group] = age_groups.get(age_group, 0) + 1
-
-                context['chart_labels'] = list(age_groups.keys())
-                context['chart_data'] = list(age_groups.values())
+                age_groups = people_by_age_group(query)
+
+                context['chart_labels'] = [item['age_group'] for item in age_groups]
+                context['chart_data'] = [item['count'] for item in age_groups]
 
             elif query_id == 'vaccination_status':
                 # Execute vaccination status query
@@ -854,8 +972,8 @@ class DiseaseQueriesView(TemplateView):
         context['diseases'] = Disease.objects.all()
 
         # Always execute disease prevalence query
-        disease_counts = HealthRecord.objects.values('disease__name').annotate(
-            count=Count('id')
+        disease_counts = DailyHealthRollup.objects.values('disease__name').annotate(
+            count=Sum('record_count')
         ).order_by('-count')
         context['query_results'] = disease_counts
         context['query_title'] = 'Disease Prevalence'
@@ -888,9 +1006,9 @@ class DiseaseQueriesView(TemplateView):
                 if disease_id:
                     try:
                         disease = Disease.objects.get(id=disease_id)
-                        severity_counts = HealthRecord.objects.filter(disease=disease).values(
+                        severity_counts = DailyHealthRollup.objects.filter(disease=disease).values(
                             'disease_severity'
-                        ).annotate(count=Count('id')).order_by('disease_severity')
+                        ).annotate(count=Sum('record_count')).order_by('disease_severity')
                         context['query_results'] = severity_counts
                         context['query_title'] = f'Severity Analysis for {disease.name}'
                         context['is_chart'] = True
@@ -901,8 +1019,8 @@ class DiseaseQueriesView(TemplateView):
                         context['error'] = 'Disease not found'
                 else:
                     # Overall severity distribution
-                    severity_counts = HealthRecord.objects.values('disease_severity').annotate(
-                        count=Count('id')
+                    severity_counts = DailyHealthRollup.objects.values('disease_severity').annotate(
+                        count=Sum('record_count')
                     ).order_by('disease_severity')
                     context['query_results'] = severity_counts
                     context['query_title'] = 'Overall Disease Severity Distribution'
@@ -935,12 +1053,17 @@ class HealthRecordQueriesView(TemplateView):
                 'id': 'hospitalization_analysis',
                 'name': 'Hospitalization Analysis',
                 'description': 'Analyze hospitalization rates and patterns'
+            },
+            {
+                'id': 'record_list',
+                'name': 'Record List',
+                'description': 'Browse individual health records, newest first'
             }
         ]
 
         # Always execute records by risk level query
-        risk_counts = HealthRecord.objects.values('infection_risk_level').annotate(
-            count=Count('id')
+        risk_counts = DailyHealthRollup.objects.values('infection_risk_level').annotate(
+            count=Sum('record_count')
         ).order_by('infection_risk_level')
         context['query_results'] = risk_counts
         context['query_title'] = 'Health Records by Risk Level'
@@ -954,9 +1077,9 @@ class HealthRecordQueriesView(TemplateView):
         if query_id:
             if query_id == 'records_by_date':
                 # Execute records by date query
-                date_counts = HealthRecord.objects.values('date_of_data_collection__date').annotate(
-                    count=Count('id')
-                ).order_by('date_of_data_collection__date')
+                date_counts = DailyHealthRollup.objects.values(
+                    date_of_data_collection__date=F('day')
+                ).annotate(count=Sum('record_count')).order_by('date_of_data_collection__date')
                 context['query_results'] = date_counts
                 context['query_title'] = 'Health Records by Date'
                 context['is_chart'] = True
@@ -974,9 +1097,14 @@ class HealthRecordQueriesView(TemplateView):
 
             elif query_id == 'hospitalization_analysis':
                 # Execute hospitalization analysis query
-                hospitalization_counts = HealthRecord.objects.values('hospitalization_required').annotate(
-                    count=Count('id')
+                totals = DailyHealthRollup.objects.aggregate(
+                    records=Coalesce(Sum('record_count'), 0),
+                    hospitalized=Coalesce(Sum('hospitalized_count'), 0)
                 )
+                hospitalization_counts = [
+                    {'hospitalization_required': True, 'count': totals['hospitalized']},
+                    {'hospitalization_required': False, 'count': totals['records'] - totals['hospitalized']},
+                ]
                 context['query_results'] = hospitalization_counts
                 context['query_title'] = 'Hospitalization Analysis'
                 context['is_chart'] = True
@@ -987,6 +1115,28 @@ class HealthRecordQueriesView(TemplateView):
                     next((item['count'] for item in hospitalization_counts if not item['hospitalization_required']), 0)
                 ]
 
+            elif query_id == 'record_list':
+                # Execute record list query, one keyset page at a time on the date index
+                size = pagination.page_size(self.request.GET.get('page_size'))
+                try:
+                    rows = health_record_rows(filter_health_records(self.request.GET))
+                    page = pagination.paginate(rows, ['-date_of_data_collection', '-id'],
+                                               self.request.GET.get('cursor'), size)
+                except ValueError as e:
+                    context['error'] = str(e)
+                    page = pagination.paginate(health_record_rows(HealthRecord.objects.all()),
+                                               ['-date_of_data_collection', '-id'], None, size)
+                params = self.request.GET.copy()
+                for name in ('cursor', 'count'):
+                    params.pop(name, None)
+
+                context['query_results'] = page
+                context['page_obj'] = page
+                context['page_query'] = params.urlencode()
+                context['show_count'] = 'count' in self.request.GET
+                context['query_title'] = 'Health Records'
+                context['is_chart'] = False
+
         return context
 
 class DemographicQueriesView(TemplateView):
@@ -1028,17 +1178,7 @@ class DemographicQueriesView(TemplateView):
         query = Demographics.objects.all()
 
         # Annotate with age groups and count
-        demographics = query.annotate(
-            age_group=Case(
-                When(age__lt=18, then=Value('Under 18')),
-                When(age__lt=30, then=Value('18-29')),
-                When(age__lt=45, then=Value('30-44')),
-                When(age__lt=60, then=Value('45-59')),
-                When(age__lt=75, then=Value('60-74')),
-                default=Value('75+'),
-                output_field=CharField(),
-            )
-        ).values('age_group').annotate(count=Count('id')).order_by('age_group')
+        demographics = query.annotate(age_group=age_group_case()).values('age_group').annotate(count=Count('id')).order_by('age_group')
 
         context['query_results'] = demographics
         context['query_title'] = f'Age Distribution - {location_name}'
@@ -1065,17 +1205,7 @@ class DemographicQueriesView(TemplateView):
                 # If location filter is applied, re-execute with filter
                 if location_filter:
                     query = Demographics.objects.filter(person__location=location_filter)
-                    demographics = query.annotate(
-                        age_group=Case(
-                            When(age__lt=18, then=Value('Under 18')),
-                            When(age__lt=30, then=Value('18-29')),
-                            When(age__lt=45, then=Value('30-44')),
-                            When(age__lt=60, then=Value('45-59')),
-                            When(age__lt=75, then=Value('60-74')),
-                            default=Value('75+'),
-                            output_field=CharField(),
-                        )
-                    ).values('age_group').annotate(count=Count('id')).order_by('age_group')
+                    demographics = query.annotate(age_group=age_group_case()).values('age_group').annotate(count=Count('id')).order_by('age_group')
 
                     context['query_results'] = demographics
                     context['query_title'] = f'Age Distribution - {location_name}'
@@ -1124,10 +1254,10 @@ class DemographicQueriesView(TemplateView):
 
 # Function-based views for the query sections
 def people_queries(request):
-    """People queries view - redirects to consolidated dashboard with people section"""
-    query = request.GET.get('query', '')
-    if query:
-        return redirect(f'/?query={query}&section=people')
+    """People queries view - runs a submitted query here, since the filtered people page by cursor;
+    redirects to consolidated dashboard with people section otherwise"""
+    if request.GET.get('query'):
+        return PeopleQueriesView.as_view()(request)
     return redirect('/?section=people')
 
 def disease_queries(request):
@@ -1138,10 +1268,10 @@ def disease_queries(request):
     return redirect('/?section=diseases')
 
 def health_record_queries(request):
-    """Health record queries view - redirects to consolidated dashboard with health-records section"""
-    query = request.GET.get('query', '')
-    if query:
-        return redirect(f'/?query={query}&section=health-records')
+    """Health record queries view - runs a submitted query here, since the record list pages by cursor;
+    redirects to consolidated dashboard with health-records section otherwise"""
+    if request.GET.get('query'):
+        return HealthRecordQueriesView.as_view()(request)
     return redirect('/?section=health-records')
 
 def demographic_queries(request):
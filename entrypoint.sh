@@ -16,12 +16,23 @@ fi
 echo "Applying database migrations..."
 python manage.py migrate
 
+# Build the daily rollups for data that predates them
+python manage.py refresh_rollups --if-empty
+
 # Import default data if needed
 if [ "$LOAD_SAMPLE_DATA" = "true" ]; then
     echo "Loading sample data..."
     python manage.py import_sample_data
 fi
 
+# Give rows loaded outside the monthly partitions their own (no-op unless the tables are partitioned)
+if [ "$DATABASE" = "postgres" ]; then
+    python manage.py manage_partitions
+fi
+
+# Fit the disease forecast for the current data, unless it already exists
+python manage.py train_forecast
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput